@@ -0,0 +1,483 @@
+"""
+Audit Index - audit report metadata from local auditor dumps, indexed for lookups
+
+Dumps live under AUDIT_DUMPS_DIR (default backend/data/audit_dumps), one
+directory per source named after the auditor (certik/, openzeppelin/,
+trailofbits/, ...), holding .json (a list, or {"audits": [...]}), .jsonl or
+.csv files. Each report is normalized from the field names the dumps use:
+
+- project: name / project / projectName, symbol: symbol / tokenSymbol
+- audit_date: audit_date / auditDate / date / publishedAt (ISO date)
+- security_score: security_score / securityScore / score (0-100, optional)
+- contracts: a list of "0x..." strings or {"chain", "address"} objects, or
+  "chain:address;..." in CSV; chain / network for bare addresses
+- vulnerabilities: counts per severity (critical, major/high, medium,
+  minor/low, informational/info), or a findings list of {severity, title}
+- report_url, contract_verified, report id (id / report_id)
+
+scripts/ingest_audits.py loads them into AUDIT_INDEX_PATH (default
+backend/data/audits.sqlite), indexed by project name, symbol and contract
+address (with its chain). Ingestion is incremental: files whose size and
+mtime (or content digest) are unchanged are skipped, changed files replace
+their reports, and deleted files drop theirs. Readers keep working while an
+ingest runs (WAL journal).
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .contract_index import is_contract_address, normalize_address
+from services.metrics import REGISTRY
+
+logger = logging.getLogger("decryptify")
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+AUDIT_INDEX_PATH = os.getenv("AUDIT_INDEX_PATH", os.path.join(_DATA_DIR, "audits.sqlite"))
+AUDIT_DUMPS_DIR = os.getenv("AUDIT_DUMPS_DIR", os.path.join(_DATA_DIR, "audit_dumps"))
+
+# Display names per source directory; others are title-cased
+AUDITORS = {
+    "certik": "CertiK",
+    "openzeppelin": "OpenZeppelin",
+    "trailofbits": "Trail of Bits",
+    "quantstamp": "Quantstamp",
+    "peckshield": "PeckShield",
+    "slowmist": "SlowMist",
+    "hacken": "Hacken",
+    "consensys": "ConsenSys Diligence",
+    "spearbit": "Spearbit",
+}
+
+SEVERITIES = ("critical", "major", "medium", "minor", "informational")
+# Severity names used by the different auditors
+SEVERITY_ALIASES = {
+    "critical": "critical",
+    "high": "major",
+    "major": "major",
+    "medium": "medium",
+    "moderate": "medium",
+    "low": "minor",
+    "minor": "minor",
+    "info": "informational",
+    "informational": "informational",
+    "note": "informational",
+    "optimization": "informational",
+}
+
+FIELD_ALIASES = {
+    "id": ("id", "report_id", "reportId"),
+    "project": ("project", "name", "projectName", "project_name"),
+    "symbol": ("symbol", "tokenSymbol", "token_symbol", "ticker"),
+    "audit_date": ("audit_date", "auditDate", "date", "publishedAt", "published_at"),
+    "security_score": ("security_score", "securityScore", "score"),
+    "report_url": ("report_url", "reportUrl", "url", "report"),
+    "contract_verified": ("contract_verified", "contractVerified", "verified"),
+    "contracts": ("contracts", "addresses", "contract", "address"),
+    "chain": ("chain", "network", "platform"),
+    "vulnerabilities": ("vulnerabilities", "severity_counts", "findingsBySeverity"),
+    "findings": ("findings", "key_findings", "issues"),
+}
+
+AUDIT_LOOKUPS = REGISTRY.counter(
+    "decryptify_audit_index_lookups_total",
+    "Audit index lookups by key type (name, address) and outcome (hit, miss)",
+    ("by", "outcome"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    digest TEXT NOT NULL,
+    reports INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audits (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    source TEXT NOT NULL,
+    audit_date TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audits_file ON audits (file);
+CREATE TABLE IF NOT EXISTS names (
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    audit_id INTEGER NOT NULL,
+    PRIMARY KEY (key, kind, audit_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contracts (
+    address TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    audit_id INTEGER NOT NULL,
+    PRIMARY KEY (address, chain, audit_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def name_key(name: str) -> str:
+    """Project names match case-, space- and punctuation-insensitively"""
+    return re.sub(r"[\W_]+", "", name.lower())
+
+
+def _field(raw: Dict[str, Any], name: str) -> Any:
+    for alias in FIELD_ALIASES[name]:
+        value = raw.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _contracts(raw: Dict[str, Any]) -> List[Dict[str, str]]:
+    default_chain = str(_field(raw, "chain") or "").lower()
+    value = _field(raw, "contracts")
+    if isinstance(value, str):
+        # CSV: "ethereum:0xabc;bsc:0xdef" or a bare address
+        value = [item for item in re.split(r"[;,\s]+", value) if item]
+    contracts = []
+    for item in value if isinstance(value, list) else [value] if value else []:
+        if isinstance(item, dict):
+            chain = str(item.get("chain") or item.get("network") or default_chain).lower()
+            address = item.get("address")
+        else:
+            chain, _, address = str(item).rpartition(":")
+            chain = chain.lower() or default_chain
+        if address:
+            contracts.append({"chain": chain, "address": normalize_address(str(address))})
+    return contracts
+
+
+def _vulnerabilities(raw: Dict[str, Any], findings: List[Any]) -> Optional[Dict[str, int]]:
+    counts = _field(raw, "vulnerabilities")
+    if isinstance(counts, str):
+        try:
+            counts = json.loads(counts)
+        except ValueError:
+            counts = None
+    if isinstance(counts, dict):
+        vulnerabilities = dict.fromkeys(SEVERITIES, 0)
+        for severity, count in counts.items():
+            key = SEVERITY_ALIASES.get(str(severity).lower())
+            if key:
+                vulnerabilities[key] += int(count or 0)
+        return vulnerabilities
+    severities = [finding.get("severity") for finding in findings if isinstance(finding, dict)]
+    if not any(severities):
+        return None
+    vulnerabilities = dict.fromkeys(SEVERITIES, 0)
+    for severity in severities:
+        key = SEVERITY_ALIASES.get(str(severity or "").lower())
+        if key:
+            vulnerabilities[key] += 1
+    return vulnerabilities
+
+
+def _score(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    score = float(value)
+    return int(score) if score.is_integer() else round(score, 1)
+
+
+def normalize_report(raw: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+    """One dump entry as an audit record, or None when it names no project or contract"""
+    project = _field(raw, "project")
+    contracts = _contracts(raw)
+    if not project and not contracts:
+        return None
+    findings = _field(raw, "findings") or []
+    if isinstance(findings, str):
+        findings = [item.strip() for item in findings.split(";") if item.strip()]
+    score = _field(raw, "security_score")
+    verified = _field(raw, "contract_verified")
+    if isinstance(verified, str):
+        verified = verified.strip().lower() in ("1", "true", "yes")
+    return {
+        "auditor": AUDITORS.get(source, source.replace("_", " ").title()),
+        "source": source,
+        "report_id": str(_field(raw, "id") or ""),
+        "project": str(project or ""),
+        "symbol": str(_field(raw, "symbol") or "").upper(),
+        "audit_date": str(_field(raw, "audit_date") or "")[:10],
+        "security_score": _score(score),
+        "contract_verified": bool(verified) if verified is not None else None,
+        "vulnerabilities": _vulnerabilities(raw, findings if isinstance(findings, list) else []),
+        "key_findings": [
+            title for title in (
+                (finding.get("title") or finding.get("description")) if isinstance(finding, dict) else finding
+                for finding in (findings if isinstance(findings, list) else [])
+            )
+            if title
+        ][:10],
+        "report_url": str(_field(raw, "report_url") or ""),
+        "contracts": contracts,
+    }
+
+
+def read_dump(path: str) -> Iterator[Any]:
+    """Raw entries of a .json, .jsonl or .csv dump; a JSONL line that is not valid
+    JSON is yielded as its text"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line.strip()
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("audits") or data.get("reports") or data.get("data") or [data]
+        yield from data
+
+
+def read_reports(path: str, source: str) -> Tuple[List[Dict[str, Any]], int]:
+    """The audit records of a dump file and the number of malformed entries skipped.
+    A bad entry (invalid JSON line, non-numeric count, ...) only drops itself; an
+    unreadable file raises."""
+    reports, skipped = [], 0
+    for number, raw in enumerate(read_dump(path), 1):
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError(f"not an object: {str(raw)[:80]}")
+            report = normalize_report(raw, source)
+        except (ValueError, TypeError, AttributeError) as e:
+            if not skipped:
+                logger.warning(f"Skipping malformed entry {number} of audit dump {path}: {str(e)}")
+            skipped += 1
+            continue
+        if report is not None:
+            reports.append(report)
+    if skipped > 1:
+        logger.warning(f"Skipped {skipped} malformed entries of audit dump {path}")
+    return reports, skipped
+
+
+def _dump_files(dumps_dir: str) -> Iterator[Tuple[str, str]]:
+    """(source, absolute path) of every dump file"""
+    dumps_dir = os.path.abspath(dumps_dir)
+    if not os.path.isdir(dumps_dir):
+        return
+    for source in sorted(os.listdir(dumps_dir)):
+        source_dir = os.path.join(dumps_dir, source)
+        if not os.path.isdir(source_dir):
+            continue
+        for directory, _, names in sorted(os.walk(source_dir)):
+            for name in sorted(names):
+                if name.endswith((".json", ".jsonl", ".csv")):
+                    yield source.lower(), os.path.join(directory, name)
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AuditIndex:
+    """Audit reports by project name, symbol and contract address, in one SQLite file"""
+
+    def __init__(self, path: str = AUDIT_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self, writable: bool = False) -> sqlite3.Connection:
+        if writable:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+            return conn
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def _reader(self) -> Optional[sqlite3.Connection]:
+        """This thread's read-only connection, or None while there is no index"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if not os.path.exists(self.path):
+                return None
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def ingest(self, dumps_dir: str = AUDIT_DUMPS_DIR, full: bool = False) -> Dict[str, int]:
+        """Bring the index in line with the dump files; returns counts of files
+        added, updated, unchanged, removed and failed, of reports written and of
+        malformed entries skipped"""
+        counts = dict.fromkeys(("added", "updated", "unchanged", "removed", "failed", "reports", "skipped"), 0)
+        conn = self._connect(writable=True)
+        try:
+            if full:
+                with conn:
+                    for table in ("files", "audits", "names", "contracts"):
+                        conn.execute(f"DELETE FROM {table}")
+            known = {
+                path: (size, mtime, digest)
+                for path, size, mtime, digest in conn.execute("SELECT path, size, mtime, digest FROM files")
+            }
+            seen = set()
+            for source, path in _dump_files(dumps_dir):
+                seen.add(path)
+                stat = os.stat(path)
+                previous = known.get(path)
+                if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime):
+                    counts["unchanged"] += 1
+                    continue
+                digest = _digest(path)
+                if previous is not None and previous[2] == digest:
+                    with conn:
+                        conn.execute(
+                            "UPDATE files SET size = ?, mtime = ? WHERE path = ?", (stat.st_size, stat.st_mtime, path)
+                        )
+                    counts["unchanged"] += 1
+                    continue
+                try:
+                    reports, skipped = read_reports(path, source)
+                except (OSError, ValueError, TypeError, AttributeError) as e:
+                    # Keep the reports from the last good version of the file
+                    logger.warning(f"Could not read audit dump {path}: {str(e)}")
+                    counts["failed"] += 1
+                    continue
+                with conn:
+                    self._drop_file(conn, path)
+                    for report in reports:
+                        self._insert(conn, path, report)
+                    conn.execute(
+                        "INSERT INTO files (path, source, size, mtime, digest, reports, ingested_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (path, source, stat.st_size, stat.st_mtime, digest, len(reports), time.time()),
+                    )
+                counts["updated" if previous is not None else "added"] += 1
+                counts["reports"] += len(reports)
+                counts["skipped"] += skipped
+            # Files deleted from this dumps directory; other directories' files stay
+            prefix = os.path.join(os.path.abspath(dumps_dir), "")
+            for path in sorted(path for path in known if path.startswith(prefix) and path not in seen):
+                with conn:
+                    self._drop_file(conn, path)
+                counts["removed"] += 1
+            if full or counts["added"] or counts["updated"] or counts["removed"]:
+                reports, sources = conn.execute("SELECT COUNT(*), COUNT(DISTINCT source) FROM audits").fetchone()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                        [("version", f"{time.time():.6f}"), ("reports", str(reports)), ("sources", str(sources))],
+                    )
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        return counts
+
+    @staticmethod
+    def _drop_file(conn: sqlite3.Connection, path: str) -> None:
+        ids = "SELECT id FROM audits WHERE file = ?"
+        conn.execute(f"DELETE FROM names WHERE audit_id IN ({ids})", (path,))
+        conn.execute(f"DELETE FROM contracts WHERE audit_id IN ({ids})", (path,))
+        conn.execute("DELETE FROM audits WHERE file = ?", (path,))
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, path: str, report: Dict[str, Any]) -> None:
+        audit_id = conn.execute(
+            "INSERT INTO audits (file, source, audit_date, record) VALUES (?, ?, ?, ?)",
+            (path, report["source"], report["audit_date"], json.dumps(report, separators=(",", ":"))),
+        ).lastrowid
+        names = {(name_key(report["project"]), "name"), (report["symbol"].lower(), "symbol")}
+        conn.executemany(
+            "INSERT OR IGNORE INTO names (key, kind, audit_id) VALUES (?, ?, ?)",
+            [(key, kind, audit_id) for key, kind in names if key],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO contracts (address, chain, audit_id) VALUES (?, ?, ?)",
+            [(contract["address"], contract["chain"], audit_id) for contract in report["contracts"]],
+        )
+
+    def _audits(self, conn: sqlite3.Connection, where: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+        rows = conn.execute(
+            f"SELECT DISTINCT a.id, a.record FROM audits a WHERE a.id IN ({where}) "
+            "ORDER BY a.audit_date DESC, a.id DESC",
+            params,
+        ).fetchall()
+        return [json.loads(record) for _, record in rows]
+
+    def by_address(self, address: str, chain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Reports covering a contract address (on `chain`, when given), newest first"""
+        conn = self._reader()
+        audits: List[Dict[str, Any]] = []
+        if conn is not None:
+            where, params = "SELECT audit_id FROM contracts WHERE address = ?", (normalize_address(address),)
+            if chain:
+                where, params = where + " AND chain = ?", params + (chain.lower(),)
+            audits = self._audits(conn, where, params)
+        AUDIT_LOOKUPS.inc(by="address", outcome="hit" if audits else "miss")
+        return audits
+
+    def by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Reports for a project name, else for a token symbol, newest first"""
+        conn = self._reader()
+        audits: List[Dict[str, Any]] = []
+        if conn is not None:
+            key = name_key(name)
+            if key:
+                audits = self._audits(conn, "SELECT audit_id FROM names WHERE key = ? AND kind = 'name'", (key,))
+            symbol = name.strip().lower()
+            if not audits and symbol:
+                audits = self._audits(
+                    conn, "SELECT audit_id FROM names WHERE key = ? AND kind = 'symbol'", (symbol,)
+                )
+        AUDIT_LOOKUPS.inc(by="name", outcome="hit" if audits else "miss")
+        return audits
+
+    def lookup(self, query: str) -> List[Dict[str, Any]]:
+        """Reports for a contract address or a project name/symbol"""
+        if is_contract_address(query):
+            return self.by_address(query)
+        return self.by_name(query)
+
+    @property
+    def version(self) -> Optional[str]:
+        """Changes with every ingest that changed the index; None without an index"""
+        conn = self._reader()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, int]:
+        """Report and source counts as of the last ingest"""
+        conn = self._reader()
+        stats = {"reports": 0, "sources": 0}
+        if conn is not None:
+            try:
+                for name, value in conn.execute("SELECT name, value FROM meta WHERE name IN ('reports', 'sources')"):
+                    stats[name] = int(value)
+            except sqlite3.Error:
+                pass
+        return stats
+
+
+audit_index = AuditIndex()
@@ -0,0 +1,196 @@
+"""
+Batch screening - trust reports for a watch-list of projects
+
+The stages overlap:
+
+1. names are deduplicated by project key, and projects with a fresh cached
+   report are answered straight away
+2. the rest are resolved to CoinGecko ids with /search (contract addresses
+   from the contract index), concurrently. Names that resolve to the same
+   coin ("BTC", "bitcoin") are priced and analyzed once and share the outcome
+3. resolved ids are priced with bulk /coins/markets calls (up to 250 ids each)
+   as soon as a page fills or resolution finishes
+4. each priced project is analyzed from that market data (screen_project);
+   the page's numeric market-risk scores are computed in one vectorized pass
+
+All work runs in the batch priority class, so chats keep their share of the
+agent, CoinGecko and LLM pools, and every upstream call goes through the
+CoinGecko client's rate limiter. Results are yielded as they complete.
+"""
+import contextvars
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain.llms.base import LLM
+
+from .coin_info import MARKETS_PAGE_SIZE, fetch_markets, resolve_coin
+from .decryptify import cached_report, project_key, screen_project
+from .market_risk import assess_market_risk
+from services.metrics import REGISTRY
+from services.request_context import request_scope
+from services.scheduler import BATCH, priority_scope
+
+logger = logging.getLogger("decryptify")
+
+BATCH_MAX_PROJECTS = int(os.getenv("BATCH_MAX_PROJECTS", "200"))
+# Worker threads per batch request; the scheduler pools bound the work they start
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+BATCH_ITEMS = REGISTRY.counter(
+    "decryptify_batch_items_total",
+    "Batch screening results by status (ok, not_found, error)",
+    ("status",),
+)
+
+_SCORE_PATTERN = re.compile(r"^Trust Score: (.+?) \((.*)\)$", re.MULTILINE)
+
+
+def _item(key: str, inputs: List[str], status: str, **fields: Any) -> Dict[str, Any]:
+    BATCH_ITEMS.inc(status=status)
+    return {"type": "item", "project": key, "inputs": inputs, "status": status, **fields}
+
+
+def _report_fields(
+    report: str,
+    market: Optional[Dict[str, Any]] = None,
+    market_risk: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    match = _SCORE_PATTERN.search(report)
+    fields: Dict[str, Any] = {
+        "trust_score": match.group(1) if match else None,
+        "trust_level": match.group(2) if match else None,
+    }
+    if market:
+        fields.update(
+            coin_id=market["id"],
+            symbol=market["symbol"],
+            price=market["current_price"],
+            market_cap=market["market_cap"],
+            market_cap_rank=market["market_cap_rank"],
+            market_risk=market_risk,
+        )
+    fields["report"] = report
+    return fields
+
+
+def screen_projects(
+    names: List[str], llm: Optional[LLM] = None, user_id: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Screen a list of project names, yielding one item per distinct project as it
+    completes and then a summary. Closing the iterator cancels unstarted work.
+    """
+    started = time.monotonic()
+    inputs: Dict[str, List[str]] = {}
+    for name in names:
+        key = project_key(name)
+        if key:
+            inputs.setdefault(key, []).append(name)
+    counts = {"ok": 0, "not_found": 0, "error": 0}
+
+    def in_batch(fn: Callable, *args: Any) -> Any:
+        with priority_scope(BATCH), request_scope(user_id=user_id):
+            return fn(*args)
+
+    executor = ThreadPoolExecutor(max(1, BATCH_CONCURRENCY), thread_name_prefix="batch")
+    pending: Dict[Future, Tuple[str, Any]] = {}
+
+    def submit(stage: str, payload: Any, fn: Callable, *args: Any) -> None:
+        future = executor.submit(contextvars.copy_context().run, in_batch, fn, *args)
+        pending[future] = (stage, payload)
+
+    def finish(item: Dict[str, Any]) -> Dict[str, Any]:
+        counts[item["status"]] += 1
+        return item
+
+    # Coin id -> the key priced and analyzed for it; other keys resolving to the
+    # coin wait in `duplicates` for its outcome
+    coin_keys: Dict[str, str] = {}
+    duplicates: Dict[str, List[str]] = {}
+    outcomes: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+    def settle(key: str, status: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        outcomes[key] = (status, fields)
+        for k in [key] + duplicates.pop(key, []):
+            yield finish(_item(k, inputs[k], status, **fields))
+
+    try:
+        for key in inputs:
+            report = cached_report(key)
+            if report is not None:
+                yield finish(_item(key, inputs[key], "ok", cached=True, **_report_fields(report)))
+            else:
+                submit("resolve", key, resolve_coin, key)
+
+        unpriced: List[Tuple[str, Dict[str, Any]]] = []
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, payload = pending.pop(future)
+                error = future.exception()
+
+                if stage == "resolve":
+                    key = payload
+                    if error is not None:
+                        yield finish(_item(key, inputs[key], "error", error=str(error)))
+                    elif future.result() is None:
+                        yield finish(_item(key, inputs[key], "not_found"))
+                    else:
+                        coin = future.result()
+                        first = coin_keys.setdefault(coin["id"], key)
+                        if first == key:
+                            unpriced.append((key, coin))
+                        elif first in outcomes:
+                            status, fields = outcomes[first]
+                            yield finish(_item(key, inputs[key], status, **fields))
+                        else:
+                            duplicates.setdefault(first, []).append(key)
+
+                elif stage == "price":
+                    markets = {} if error is not None else future.result()
+                    risks = dict(zip(markets, assess_market_risk(list(markets.values()))))
+                    for key, coin in payload:
+                        market = markets.get(coin["id"])
+                        if error is not None:
+                            yield from settle(key, "error", error=str(error))
+                        elif market is None:
+                            yield from settle(key, "not_found", coin_id=coin["id"], detail="no market data")
+                        else:
+                            submit(
+                                "analyze",
+                                (key, market, risks[coin["id"]]),
+                                screen_project,
+                                key,
+                                market,
+                                llm,
+                            )
+
+                else:
+                    key, market, market_risk = payload
+                    if error is not None:
+                        logger.error(f"Batch analysis failed for {key}: {str(error)}")
+                        yield from settle(key, "error", error=str(error))
+                    else:
+                        yield from settle(
+                            key, "ok", cached=False, **_report_fields(future.result(), market, market_risk)
+                        )
+
+            # Price a page once it is full, or whatever is left once resolution is done
+            resolving = any(stage == "resolve" for stage, _ in pending.values())
+            while unpriced and (len(unpriced) >= MARKETS_PAGE_SIZE or not resolving):
+                page, unpriced = unpriced[:MARKETS_PAGE_SIZE], unpriced[MARKETS_PAGE_SIZE:]
+                submit("price", page, fetch_markets, [coin["id"] for _, coin in page])
+
+        yield {
+            "type": "summary",
+            "inputs": len(names),
+            "projects": len(inputs),
+            **counts,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -2,126 +2,134 @@
 CertiK Agent - Analyzes smart contract security audits
 """
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence
 from langchain.tools import Tool
 
-# Note: CertiK API requires authentication. This is a mock implementation
-# In production, you would need to integrate with the actual CertiK API
+from .audit_index import audit_index
+from .rendering import bullets
+from services.entity_store import entity_store
 
-def get_certik_audit(project_name: str) -> str:
-    """Get smart contract security audit information from CertiK"""
-    try:
-        # This is a mock implementation since CertiK API requires authentication
-        # In a real implementation, you would make API calls to CertiK
-        
-        # Mock data for demonstration
-        mock_audits = {
-            "uniswap": {
-                "security_score": 95,
-                "audit_date": "2023-05-15",
-                "vulnerabilities": {
-                    "critical": 0,
-                    "major": 0,
-                    "medium": 1,
-                    "minor": 3,
-                    "informational": 5
-                },
-                "contract_verified": True,
-                "key_findings": [
-                    "Well-structured codebase with comprehensive testing",
-                    "Minor gas optimization opportunities identified",
-                    "All critical functions properly access-controlled"
-                ]
-            },
-            "pancakeswap": {
-                "security_score": 92,
-                "audit_date": "2023-06-20",
-                "vulnerabilities": {
-                    "critical": 0,
-                    "major": 0,
-                    "medium": 2,
-                    "minor": 4,
-                    "informational": 8
-                },
-                "contract_verified": True,
-                "key_findings": [
-                    "Robust security implementation",
-                    "Medium-severity reentrancy risk in staking contract (fixed)",
-                    "Comprehensive event logging for transparency"
-                ]
-            }
-        }
-        
-        # Check if we have mock data for this project
-        project_key = project_name.lower().replace(" ", "")
-        
-        if project_key in mock_audits:
-            audit = mock_audits[project_key]
-            
-            response = f"""
-**CertiK Security Audit for {project_name}:**
-
-🛡️ Security Score: {audit['security_score']}/100
-📅 Audit Date: {audit['audit_date']}
-✅ Contract Verified: {'Yes' if audit['contract_verified'] else 'No'}
+# Note: CertiK API requires authentication, so there are no live calls. Curated
+# audit records live in the entity store (data/sources/audits.json); reports
+# ingested from auditor dumps come from the audit index (agents/audit_index.py)
+
+def lookup_audits(project_name: str) -> List[Dict[str, Any]]:
+    """Audit records for a project name, symbol or contract address: the curated
+    record first, then indexed reports newest first"""
+    project_key = project_name.lower().replace(" ", "")
+    curated = entity_store.get("audits", project_key)
+    return ([curated] if curated is not None else []) + audit_index.lookup(project_name)
+
+def lookup_audit(project_name: str) -> Optional[Dict[str, Any]]:
+    """Return the audit record for a project, or None when no audit is on file"""
+    audits = lookup_audits(project_name)
+    return audits[0] if audits else None
+
+AUDIT_REPORT = """
+**{auditor} Security Audit for {project_name}:**
 
+🛡️ Security Score: {security_score}
+📅 Audit Date: {audit_date}
+✅ Contract Verified: {contract_verified}
+"""
+
+VULNERABILITY_SUMMARY = """
 **Vulnerability Summary:**
-• Critical: {audit['vulnerabilities']['critical']}
-• Major: {audit['vulnerabilities']['major']}
-• Medium: {audit['vulnerabilities']['medium']}
-• Minor: {audit['vulnerabilities']['minor']}
-• Informational: {audit['vulnerabilities']['informational']}
+• Critical: {critical}
+• Major: {major}
+• Medium: {medium}
+• Minor: {minor}
+• Informational: {informational}
+"""
 
+KEY_FINDINGS = """
 **Key Findings:**
 """
-            for finding in audit['key_findings']:
-                response += f"• {finding}\n"
-                
-            response += """
+
+AUDIT_ASSESSMENT = """
 **Security Assessment:**
 """
-            if audit['security_score'] >= 90:
-                response += "✅ EXCELLENT: This project demonstrates strong security practices with minimal vulnerabilities."
-            elif audit['security_score'] >= 80:
-                response += "✅ GOOD: Security is well-implemented with some minor issues to address."
-            elif audit['security_score'] >= 70:
-                response += "⚠️ FAIR: Several security concerns that should be addressed."
-            else:
-                response += "❌ POOR: Significant security vulnerabilities detected. High risk."
-                
-        else:
-            # Provide general guidance when no audit is found
-            response = f"""
-**CertiK Security Audit for {project_name}:**
-
-❌ No CertiK audit found for this project.
-
-**Security Recommendations:**
-1. Check if the project has been audited by other reputable firms
-2. Review the smart contract code on Etherscan/BSCScan
-3. Look for bug bounty programs
-4. Check if the contracts are verified and open-source
-5. Assess the project's security practices and transparency
-
-**Red Flags:**
-• Unaudited smart contracts
-• Closed-source code
-• No bug bounty program
-• Recent deployment with no security track record
-• Upgradeable contracts without proper governance
-
-**Alternative Security Resources:**
-• OpenZeppelin audits
-• Trail of Bits audits
-• Quantstamp audits
-• PeckShield audits
-• Slowmist audits
-
-Always prioritize projects with comprehensive security audits from reputable firms.
+
+# Kept short and factual: the trust scoring reads this section, and generic
+# advice naming auditors read as if the project had been audited
+NO_AUDIT_REPORT = """
+**Security Audit for {project_name}:**
+
+❌ No audit on record for this project ({reports} reports from {sources} auditors indexed).
+
+Treat its contracts as unaudited: check that they are verified and open-source, and look for a bug bounty program.
 """
-        
-        return response
-        
+
+def format_audit_report(
+    project_name: str, audit: Optional[Dict[str, Any]], other_audits: Sequence[Dict[str, Any]] = ()
+) -> str:
+    """Format an audit record (or its absence) as a markdown report, listing
+    `other_audits` of the same project after it"""
+    if audit is None:
+        stats = audit_index.stats()
+        return NO_AUDIT_REPORT.format(project_name=project_name, reports=stats["reports"], sources=stats["sources"])
+
+    score = audit['security_score']
+    vulnerabilities = audit['vulnerabilities']
+    verified = audit['contract_verified']
+    parts = [
+        AUDIT_REPORT.format(
+            auditor=audit.get('auditor', "CertiK"),
+            project_name=project_name,
+            security_score=f"{score}/100" if score is not None else "not published",
+            audit_date=audit['audit_date'] or "unknown",
+            contract_verified='Unknown' if verified is None else 'Yes' if verified else 'No',
+        ),
+        VULNERABILITY_SUMMARY.format(
+            critical=vulnerabilities['critical'],
+            major=vulnerabilities['major'],
+            medium=vulnerabilities['medium'],
+            minor=vulnerabilities['minor'],
+            informational=vulnerabilities['informational'],
+        ) if vulnerabilities else "\n**Vulnerability Summary:**\n• Not published\n",
+        KEY_FINDINGS,
+        bullets(audit['key_findings']) or "• None listed\n",
+    ]
+    if audit.get('contracts'):
+        parts += ["\n**Audited Contracts:**\n", bullets(f"{c['chain'] or 'unknown chain'}: {c['address']}" for c in audit['contracts'])]
+    if audit.get('report_url'):
+        parts.append(f"\n📄 Report: {audit['report_url']}\n")
+    if other_audits:
+        parts += [
+            "\n**Other Audits on Record:**\n",
+            bullets(
+                f"{other['auditor']}, {other['audit_date'] or 'undated'}"
+                + (f" ({other['report_url']})" if other.get('report_url') else "")
+                for other in other_audits
+            ),
+        ]
+    parts += [AUDIT_ASSESSMENT, _assessment(score, vulnerabilities)]
+    return "".join(parts)
+
+def _assessment(score: Optional[float], vulnerabilities: Optional[Dict[str, Any]]) -> str:
+    if score is None:
+        # Auditors without a score: judge by the severity of the findings
+        if vulnerabilities is None:
+            return "ℹ️ AUDITED: A report is on record; review it for unresolved findings."
+        if vulnerabilities['critical']:
+            return "❌ POOR: Significant security vulnerabilities detected. High risk."
+        if vulnerabilities['major']:
+            return "⚠️ FAIR: Several security concerns that should be addressed."
+        return "✅ GOOD: Security is well-implemented with some minor issues to address."
+    if score >= 90:
+        return "✅ EXCELLENT: This project demonstrates strong security practices with minimal vulnerabilities."
+    if score >= 80:
+        return "✅ GOOD: Security is well-implemented with some minor issues to address."
+    if score >= 70:
+        return "⚠️ FAIR: Several security concerns that should be addressed."
+    return "❌ POOR: Significant security vulnerabilities detected. High risk."
+
+def get_certik_audit(project_name: str) -> str:
+    """Get smart contract security audit information for a project or contract address"""
+    try:
+        audits = lookup_audits(project_name)
+        return format_audit_report(project_name, audits[0] if audits else None, audits[1:])
+
     except Exception as e:
         return f"Error retrieving CertiK audit information: {str(e)}"
 
@@ -129,5 +137,5 @@ Always prioritize projects with comprehensive security audits from reputable fir
 certik_tool = Tool(
     name="certik_audit",
     func=get_certik_audit,
-    description="Get smart contract security audit information from CertiK or provide security analysis"
+    description="Get smart contract security audit information (CertiK, OpenZeppelin, Trail of Bits and other auditors) for a project name, token symbol or contract address"
 )
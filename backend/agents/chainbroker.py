@@ -1,125 +1,54 @@
 """
 ChainBroker Agent - Analyzes cryptocurrency broker and exchange reliability
 """
-from typing import Dict, List
+from typing import Any, Dict, List
 from langchain.tools import Tool
 
-# Mock data for exchanges (in production, this would connect to real APIs)
-EXCHANGE_DATA = {
-    "binance": {
-        "name": "Binance",
-        "trust_score": 9.5,
-        "volume_24h": 15000000000,
-        "established": 2017,
-        "regulation": ["Malta", "Japan", "UK FCA"],
-        "security_features": ["2FA", "Cold Storage", "SAFU Fund", "Whitelisting"],
-        "user_rating": 4.5,
-        "fees": {"maker": 0.1, "taker": 0.1},
-        "supported_coins": 350,
-        "incidents": ["2019 hack - 7000 BTC stolen, fully compensated users"]
-    },
-    "coinbase": {
-        "name": "Coinbase",
-        "trust_score": 9.8,
-        "volume_24h": 8000000000,
-        "established": 2012,
-        "regulation": ["USA", "UK", "EU", "Japan"],
-        "security_features": ["2FA", "Cold Storage", "Insurance", "Biometric Auth"],
-        "user_rating": 4.3,
-        "fees": {"maker": 0.5, "taker": 0.5},
-        "supported_coins": 200,
-        "incidents": ["No major security breaches"]
-    },
-    "kucoin": {
-        "name": "KuCoin",
-        "trust_score": 7.5,
-        "volume_24h": 2000000000,
-        "established": 2017,
-        "regulation": ["Seychelles"],
-        "security_features": ["2FA", "Cold Storage", "Trading Password"],
-        "user_rating": 4.0,
-        "fees": {"maker": 0.1, "taker": 0.1},
-        "supported_coins": 600,
-        "incidents": ["2020 hack - $280M stolen, insurance fund covered losses"]
-    }
-}
+from .exchange_index import exchange_index
+from .rendering import bullets
+from services.entity_store import entity_store
 
-def analyze_exchange(exchange_name: str) -> str:
-    """Analyze cryptocurrency exchange or broker reliability and trustworthiness"""
-    try:
-        # Normalize exchange name
-        exchange_key = exchange_name.lower().replace(" ", "")
-        
-        # Check if we have data for this exchange
-        if exchange_key in EXCHANGE_DATA:
-            exchange = EXCHANGE_DATA[exchange_key]
-            
-            # Calculate risk assessment
-            risk_factors = []
-            trust_score = exchange["trust_score"]
-            
-            if trust_score < 7:
-                risk_factors.append("Low trust score")
-            if exchange["established"] > 2018:
-                risk_factors.append("Relatively new exchange")
-            if len(exchange["regulation"]) < 2:
-                risk_factors.append("Limited regulatory compliance")
-            if exchange["incidents"]:
-                risk_factors.append("History of security incidents")
-            
-            risk_level = "Low" if trust_score >= 8 else "Medium" if trust_score >= 6 else "High"
-            
-            response = f"""
-**Exchange Analysis: {exchange['name']}**
+# Detailed exchange records live in the entity store (data/sources/exchanges.json);
+# other exchanges come from CoinGecko's exchange list (exchange_index.py)
+
+EXCHANGE_REPORT = """
+**Exchange Analysis: {name}**
 
-📊 Trust Score: {exchange['trust_score']}/10
-💼 Established: {exchange['established']}
-📈 24h Volume: ${exchange['volume_24h']:,.0f}
-🪙 Supported Coins: {exchange['supported_coins']}
-⭐ User Rating: {exchange['user_rating']}/5
+📊 Trust Score: {trust_score}/10
+💼 Established: {established}
+📈 24h Volume: ${volume_24h:,.0f}
+🪙 Supported Coins: {supported_coins}
+⭐ User Rating: {user_rating}/5
 
 **Regulatory Compliance:**
 """
-            for reg in exchange['regulation']:
-                response += f"• {reg}\n"
-            
-            response += "\n**Security Features:**\n"
-            for feature in exchange['security_features']:
-                response += f"• {feature}\n"
-            
-            response += f"""
+
+EXCHANGE_FEES = """
 **Trading Fees:**
-• Maker: {exchange['fees']['maker']}%
-• Taker: {exchange['fees']['taker']}%
+• Maker: {maker}%
+• Taker: {taker}%
 
 **Security History:**
 """
-            if exchange['incidents']:
-                for incident in exchange['incidents']:
-                    response += f"• {incident}\n"
-            else:
-                response += "• No major security incidents reported\n"
-            
-            response += f"""
+
+EXCHANGE_RISK = """
 **Risk Assessment: {risk_level} Risk**
 """
-            if risk_factors:
-                response += "Risk Factors:\n"
-                for factor in risk_factors:
-                    response += f"• {factor}\n"
-            else:
-                response += "• No significant risk factors identified\n"
-            
-            response += "\n**Recommendation:**\n"
-            if trust_score >= 8:
-                response += "✅ RECOMMENDED: This exchange has a strong reputation and security track record."
-            elif trust_score >= 6:
-                response += "⚠️ USE WITH CAUTION: Some risk factors present. Enable all security features."
-            else:
-                response += "❌ HIGH RISK: Consider using more established exchanges."
-                
-        else:
-            response = f"""
+
+LISTED_EXCHANGE_REPORT = """
+**Exchange Analysis: {name}**
+
+📊 Trust Score: {trust_score}/10 (CoinGecko, rank #{trust_score_rank})
+💼 Established: {established}
+🌍 Country: {country}
+📈 24h Volume: {volume_24h_btc:,.0f} BTC ({volume_normalized_btc:,.0f} BTC normalized)
+🔗 Website: {url}
+"""
+
+# Normalized volume below this share of the reported volume suggests wash trading
+MIN_NORMALIZED_VOLUME_SHARE = 0.5
+
+UNKNOWN_EXCHANGE_REPORT = """
 **Exchange Analysis: {exchange_name}**
 
 ❓ No detailed data available for this exchange.
@@ -169,6 +98,116 @@ def analyze_exchange(exchange_name: str) -> str:
 • Bitfinex (high liquidity)
 • Huobi (Asian markets)
 """
+
+def _risk_parts(trust_score: float, risk_factors: List[str]) -> List[str]:
+    """Risk assessment, risk factors and recommendation for a trust score out of 10"""
+    risk_level = "Low" if trust_score >= 8 else "Medium" if trust_score >= 6 else "High"
+    parts = [EXCHANGE_RISK.format(risk_level=risk_level)]
+    if risk_factors:
+        parts += ["Risk Factors:\n", bullets(risk_factors)]
+    else:
+        parts.append("• No significant risk factors identified\n")
+
+    parts.append("\n**Recommendation:**\n")
+    if trust_score >= 8:
+        parts.append("✅ RECOMMENDED: This exchange has a strong reputation and security track record.")
+    elif trust_score >= 6:
+        parts.append("⚠️ USE WITH CAUTION: Some risk factors present. Enable all security features.")
+    else:
+        parts.append("❌ HIGH RISK: Consider using more established exchanges.")
+    return parts
+
+def format_listed_exchange(exchange: Dict[str, Any]) -> str:
+    """Report for an exchange known only from CoinGecko's exchange list"""
+    trust_score = exchange.get("trust_score")
+    established = exchange.get("year_established")
+    volume = exchange.get("volume_24h_btc") or 0
+    normalized = exchange.get("volume_24h_btc_normalized") or 0
+
+    risk_factors = []
+    if trust_score is None:
+        risk_factors.append("No CoinGecko trust score")
+    elif trust_score < 7:
+        risk_factors.append("Low trust score")
+    if established is None:
+        risk_factors.append("Founding year not disclosed")
+    elif established > 2018:
+        risk_factors.append("Relatively new exchange")
+    if not exchange.get("country"):
+        risk_factors.append("Jurisdiction not disclosed")
+    if volume and normalized < volume * MIN_NORMALIZED_VOLUME_SHARE:
+        risk_factors.append("Reported volume far above normalized volume (possible wash trading)")
+
+    parts = [
+        LISTED_EXCHANGE_REPORT.format(
+            name=exchange["name"],
+            trust_score=trust_score if trust_score is not None else "N/A",
+            trust_score_rank=exchange.get("trust_score_rank") or "N/A",
+            established=established or "Unknown",
+            country=exchange.get("country") or "Unknown",
+            volume_24h_btc=volume,
+            volume_normalized_btc=normalized,
+            url=exchange.get("url") or "Not available",
+        ),
+    ]
+    parts += _risk_parts(trust_score or 0, risk_factors)
+    return "".join(parts)
+
+def is_exchange(name: str) -> bool:
+    """Whether the name is a curated or CoinGecko-listed exchange (makes no API call)"""
+    return (
+        entity_store.get("exchanges", name.lower().replace(" ", "")) is not None
+        or exchange_index.get(name) is not None
+    )
+
+def analyze_exchange(exchange_name: str) -> str:
+    """Analyze cryptocurrency exchange or broker reliability and trustworthiness"""
+    try:
+        # Normalize exchange name
+        exchange_key = exchange_name.lower().replace(" ", "")
+        
+        # Check if we have data for this exchange
+        exchange = entity_store.get("exchanges", exchange_key)
+        if exchange is not None:
+            
+            # Calculate risk assessment
+            risk_factors = []
+            trust_score = exchange["trust_score"]
+            
+            if trust_score < 7:
+                risk_factors.append("Low trust score")
+            if exchange["established"] > 2018:
+                risk_factors.append("Relatively new exchange")
+            if len(exchange["regulation"]) < 2:
+                risk_factors.append("Limited regulatory compliance")
+            if exchange["incidents"]:
+                risk_factors.append("History of security incidents")
+            
+            parts = [
+                EXCHANGE_REPORT.format(
+                    name=exchange['name'],
+                    trust_score=exchange['trust_score'],
+                    established=exchange['established'],
+                    volume_24h=exchange['volume_24h'],
+                    supported_coins=exchange['supported_coins'],
+                    user_rating=exchange['user_rating'],
+                ),
+                bullets(exchange['regulation']),
+                "\n**Security Features:**\n",
+                bullets(exchange['security_features']),
+                EXCHANGE_FEES.format(maker=exchange['fees']['maker'], taker=exchange['fees']['taker']),
+                bullets(exchange['incidents']) if exchange['incidents'] else "• No major security incidents reported\n",
+            ]
+            parts += _risk_parts(trust_score, risk_factors)
+            response = "".join(parts)
+                
+        else:
+            # Not a curated exchange: report from its CoinGecko listing, if any
+            listed = exchange_index.get(exchange_name, wait=True)
+            if listed is not None:
+                response = format_listed_exchange(listed)
+            else:
+                response = UNKNOWN_EXCHANGE_REPORT.format(exchange_name=exchange_name)
         
         return response
         
@@ -179,5 +218,5 @@ def analyze_exchange(exchange_name: str) -> str:
 chainbroker_tool = Tool(
     name="chainbroker",
     func=analyze_exchange,
-    description="Analyze cryptocurrency exchanges and brokers for reliability, security, and trustworthiness"
+    description="Analyze cryptocurrency exchanges and brokers for reliability, security, and trustworthiness. Covers every exchange listed on CoinGecko, by name or id"
 )
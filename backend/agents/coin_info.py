@@ -1,72 +1,134 @@
 """
 Coin Info Agent - Provides cryptocurrency market data and analysis
 """
-import os
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from langchain.tools import Tool
 
-COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
-COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
+from .coingecko import coingecko_get
+from .contract_index import contract_index, is_contract_address
+from services.timeseries import history_metrics, record_snapshot
 
-def get_coin_info(coin_name: str) -> str:
-    """Get comprehensive cryptocurrency market data and information"""
-    try:
-        # Search for coin ID
-        search_url = f"{COINGECKO_API_URL}/search"
-        search_params = {"query": coin_name}
-        headers = {"x-cg-demo-api-key": COINGECKO_API_KEY} if COINGECKO_API_KEY else {}
-        
-        search_response = requests.get(search_url, params=search_params, headers=headers)
-        search_data = search_response.json()
-        
-        if not search_data.get("coins"):
-            return f"No cryptocurrency found with name '{coin_name}'"
-        
-        coin_id = search_data["coins"][0]["id"]
-        coin_symbol = search_data["coins"][0]["symbol"]
-        
-        # Get detailed coin data
-        coin_url = f"{COINGECKO_API_URL}/coins/{coin_id}"
-        coin_params = {
-            "localization": "false",
-            "tickers": "false",
-            "market_data": "true",
-            "community_data": "true",
-            "developer_data": "true",
-            "sparkline": "false"
-        }
-        
-        coin_response = requests.get(coin_url, params=coin_params, headers=headers)
-        coin_data = coin_response.json()
-        
-        # Extract relevant information
-        market_data = coin_data.get("market_data", {})
-        
-        info = {
-            "name": coin_data.get("name"),
-            "symbol": coin_symbol.upper(),
-            "current_price": market_data.get("current_price", {}).get("usd"),
-            "market_cap": market_data.get("market_cap", {}).get("usd"),
-            "market_cap_rank": coin_data.get("market_cap_rank"),
-            "total_volume": market_data.get("total_volume", {}).get("usd"),
-            "price_change_24h": market_data.get("price_change_percentage_24h"),
-            "price_change_7d": market_data.get("price_change_percentage_7d"),
-            "price_change_30d": market_data.get("price_change_percentage_30d"),
-            "all_time_high": market_data.get("ath", {}).get("usd"),
-            "all_time_low": market_data.get("atl", {}).get("usd"),
-            "total_supply": market_data.get("total_supply"),
-            "circulating_supply": market_data.get("circulating_supply"),
-            "description": coin_data.get("description", {}).get("en", "")[:500],
-            "website": coin_data.get("links", {}).get("homepage", [""])[0],
-            "whitepaper": coin_data.get("links", {}).get("whitepaper"),
-            "github": coin_data.get("links", {}).get("repos_url", {}).get("github", [""])[0] if coin_data.get("links", {}).get("repos_url") else "",
-            "twitter": coin_data.get("links", {}).get("twitter_screen_name"),
-            "reddit": coin_data.get("links", {}).get("subreddit_url"),
-        }
-        
-        # Format response
-        response = f"""
+# Most ids /coins/markets accepts per call
+MARKETS_PAGE_SIZE = 250
+
+# /coins/{id} parameters; other agents use the same ones so the cached response is shared
+COIN_DETAIL_PARAMS = {
+    "localization": "false",
+    "tickers": "false",
+    "market_data": "true",
+    "community_data": "true",
+    "developer_data": "true",
+    "sparkline": "false"
+}
+
+def search_coin(coin_name: str) -> Optional[Dict[str, Any]]:
+    """Best CoinGecko /search match for a name or symbol, or None if no coin matches"""
+    search_data = coingecko_get("/search", {"query": coin_name})
+    coins = search_data.get("coins") if isinstance(search_data, dict) else None
+    return coins[0] if coins else None
+
+def resolve_coin(query: str) -> Optional[Dict[str, Any]]:
+    """The coin (id and symbol) for a name, symbol or contract address, or None.
+    Addresses are resolved from the contract index rather than /search."""
+    if is_contract_address(query):
+        return contract_index.resolve(query)
+    return search_coin(query)
+
+def fetch_coin_market_data(coin_name: str) -> Optional[Dict[str, Any]]:
+    """Look up a coin on CoinGecko by name, symbol or contract address and return its
+    market data, or None if no coin matches"""
+    # Search for coin ID
+    coin = resolve_coin(coin_name)
+    if coin is None:
+        return None
+
+    coin_id = coin["id"]
+
+    # Get detailed coin data
+    coin_data = coingecko_get(f"/coins/{coin_id}", COIN_DETAIL_PARAMS)
+    coin_symbol = coin["symbol"] or coin_data.get("symbol") or ""
+
+    # Extract relevant information
+    market_data = coin_data.get("market_data", {})
+
+    info = {
+        "id": coin_id,
+        "name": coin_data.get("name"),
+        "symbol": coin_symbol.upper(),
+        "current_price": market_data.get("current_price", {}).get("usd"),
+        "market_cap": market_data.get("market_cap", {}).get("usd"),
+        "market_cap_rank": coin_data.get("market_cap_rank"),
+        "total_volume": market_data.get("total_volume", {}).get("usd"),
+        "price_change_24h": market_data.get("price_change_percentage_24h"),
+        "price_change_7d": market_data.get("price_change_percentage_7d"),
+        "price_change_30d": market_data.get("price_change_percentage_30d"),
+        "all_time_high": market_data.get("ath", {}).get("usd"),
+        "all_time_low": market_data.get("atl", {}).get("usd"),
+        "total_supply": market_data.get("total_supply"),
+        "circulating_supply": market_data.get("circulating_supply"),
+        "description": coin_data.get("description", {}).get("en", "")[:500],
+        "website": coin_data.get("links", {}).get("homepage", [""])[0],
+        "whitepaper": coin_data.get("links", {}).get("whitepaper"),
+        "github": coin_data.get("links", {}).get("repos_url", {}).get("github", [""])[0] if coin_data.get("links", {}).get("repos_url") else "",
+        "twitter": coin_data.get("links", {}).get("twitter_screen_name"),
+        "reddit": coin_data.get("links", {}).get("subreddit_url"),
+    }
+    _add_history(info)
+    return info
+
+def _add_history(info: Dict[str, Any]) -> None:
+    """Record the snapshot in the local time series and add metrics derived from it"""
+    record_snapshot(info)
+    history = history_metrics(info["id"], days=30)
+    info["volatility_30d"] = history["volatility"]
+    info["max_drawdown_30d"] = history["max_drawdown"]
+
+def _market_info_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a /coins/markets row to the fetch_coin_market_data shape (project links and
+    description are not part of the row and are left out)"""
+    return {
+        "id": row["id"],
+        "name": row.get("name"),
+        "symbol": (row.get("symbol") or "").upper(),
+        "current_price": row.get("current_price"),
+        "market_cap": row.get("market_cap"),
+        "market_cap_rank": row.get("market_cap_rank"),
+        "total_volume": row.get("total_volume"),
+        "price_change_24h": row.get(
+            "price_change_percentage_24h_in_currency", row.get("price_change_percentage_24h")
+        ),
+        "price_change_7d": row.get("price_change_percentage_7d_in_currency"),
+        "price_change_30d": row.get("price_change_percentage_30d_in_currency"),
+        "all_time_high": row.get("ath"),
+        "all_time_low": row.get("atl"),
+        "total_supply": row.get("total_supply"),
+        "circulating_supply": row.get("circulating_supply"),
+    }
+
+def fetch_markets(coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Market data for many coins from bulk /coins/markets calls, keyed by coin id"""
+    infos = {}
+    ids = sorted(set(coin_ids))
+    for start in range(0, len(ids), MARKETS_PAGE_SIZE):
+        chunk = ids[start : start + MARKETS_PAGE_SIZE]
+        rows = coingecko_get(
+            "/coins/markets",
+            {
+                "vs_currency": "usd",
+                "ids": ",".join(chunk),
+                "per_page": len(chunk),
+                "price_change_percentage": "24h,7d,30d",
+            },
+        )
+        for row in rows if isinstance(rows, list) else []:
+            info = infos[row["id"]] = _market_info_from_row(row)
+            _add_history(info)
+    return infos
+
+def format_coin_info(info: Dict[str, Any]) -> str:
+    """Format market data returned by fetch_coin_market_data as a markdown report"""
+    return f"""
 **{info['name']} ({info['symbol']}) Market Data:**
 
 🏆 Market Cap Rank: #{info['market_cap_rank']}
@@ -88,17 +150,24 @@ def get_coin_info(coin_name: str) -> str:
 • All-Time Low: ${info['all_time_low']:,.2f}
 
 **Project Links:**
-• Website: {info['website']}
-• Whitepaper: {info['whitepaper'] or 'Not available'}
-• GitHub: {info['github'] or 'Not available'}
-• Twitter: @{info['twitter'] if info['twitter'] else 'Not available'}
-• Reddit: {info['reddit'] or 'Not available'}
+• Website: {info.get('website')}
+• Whitepaper: {info.get('whitepaper') or 'Not available'}
+• GitHub: {info.get('github') or 'Not available'}
+• Twitter: @{info.get('twitter') or 'Not available'}
+• Reddit: {info.get('reddit') or 'Not available'}
 
 **Description:**
-{info['description'][:300]}...
+{(info.get('description') or '')[:300]}...
 """
-        return response
-        
+
+def get_coin_info(coin_name: str) -> str:
+    """Get comprehensive cryptocurrency market data and information"""
+    try:
+        info = fetch_coin_market_data(coin_name)
+        if info is None:
+            return f"No cryptocurrency found with name '{coin_name}'"
+        return format_coin_info(info)
+
     except requests.exceptions.RequestException as e:
         return f"Error fetching coin data: {str(e)}"
     except Exception as e:
@@ -108,5 +177,5 @@ def get_coin_info(coin_name: str) -> str:
 coin_info_tool = Tool(
     name="coin_info",
     func=get_coin_info,
-    description="Get comprehensive cryptocurrency market data including price, market cap, volume, supply, and project information"
+    description="Get comprehensive cryptocurrency market data including price, market cap, volume, supply, and project information. Input is a coin name, symbol or token contract address"
 )
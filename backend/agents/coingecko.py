@@ -0,0 +1,122 @@
+"""
+CoinGecko client shared by the agents - API key handling, response caching, rate
+limiting and timing
+"""
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from services.cache import create_cache
+from services.cancellation import run_cancellable
+from services.metrics import span
+from services.scheduler import INTERACTIVE, current_priority, scheduled
+from services.singleflight import SingleFlight
+
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
+COINGECKO_TIMEOUT = float(os.getenv("COINGECKO_TIMEOUT", "10"))
+# Upstream calls per minute from this process (0 = unlimited; the demo plan allows 30)
+COINGECKO_RATE_LIMIT = float(os.getenv("COINGECKO_RATE_LIMIT", "0"))
+# Times background and batch calls retry after a 429; interactive calls fail fast
+COINGECKO_RETRIES = int(os.getenv("COINGECKO_RETRIES", "3"))
+COINGECKO_MAX_BACKOFF = float(os.getenv("COINGECKO_MAX_BACKOFF", "60"))
+
+# Successful responses are reused for a short while; market data is minute-granular upstream
+_response_cache = create_cache(
+    "coingecko",
+    ttl=float(os.getenv("COINGECKO_CACHE_TTL", "60")),
+    maxsize=int(os.getenv("COINGECKO_CACHE_SIZE", "2048")),
+)
+
+# Maps concrete paths to low-cardinality metric labels, e.g. /coins/bitcoin -> /coins/{id}
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"^/coins/(markets|list|categories)(/list)?$"), None),
+    (re.compile(r"^/coins/[^/]+$"), "/coins/{id}"),
+    (re.compile(r"^/coins/[^/]+/contract/[^/]+$"), "/coins/{platform}/contract/{address}"),
+]
+
+
+class _RateLimiter:
+    """Spaces calls evenly at `per_minute`, allowing short bursts, and pauses after a 429"""
+
+    def __init__(self, per_minute: float, burst: int = 5):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now - self.burst * self.interval)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def back_off(self, seconds: float) -> None:
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+_rate_limiter = _RateLimiter(COINGECKO_RATE_LIMIT)
+# Concurrent identical requests share one upstream call
+_inflight = SingleFlight("coingecko")
+
+
+def _retry_after(response: requests.Response, attempt: int) -> float:
+    try:
+        seconds = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        seconds = 2.0 ** (attempt + 1)
+    return min(max(seconds, 1.0), COINGECKO_MAX_BACKOFF)
+
+
+def _endpoint_label(path: str) -> str:
+    for pattern, label in _ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            return label or path
+    return path
+
+
+def coingecko_get(
+    path: str, params: Optional[Dict[str, Any]] = None, ttl: Optional[float] = None, cache: bool = True
+) -> Any:
+    """GET a CoinGecko API path (e.g. "/search") and return the decoded JSON body.
+    `ttl` overrides the cache lifetime for slow-changing data such as category lists.
+    Without `cache` the response is neither read from nor written to the response
+    cache, for bulk downloads that are kept elsewhere (snapshot builds)."""
+    params = params or {}
+    cache_key = (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+    if cache:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    # A cancelled request stops waiting; the call completes and is cached for the next one
+    return run_cancellable(_inflight.do, (cache_key, cache), lambda: _fetch(path, params, cache_key, ttl, cache))
+
+
+def _fetch(path: str, params: Dict[str, Any], cache_key: Any, ttl: Optional[float], cache: bool = True) -> Any:
+    api_key = os.getenv("COINGECKO_API_KEY")
+    headers = {"x-cg-demo-api-key": api_key} if api_key else {}
+    retries = 0 if current_priority() == INTERACTIVE else COINGECKO_RETRIES
+    with scheduled("coingecko"), span("upstream", f"coingecko{_endpoint_label(path)}"):
+        for attempt in range(retries + 1):
+            _rate_limiter.wait()
+            response = requests.get(
+                f"{COINGECKO_API_URL}{path}",
+                params=params,
+                headers=headers,
+                timeout=COINGECKO_TIMEOUT,
+            )
+            if response.status_code != 429:
+                break
+            # Rate limited: hold back every caller in this process, then retry
+            _rate_limiter.back_off(_retry_after(response, attempt))
+        data = response.json()
+
+    if response.ok and cache:
+        _response_cache.set(cache_key, data, ttl=ttl)
+    return data
@@ -0,0 +1,191 @@
+"""
+Contract Index - token contract addresses mapped to CoinGecko coin ids
+
+Users often paste a token's contract address instead of its name. A /search
+for an address finds nothing, so addresses are resolved here instead:
+
+- find_contract_address() spots an EVM ("0x" + 40 hex digits), Tron or
+  Solana (base58) address in a message. Bitcoin P2PKH and P2SH addresses
+  ("1..." / "3...", up to 35 characters) are not taken for Solana ones
+- the index maps every address in CoinGecko's /coins/list?include_platform=true
+  to its coin id, symbol and platform. It is kept in CONTRACT_INDEX_PATH
+  (default backend/data/contract_index.json), so a lookup is one dict hit,
+  and refreshed in the background once it is older than CONTRACT_INDEX_MAX_AGE
+  (services/snapshot.py)
+- an address the index doesn't know (a token listed since the last refresh)
+  is looked up with /coins/{platform}/contract/{address} on the likely
+  platforms. Hits are remembered until the next refresh, misses for
+  CONTRACT_MISS_TTL
+
+scripts/build_contract_index.py builds the file ahead of time; without it the
+first address resolved builds it.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .coingecko import coingecko_get
+from services.cache import create_cache
+from services.metrics import REGISTRY
+from services.snapshot import Snapshot, write_snapshot
+
+CONTRACT_INDEX_PATH = os.getenv(
+    "CONTRACT_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "contract_index.json"),
+)
+# Seconds before the index is refreshed from /coins/list
+CONTRACT_INDEX_MAX_AGE = float(os.getenv("CONTRACT_INDEX_MAX_AGE", "86400"))
+# Seconds an address the contract endpoint doesn't know is not asked about again
+CONTRACT_MISS_TTL = float(os.getenv("CONTRACT_MISS_TTL", "3600"))
+# Seconds before a failed build of a missing index is tried again
+CONTRACT_INDEX_RETRY = float(os.getenv("CONTRACT_INDEX_RETRY", "300"))
+# Platforms asked for an EVM address missing from the index, in order
+CONTRACT_EVM_PLATFORMS = [
+    p.strip()
+    for p in os.getenv(
+        "CONTRACT_EVM_PLATFORMS", "ethereum,binance-smart-chain,polygon-pos,arbitrum-one,base"
+    ).split(",")
+    if p.strip()
+]
+
+CONTRACT_LOOKUPS = REGISTRY.counter(
+    "decryptify_contract_lookups_total",
+    "Contract address lookups by outcome (index, contract when the contract endpoint "
+    "found it, miss)",
+    ("outcome",),
+)
+
+_EVM_ADDRESS = re.compile(r"^0x[0-9a-fA-F]{40}$")
+_TRON_ADDRESS = re.compile(r"^T[1-9A-HJ-NP-Za-km-z]{33}$")
+_BASE58_ADDRESS = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
+# Bitcoin P2PKH ("1...") and P2SH ("3...") addresses; Solana keys are 43-44 characters
+_BITCOIN_ADDRESS = re.compile(r"^[13][1-9A-HJ-NP-Za-km-z]{25,34}$")
+_ADDRESS_IN_TEXT = re.compile(r"(?<![\w])(0x[0-9a-fA-F]{40}|[1-9A-HJ-NP-Za-km-z]{26,44})(?![\w])")
+
+# Coins per address: [coin id, symbol, platform]
+_Entries = List[List[str]]
+
+
+def is_contract_address(text: str) -> bool:
+    """Whether the text is a single EVM, Tron or Solana address"""
+    text = text.strip()
+    if _EVM_ADDRESS.match(text):
+        return True
+    # Base58 words that long are addresses, but require a digit and an uppercase
+    # letter so long lowercase names are never taken for one
+    return (
+        bool(_BASE58_ADDRESS.match(text))
+        and re.search(r"\d", text) is not None
+        and text.lower() != text
+        and not _BITCOIN_ADDRESS.match(text)
+    )
+
+
+def find_contract_address(text: str) -> Optional[str]:
+    """The first contract address in a message, or None"""
+    for match in _ADDRESS_IN_TEXT.finditer(text):
+        if is_contract_address(match.group(1)):
+            return match.group(1)
+    return None
+
+
+def mentions_address(text: str) -> bool:
+    """Whether a message holds a contract address or a Bitcoin address"""
+    return any(is_contract_address(word) or _BITCOIN_ADDRESS.match(word) for word in _ADDRESS_IN_TEXT.findall(text))
+
+
+def normalize_address(address: str) -> str:
+    """EVM addresses are case-insensitive (checksum casing is dropped); others are kept as is"""
+    address = address.strip()
+    return address.lower() if _EVM_ADDRESS.match(address) else address
+
+
+def address_platforms(address: str) -> List[str]:
+    """CoinGecko platforms a contract address can belong to, most likely first"""
+    if _EVM_ADDRESS.match(address):
+        return CONTRACT_EVM_PLATFORMS
+    if _TRON_ADDRESS.match(address):
+        return ["tron"]
+    return ["solana"]
+
+
+def index_coins(coins: List[Dict[str, Any]]) -> Dict[str, _Entries]:
+    """Address -> coins from /coins/list?include_platform=true rows"""
+    addresses: Dict[str, _Entries] = {}
+    for coin in coins:
+        for platform, address in (coin.get("platforms") or {}).items():
+            if platform and address and is_contract_address(address):
+                addresses.setdefault(normalize_address(address), []).append(
+                    [coin["id"], coin.get("symbol") or "", platform]
+                )
+    return addresses
+
+
+def fetch_addresses() -> Dict[str, Any]:
+    """The index contents from /coins/list with platforms"""
+    coins = coingecko_get("/coins/list", {"include_platform": "true"}, cache=False)
+    if not isinstance(coins, list) or not coins:
+        raise ValueError(f"Unexpected /coins/list response: {str(coins)[:200]}")
+    return {"coins": len(coins), "addresses": index_coins(coins)}
+
+
+def build_index(path: str = CONTRACT_INDEX_PATH) -> int:
+    """Fetch /coins/list with platforms and replace the index file atomically.
+    Returns the number of addresses."""
+    data = fetch_addresses()
+    write_snapshot(path, data)
+    return len(data["addresses"])
+
+
+class ContractIndex:
+    """Address -> coin lookups from the index file (see services/snapshot.py)"""
+
+    def __init__(self, path: str = CONTRACT_INDEX_PATH):
+        self.snapshot = Snapshot(
+            "contract_index", path, fetch_addresses, CONTRACT_INDEX_MAX_AGE, CONTRACT_INDEX_RETRY
+        )
+        self._data: Optional[Dict[str, Any]] = None
+        # Addresses the contract endpoint resolved since the file was loaded
+        self._learned: Dict[str, _Entries] = {}
+        self._misses = create_cache("contract_misses", ttl=CONTRACT_MISS_TTL, maxsize=4096)
+
+    def _addresses(self, wait: bool = False) -> Dict[str, _Entries]:
+        data = self.snapshot.load(wait=wait)
+        if data is not self._data:
+            self._data, self._learned = data, {}
+        return data.get("addresses", {}) if data is not None else {}
+
+    def coins(self, address: str) -> List[Dict[str, str]]:
+        """Coins listed under the address in the index, without any API call (an index
+        that doesn't exist yet is built in the background)"""
+        key = normalize_address(address)
+        entries = self._addresses().get(key) or self._learned.get(key) or []
+        return [{"id": coin_id, "symbol": symbol, "platform": platform} for coin_id, symbol, platform in entries]
+
+    def resolve(self, address: str) -> Optional[Dict[str, str]]:
+        """The coin (id, symbol, platform) with this contract address, or None"""
+        self._addresses(wait=True)
+        coins = self.coins(address)
+        if coins:
+            CONTRACT_LOOKUPS.inc(outcome="index")
+            return coins[0]
+        key = normalize_address(address)
+        if self._misses.get(key) is None:
+            found = self._from_contract_endpoint(key)
+            if found is not None:
+                CONTRACT_LOOKUPS.inc(outcome="contract")
+                self._learned[key] = [list(found)]
+                return {"id": found[0], "symbol": found[1], "platform": found[2]}
+            self._misses.set(key, True)
+        CONTRACT_LOOKUPS.inc(outcome="miss")
+        return None
+
+    def _from_contract_endpoint(self, address: str) -> Optional[Tuple[str, str, str]]:
+        for platform in address_platforms(address):
+            data = coingecko_get(f"/coins/{platform}/contract/{address}")
+            if isinstance(data, dict) and data.get("id"):
+                return data["id"], data.get("symbol") or "", platform
+        return None
+
+
+contract_index = ContractIndex()
@@ -2,9 +2,11 @@
 Crypto Scam Agent - Detects and analyzes cryptocurrency scam risks
 """
 import re
-from typing import List, Dict
+from typing import Any, List, Dict
 from langchain.tools import Tool
 
+from .rendering import bullets
+
 # Common scam indicators
 SCAM_KEYWORDS = [
     "guaranteed returns",
@@ -32,76 +34,81 @@ SUSPICIOUS_PATTERNS = [
     r"no.*risk.*investment",
 ]
 
-def analyze_scam_risk(project_name: str, additional_info: str = "") -> str:
-    """Analyze cryptocurrency project for scam indicators and risks"""
-    try:
-        # Combine project name and additional info for analysis
-        text_to_analyze = f"{project_name} {additional_info}".lower()
-        
-        # Initialize risk assessment
-        risk_factors = []
-        risk_score = 0
-        
-        # Check for scam keywords
-        found_keywords = []
-        for keyword in SCAM_KEYWORDS:
-            if keyword in text_to_analyze:
-                found_keywords.append(keyword)
-                risk_score += 10
-        
-        if found_keywords:
-            risk_factors.append(f"Suspicious keywords detected: {', '.join(found_keywords)}")
-        
-        # Check for suspicious patterns
-        found_patterns = []
-        for pattern in SUSPICIOUS_PATTERNS:
-            if re.search(pattern, text_to_analyze):
-                found_patterns.append(pattern)
-                risk_score += 15
-        
-        if found_patterns:
-            risk_factors.append(f"Suspicious patterns detected: {len(found_patterns)} patterns")
-        
-        # Check for common scam project name patterns
-        if any(word in project_name.lower() for word in ["elon", "musk", "doge", "shiba", "moon", "safe"]):
-            risk_factors.append("Project name contains commonly exploited terms")
-            risk_score += 5
-        
-        # Check for unrealistic promises
-        if re.search(r"\d{3,}%", text_to_analyze):  # 100%+ returns
-            risk_factors.append("Unrealistic return promises detected")
-            risk_score += 20
-        
-        # Check for urgency tactics
-        urgency_words = ["hurry", "last chance", "ending soon", "act fast", "now or never"]
-        if any(word in text_to_analyze for word in urgency_words):
-            risk_factors.append("Urgency tactics detected")
+def assess_scam_risk(project_name: str, additional_info: str = "") -> Dict[str, Any]:
+    """Score a project for scam indicators and return the structured assessment"""
+    # Combine project name and additional info for analysis
+    text_to_analyze = f"{project_name} {additional_info}".lower()
+    
+    # Initialize risk assessment
+    risk_factors = []
+    risk_score = 0
+    
+    # Check for scam keywords
+    found_keywords = []
+    for keyword in SCAM_KEYWORDS:
+        if keyword in text_to_analyze:
+            found_keywords.append(keyword)
             risk_score += 10
-        
-        # Check for anonymous team
-        if "anonymous" in text_to_analyze or "doxxed" not in text_to_analyze:
-            risk_factors.append("Potentially anonymous team")
+    
+    if found_keywords:
+        risk_factors.append(f"Suspicious keywords detected: {', '.join(found_keywords)}")
+    
+    # Check for suspicious patterns
+    found_patterns = []
+    for pattern in SUSPICIOUS_PATTERNS:
+        if re.search(pattern, text_to_analyze):
+            found_patterns.append(pattern)
             risk_score += 15
-        
-        # Calculate risk level
-        if risk_score >= 50:
-            risk_level = "HIGH RISK"
-            recommendation = "⚠️ EXTREME CAUTION: Multiple red flags detected. High probability of scam."
-        elif risk_score >= 30:
-            risk_level = "MEDIUM-HIGH RISK"
-            recommendation = "⚠️ CAUTION: Several warning signs present. Proceed with extreme caution."
-        elif risk_score >= 15:
-            risk_level = "MEDIUM RISK"
-            recommendation = "⚠️ WARNING: Some suspicious indicators found. Research thoroughly before investing."
-        elif risk_score > 0:
-            risk_level = "LOW-MEDIUM RISK"
-            recommendation = "ℹ️ NOTE: Minor concerns detected. Conduct due diligence."
-        else:
-            risk_level = "LOW RISK"
-            recommendation = "✅ No major red flags detected, but always do your own research."
-        
-        # Format response
-        response = f"""
+    
+    if found_patterns:
+        risk_factors.append(f"Suspicious patterns detected: {len(found_patterns)} patterns")
+    
+    # Check for common scam project name patterns
+    if any(word in project_name.lower() for word in ["elon", "musk", "doge", "shiba", "moon", "safe"]):
+        risk_factors.append("Project name contains commonly exploited terms")
+        risk_score += 5
+    
+    # Check for unrealistic promises
+    if re.search(r"\d{3,}%", text_to_analyze):  # 100%+ returns
+        risk_factors.append("Unrealistic return promises detected")
+        risk_score += 20
+    
+    # Check for urgency tactics
+    urgency_words = ["hurry", "last chance", "ending soon", "act fast", "now or never"]
+    if any(word in text_to_analyze for word in urgency_words):
+        risk_factors.append("Urgency tactics detected")
+        risk_score += 10
+    
+    # Check for anonymous team
+    if "anonymous" in text_to_analyze or "doxxed" not in text_to_analyze:
+        risk_factors.append("Potentially anonymous team")
+        risk_score += 15
+    
+    # Calculate risk level
+    if risk_score >= 50:
+        risk_level = "HIGH RISK"
+        recommendation = "⚠️ EXTREME CAUTION: Multiple red flags detected. High probability of scam."
+    elif risk_score >= 30:
+        risk_level = "MEDIUM-HIGH RISK"
+        recommendation = "⚠️ CAUTION: Several warning signs present. Proceed with extreme caution."
+    elif risk_score >= 15:
+        risk_level = "MEDIUM RISK"
+        recommendation = "⚠️ WARNING: Some suspicious indicators found. Research thoroughly before investing."
+    elif risk_score > 0:
+        risk_level = "LOW-MEDIUM RISK"
+        recommendation = "ℹ️ NOTE: Minor concerns detected. Conduct due diligence."
+    else:
+        risk_level = "LOW RISK"
+        recommendation = "✅ No major red flags detected, but always do your own research."
+
+    return {
+        "risk_level": risk_level,
+        "risk_score": risk_score,
+        "risk_factors": risk_factors,
+        "recommendation": recommendation,
+    }
+
+SCAM_REPORT = """
 **Scam Risk Assessment for {project_name}:**
 
 🚨 Risk Level: {risk_level}
@@ -109,14 +116,8 @@ def analyze_scam_risk(project_name: str, additional_info: str = "") -> str:
 
 **Risk Factors Identified:**
 """
-        
-        if risk_factors:
-            for factor in risk_factors:
-                response += f"• {factor}\n"
-        else:
-            response += "• No specific risk factors identified\n"
-        
-        response += f"""
+
+SCAM_GUIDANCE = """
 **Recommendation:**
 {recommendation}
 
@@ -139,9 +140,26 @@ def analyze_scam_risk(project_name: str, additional_info: str = "") -> str:
 • Copied whitepaper content
 • Fake partnerships or endorsements
 """
-        
-        return response
-        
+
+def format_scam_assessment(project_name: str, assessment: Dict[str, Any]) -> str:
+    """Format an assess_scam_risk result as a markdown report"""
+    risk_factors = assessment["risk_factors"]
+    return "".join([
+        SCAM_REPORT.format(
+            project_name=project_name,
+            risk_level=assessment["risk_level"],
+            risk_score=assessment["risk_score"],
+        ),
+        bullets(risk_factors) if risk_factors else "• No specific risk factors identified\n",
+        SCAM_GUIDANCE.format(recommendation=assessment["recommendation"]),
+    ])
+
+def analyze_scam_risk(project_name: str, additional_info: str = "") -> str:
+    """Analyze cryptocurrency project for scam indicators and risks"""
+    try:
+        assessment = assess_scam_risk(project_name, additional_info)
+        return format_scam_assessment(project_name, assessment)
+
     except Exception as e:
         return f"Error analyzing scam risk: {str(e)}"
 
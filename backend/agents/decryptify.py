@@ -1,10 +1,9 @@
-from typing import Dict, List, Optional
-import sys
+from typing import Dict, List, Optional, Tuple
+import os
+import time
 import logging
 from langchain.tools import Tool
-from langchain.agents import create_react_agent
 from langchain.llms.base import LLM
-from langchain.prompts import PromptTemplate
 
 # Configure logging
 logging.basicConfig(
@@ -13,13 +12,95 @@ logging.basicConfig(
 logger = logging.getLogger("decryptify")
 
 # Import all other agents
-from .coin_info import coin_info_tool
-from .crypto_scam import crypto_scam_tool
-from .certik import certik_tool
-from .chainbroker import chainbroker_tool
-from .founder_info import founder_info_tool
-from .project_info import project_info_tool
+from .coin_info import fetch_coin_market_data, format_coin_info
+from .crypto_scam import assess_scam_risk, format_scam_assessment
+from .audit_index import audit_index
+from .certik import format_audit_report, lookup_audits
+from .chainbroker import chainbroker_tool, is_exchange
+from .contract_index import contract_index, is_contract_address, normalize_address
+from .exchange_index import exchange_index
+from .founder_info import find_project_founders, founder_info_tool, lookup_founder
+from .market_risk import assess_market_risk
+from .project_info import lookup_project, project_info_tool
+from .related_graph import related_graph
 from .related_projects import find_related_projects
+from .sections import (
+    SECTION_DEPENDENCIES,
+    SECTION_VERSIONS,
+    fingerprint,
+    quantize,
+    run_section_graph,
+    section_store,
+)
+from .trust_facts import collect_trust_facts, render_trust_facts
+from .trust_score import MARKET_RISK_WEIGHT
+from services.cache import create_cache
+from services.llm_usage import BudgetExceededError, budget_available, invoke_llm
+from services.metrics import record_stage, span
+from services.scheduler import scheduled
+from services.singleflight import SingleFlight
+
+# Finished reports keyed by (project, contract address, scored by LLM). Expired entries are still
+# served when the LLM budget is spent, so degraded answers reuse the last full report.
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "300"))
+_report_cache = create_cache(
+    "report", ttl=REPORT_CACHE_TTL, maxsize=int(os.getenv("REPORT_CACHE_SIZE", "512"))
+)
+
+_inflight = SingleFlight("decryptify_analysis")
+
+
+def project_key(project_name: str) -> str:
+    """Normalized project name used for caching and coalescing ("  Bitcoin " -> "bitcoin").
+    Contract addresses keep their case unless it is an EVM checksum."""
+    if is_contract_address(project_name):
+        return normalize_address(project_name)
+    return " ".join(project_name.lower().split())
+
+
+def resolve_query(query: str, offline: bool = False) -> Tuple[str, Optional[str]]:
+    """
+    The project to analyze for a query and the contract address it was given
+    as, if any. An address is analyzed as the coin it belongs to (its audits are
+    also matched on the address); an unknown address is analyzed as is. With
+    `offline`, only the contract index is consulted (no CoinGecko calls).
+    """
+    project_name = query.strip()
+    if not is_contract_address(project_name):
+        return project_name, None
+    address = normalize_address(project_name)
+    if offline:
+        coins = contract_index.coins(address)
+        coin = coins[0] if coins else None
+    else:
+        coin = contract_index.resolve(address)
+    return (coin["id"] if coin else address), address
+
+
+# The LLM only sees compact facts (see trust_facts.py), not the full section reports
+TRUST_SCORE_PROMPT = """Based on the following facts about the cryptocurrency project {project_name}, calculate a trust score from 0-10 and provide a brief explanation.
+Higher scores indicate higher trustworthiness. Consider security, tokenomics, team credibility, code audits, and other risk factors.
+
+{facts}
+
+Return only a trust score section in this format:
+Overall Trust Score: [SCORE]/10
+Trust Level: [HIGH/MEDIUM/LOW]
+Reason: [1-2 sentence explanation]"""
+
+
+def cached_report(query: str, allow_stale: bool = False) -> Optional[str]:
+    """A finished report for the project, preferring LLM-scored ones, or None"""
+    project_name, address = resolve_query(query, offline=True)
+    key = project_key(project_name)
+    for scored_by_llm in (True, False):
+        if allow_stale:
+            report = _report_cache.get_stale((key, address, scored_by_llm))
+        else:
+            report = _report_cache.get((key, address, scored_by_llm))
+        if report is not None:
+            return report
+    return None
 
 
 def decryptify_analysis(query: str, llm: Optional[LLM] = None) -> str:
@@ -29,54 +110,168 @@ def decryptify_analysis(query: str, llm: Optional[LLM] = None) -> str:
     try:
         logger.info(f"Starting Decryptify analysis for query: {query}")
         # Parse the query to extract project/coin name
-        project_name = query.strip()
+        project_name, address = resolve_query(query)
         logger.info(f"Analyzing project: {project_name}")
 
-        # Initialize response sections
-        sections = {
-            "market_data": "",
-            "scam_analysis": "",
-            "security_audit": "",
-            "exchange_analysis": "",
-            "founder_analysis": "",
-            "project_analysis": "",
-            "related_projects": [],
-        }
-        # 1. Get market data
+        if llm is not None and not budget_available():
+            logger.warning(
+                f"LLM budget spent - serving cached or deterministic report for {project_name}"
+            )
+            cached_report = _report_cache.get_stale((project_key(project_name), address, True))
+            if cached_report is not None:
+                return cached_report
+            llm = None
+
+        cache_key = (project_key(project_name), address, llm is not None)
+        cached_report = _report_cache.get(cache_key)
+        if cached_report is not None:
+            logger.info(f"Serving cached report for {project_name}")
+            return cached_report
+
+        # Concurrent requests for the same project share one computation, which
+        # takes an agent slot at the caller's priority class
+        def run() -> str:
+            with scheduled("agent"):
+                return _analyze_project(project_name, llm, address=address)
+
+        return _inflight.do(cache_key, run)
+    except Exception as e:
+        error_msg = f"Error performing Decryptify analysis: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+def screen_project(project_name: str, market_info: Dict, llm: Optional[LLM] = None) -> str:
+    """
+    Report for batch screening from market data fetched in bulk (see batch.py).
+    A fresh cached report is reused; otherwise the report is built without the
+    related-projects search (not part of the report) and is not cached, since
+    bulk market rows carry no project links.
+    """
+    project_name, address = resolve_query(project_name, offline=True)
+    if llm is not None and not budget_available():
+        llm = None
+    cached = _report_cache.get((project_key(project_name), address, llm is not None))
+    if cached is not None:
+        return cached
+    with scheduled("agent"):
+        return _analyze_project(project_name, llm, prefetched_market=market_info, address=address)
+
+
+def _scam_section(project_name: str) -> tuple:
+    assessment = assess_scam_risk(project_name)
+    return assessment, format_scam_assessment(project_name, assessment)
+
+
+def _audit_section(project_name: str, address: Optional[str] = None) -> tuple:
+    # Reports for the exact contract, else for the project
+    audits = (lookup_audits(address) if address else []) or lookup_audits(project_name)
+    audit = audits[0] if audits else None
+    return audit, format_audit_report(project_name, audit, audits[1:])
+
+
+def _founder_section(project_name: str) -> tuple:
+    founders = find_project_founders(project_name)
+    named_founder = lookup_founder(project_name)
+    if named_founder and named_founder not in founders:
+        founders.append(named_founder)
+    return founders, founder_info_tool.func(project_name)
+
+
+def _project_section(project_name: str) -> tuple:
+    return lookup_project(project_name), project_info_tool.func(project_name)
+
+
+def _analyze_project(
+    project_name: str,
+    llm: Optional[LLM],
+    prefetched_market: Optional[Dict] = None,
+    address: Optional[str] = None,
+) -> str:
+    """Run every agent for a project, score it and assemble (and cache) the report.
+    Sections whose inputs are unchanged since the last run are reused (see sections.py).
+    `address` is the contract address the project was asked about, if any."""
+    key = project_key(project_name)
+    # Initialize response sections
+    sections = {
+        "market_data": "",
+        "scam_analysis": "",
+        "security_audit": "",
+        "exchange_analysis": "",
+        "founder_analysis": "",
+        "project_analysis": "",
+        "related_projects": [],
+    }
+    # Structured agent outputs feeding the trust-score prompt
+    market_info = None
+    scam_assessment = None
+    audit_record = None
+    founder_records = []
+    project_record = None
+    trust_score = None
+    trust_scored_by_llm = False
+
+    # 1. Get market data
+    def fetch_market() -> None:
+        nonlocal market_info
         try:
             logger.info(f"Fetching market data for {project_name}")
-            sections["market_data"] = coin_info_tool.func(project_name)
+            with span("agent", "coin_info"):
+                market_info = prefetched_market or fetch_coin_market_data(address or project_name)
+                sections["market_data"] = (
+                    format_coin_info(market_info)
+                    if market_info
+                    else f"No cryptocurrency found with name '{project_name}'"
+                )
             logger.info("Market data fetched successfully")
         except Exception as e:
             logger.error(f"Error fetching market data: {str(e)}")
             sections["market_data"] = f"Market data unavailable: {str(e)}"
 
-        # 2. Perform scam analysis
+    # 2. Perform scam analysis
+    def analyze_scam() -> None:
+        nonlocal scam_assessment
         try:
             logger.info(f"Performing scam analysis for {project_name}")
-            sections["scam_analysis"] = crypto_scam_tool.func(project_name)
+            with span("agent", "crypto_scam"):
+                scam_assessment, sections["scam_analysis"] = section_store.run(
+                    key, "scam_analysis", lambda: _scam_section(project_name)
+                )
             logger.info("Scam analysis completed")
         except Exception as e:
             logger.error(f"Error in scam analysis: {str(e)}")
             sections["scam_analysis"] = f"Scam analysis unavailable: {str(e)}"
-        # 3. Check security audits
+
+    # 3. Check security audits
+    def check_audits() -> None:
+        nonlocal audit_record
         try:
             logger.info(f"Checking security audits for {project_name}")
-            sections["security_audit"] = certik_tool.func(project_name)
+            with span("agent", "certik"):
+                audit_record, sections["security_audit"] = section_store.run(
+                    key,
+                    "security_audit",
+                    lambda: _audit_section(project_name, address),
+                    audit_index.version,
+                    address,
+                )
             logger.info("Security audit check completed")
         except Exception as e:
             logger.error(f"Error checking security audits: {str(e)}")
             sections["security_audit"] = f"Security audit unavailable: {str(e)}"
 
-        # 4. Analyze exchanges (if applicable)
+    # 4. Analyze exchanges (if applicable: a curated or CoinGecko-listed exchange)
+    def analyze_exchanges() -> None:
         try:
-            if (
-                "exchange" in project_name.lower()
-                or "binance" in project_name.lower()
-                or "coinbase" in project_name.lower()
-            ):
+            if is_exchange(project_name):
                 logger.info(f"Performing exchange analysis for {project_name}")
-                sections["exchange_analysis"] = chainbroker_tool.func(project_name)
+                with span("agent", "chainbroker"):
+                    sections["exchange_analysis"] = section_store.run(
+                        key,
+                        "exchange_analysis",
+                        lambda: chainbroker_tool.func(project_name),
+                        exchange_index.version,
+                    )
                 logger.info("Exchange analysis completed")
             else:
                 logger.info(
@@ -88,80 +283,100 @@ def decryptify_analysis(query: str, llm: Optional[LLM] = None) -> str:
         except Exception as e:
             logger.error(f"Error in exchange analysis: {str(e)}")
             sections["exchange_analysis"] = f"Exchange analysis unavailable: {str(e)}"
-        # 5. Research founders
+
+    # 5. Research founders
+    def research_founders() -> None:
+        nonlocal founder_records
         try:
             logger.info(f"Researching founders for {project_name}")
-            sections["founder_analysis"] = founder_info_tool.func(project_name)
+            with span("agent", "founder_info"):
+                founder_records, sections["founder_analysis"] = section_store.run(
+                    key, "founder_analysis", lambda: _founder_section(project_name)
+                )
             logger.info("Founder research completed")
         except Exception as e:
             logger.error(f"Error researching founders: {str(e)}")
             sections["founder_analysis"] = f"Founder analysis unavailable: {str(e)}"
 
-        # 6. Gather project information
+    # 6. Gather project information
+    def gather_project() -> None:
+        nonlocal project_record
         try:
             logger.info(f"Gathering project information for {project_name}")
-            sections["project_analysis"] = project_info_tool.func(project_name)
+            with span("agent", "project_info"):
+                project_record, sections["project_analysis"] = section_store.run(
+                    key, "project_analysis", lambda: _project_section(project_name)
+                )
             logger.info("Project information gathering completed")
         except Exception as e:
             logger.error(f"Error gathering project information: {str(e)}")
             sections["project_analysis"] = f"Project analysis unavailable: {str(e)}"
 
-        # 7. Find related projects/founders using the dedicated function (passing the LLM)
+    # 7. Find related projects/founders using the dedicated function (passing the LLM)
+    def find_related() -> None:
         try:
-            logger.info(f"Finding related projects for {project_name}")
-            sections["related_projects"] = find_related_projects(project_name, llm)
-            logger.info(f"Found {len(sections['related_projects'])} related projects")
+            if prefetched_market is None:
+                logger.info(f"Finding related projects for {project_name}")
+                with span("agent", "related_projects"):
+                    sections["related_projects"] = section_store.run(
+                        key,
+                        "related_projects",
+                        lambda: find_related_projects(project_name, llm),
+                        related_graph.version,
+                    )
+                logger.info(f"Found {len(sections['related_projects'])} related projects")
         except Exception as e:
             logger.error(f"Error finding related projects: {str(e)}")
-            sections["related_projects"] = (
-                []
-            )  # 8. Let the LLM calculate the trust score        # Initialize with None to ensure we properly detect and handle missing LLM scenario
-        trust_score = None
+            sections["related_projects"] = []
+
+    # 8. Let the LLM calculate the trust score
+    def score_trust() -> None:
+        nonlocal trust_score, trust_scored_by_llm, llm
         logger.info(f"Beginning trust score calculation for {project_name}")
-        if llm:
+        # Reduce the sections to the facts that matter for scoring. An LLM score for the
+        # same (quantized) facts is reused, also when the budget is spent
+        trust_facts = collect_trust_facts(
+            market_info,
+            scam_assessment,
+            audit_record,
+            founder_records,
+            project_record,
+        )
+        trust_fingerprint = fingerprint(
+            SECTION_VERSIONS["trust_score"], key, TRUST_SCORE_PROMPT, quantize(trust_facts)
+        )
+        previous_score = section_store.get(key, "trust_score", trust_fingerprint)
+        if previous_score is not None:
+            logger.info(f"Trust facts unchanged for {project_name} - reusing the LLM trust score")
+            trust_score = previous_score
+            trust_scored_by_llm = True
+        elif llm:
             try:
-                # Combine all analysis for trust score calculation with LLM
-                combined_analysis = f"""
-                Market Data: {sections['market_data']}
-                Scam Analysis: {sections['scam_analysis']}
-                Security Audit: {sections['security_audit']}
-                Founder Analysis: {sections['founder_analysis']}
-                Project Analysis: {sections['project_analysis']}
-                """
-
                 # Log the analysis data being used
                 logger.info(f"Analysis data assembled for {project_name}")
 
                 # Prompt the LLM to calculate a trust score
-                trust_prompt = f"""
-                Based on the following analysis of the cryptocurrency project {project_name}, 
-                calculate a trust score from 0-10 and provide a brief explanation.
-                Higher scores indicate higher trustworthiness. Consider security, tokenomics,
-                team credibility, code audits, and other risk factors.
-                
-                {combined_analysis}
-                
-                Return only a trust score section in this format:
-                Overall Trust Score: [SCORE]/10
-                Trust Level: [HIGH/MEDIUM/LOW]
-                Reason: [1-2 sentence explanation]                """
+                trust_prompt = TRUST_SCORE_PROMPT.format(
+                    project_name=project_name, facts=render_trust_facts(trust_facts)
+                )
                 logger.info(f"Invoking LLM for trust score calculation")
-                response = llm.invoke(trust_prompt)
-                # Extract content based on the return type (could be message object or string)
-                if hasattr(response, "content"):
-                    trust_score = response.content
-                else:
-                    trust_score = str(response)
+                trust_score = invoke_llm(llm, trust_prompt, "trust_score")
+                trust_scored_by_llm = True
+                section_store.put(key, "trust_score", trust_fingerprint, trust_score)
 
                 logger.info(f"Received trust score: {trust_score[:50]}...")
+            except BudgetExceededError as e:
+                # Fall through to the deterministic score below
+                logger.warning(f"Trust score LLM call skipped: {str(e)}")
+                llm = None
             except Exception as e:
                 logger.error(f"Trust score calculation failed: {str(e)}")
                 # Create a fallback trust score based on available data
                 trust_level = "MEDIUM"
                 reasoning = f"Unable to complete full analysis due to: {str(e)}"
                 trust_score = f"Overall Trust Score: 5/10\nTrust Level: {trust_level}\nReason: {reasoning}"
-        else:
-            # If no LLM is provided, we need to generate a basic trust score from available data
+        if trust_score is None:
+            # If no LLM is provided (or its budget is spent), generate a basic trust score from available data
             logger.warning(
                 "No LLM provided for trust score calculation - generating basic score"
             )
@@ -215,196 +430,215 @@ def decryptify_analysis(query: str, llm: Optional[LLM] = None) -> str:
                     trust_value = 7
                     reasoning = "Well-established cryptocurrency with significant market presence and community support."
 
-                trust_score = f"Overall Trust Score: {trust_value}/10\nTrust Level: {trust_level}\nReason: {reasoning}"
-                logger.info(
-                    f"Generated trust score for well-known crypto: {trust_score}"
-                )
-                return trust_score
-
-            # Generate explanation based on available data
-            reasons = []
-            if "Market data unavailable" not in sections["market_data"]:
-                reasons.append("market data available")
-            if "No founder information" not in sections["founder_analysis"]:
-                reasons.append("founder information verified")
-            if reasons:
-                reasoning = f"Basic assessment based on {', '.join(reasons)}"
+                logger.info(f"Generated trust score for well-known crypto: {project_name}")
             else:
-                reasoning = "Limited data available for comprehensive assessment"
+                # Generate explanation based on available data
+                reasons = []
+                if "Market data unavailable" not in sections["market_data"]:
+                    reasons.append("market data available")
+                if "No founder information" not in sections["founder_analysis"]:
+                    reasons.append("founder information verified")
+                if reasons:
+                    reasoning = f"Basic assessment based on {', '.join(reasons)}"
+                else:
+                    reasoning = "Limited data available for comprehensive assessment"
+
+            # Blend in the numeric market-risk score, weighted as in calculate_trust_score
+            market_risk = assess_market_risk([market_info])[0] if market_info else None
+            if market_risk is not None:
+                trust_value = round(
+                    trust_value * (1 - MARKET_RISK_WEIGHT) + market_risk["score"] * MARKET_RISK_WEIGHT
+                )
+                reasoning = f"{reasoning.rstrip('.')}. Market risk score: {market_risk['score']}/10."
 
             trust_score = f"Overall Trust Score: {trust_value}/10\nTrust Level: {trust_level}\nReason: {reasoning}"
             logger.info("Generated basic trust score in absence of LLM")
 
-        # Extract current price from market data
-        current_price = "Not available"
-        market_cap = "Not available"
-        try:
-            import re
+    # Each step starts once its inputs are done, so the trust-score call runs
+    # alongside the steps the score doesn't read (exchanges, related projects)
+    run_section_graph(
+        {
+            "market_data": fetch_market,
+            "scam_analysis": analyze_scam,
+            "security_audit": check_audits,
+            "exchange_analysis": analyze_exchanges,
+            "founder_analysis": research_founders,
+            "project_analysis": gather_project,
+            "related_projects": find_related,
+            "trust_score": score_trust,
+        },
+        SECTION_DEPENDENCIES,
+    )
+
+    # Extract current price from market data
+    parse_started = time.perf_counter()
+    current_price = "Not available"
+    market_cap = "Not available"
+    try:
+        import re
 
-            price_match = re.search(r"Price: \$([\d,\.]+)", sections["market_data"])
-            if price_match:
-                current_price = f"${price_match.group(1)}"
+        price_match = re.search(r"Price: \$([\d,\.]+)", sections["market_data"])
+        if price_match:
+            current_price = f"${price_match.group(1)}"
 
-            mcap_match = re.search(
-                r"Market Cap: \$([\d,\.]+\w?)", sections["market_data"]
+        mcap_match = re.search(
+            r"Market Cap: \$([\d,\.]+\w?)", sections["market_data"]
+        )
+        if mcap_match:
+            market_cap = f"${mcap_match.group(1)}"
+    except Exception:
+        pass  # Extract founder info - just the basics
+    founder_info = "No founder information available"
+    try:
+        # Special case for Bitcoin
+        if project_name.lower() == "bitcoin" or project_name.lower() == "btc":
+            founder_info = "Created by Satoshi Nakamoto (pseudonym). Identity remains unknown. Bitcoin whitepaper was published in 2008."
+            logger.info("Using predefined founder info for Bitcoin")
+        # Special case for Ethereum
+        elif project_name.lower() == "ethereum" or project_name.lower() == "eth":
+            founder_info = "Founded by Vitalik Buterin along with Gavin Wood, Charles Hoskinson, and others in 2015."
+            logger.info("Using predefined founder info for Ethereum")
+        else:
+            # Try to extract just the key founder information
+            founder_section = sections["founder_analysis"].split("\n")
+            for i, line in enumerate(founder_section):
+                if "Founder" in line or "Team" in line or "CEO" in line:
+                    founder_info = "\n".join(founder_section[i : i + 3])
+                    break
+    except Exception as e:
+        logger.error(f"Error extracting founder info: {str(e)}")
+        pass  # Extract trust level with more robust parsing
+    trust_level = "MEDIUM"
+    try:
+        if "Trust Level:" in trust_score:
+            trust_level = (
+                trust_score.split("Trust Level:")[1].split("\n")[0].strip()
             )
-            if mcap_match:
-                market_cap = f"${mcap_match.group(1)}"
-        except Exception:
-            pass  # Extract founder info - just the basics
-        founder_info = "No founder information available"
+            logger.info(f"Extracted trust level: {trust_level}")
+        else:
+            logger.warning("No 'Trust Level:' found in trust score response")
+    except Exception as e:
+        logger.error(f"Error extracting trust level: {str(e)}")
+
+    # Extract reasoning with more robust parsing
+    reasoning = (
+        "Analysis based on market data, security audits, and project history."
+    )
+    try:
+        if "Reason:" in trust_score:
+            reasoning = trust_score.split("Reason:")[1].strip()
+            logger.info(f"Extracted reasoning: {reasoning[:50]}...")
+        else:
+            logger.warning("No 'Reason:' found in trust score response")
+    except Exception as e:
+        logger.error(
+            f"Error extracting reasoning: {str(e)}"
+        )  # Format a simplified concise response with separate string parts to avoid backslash issues
+    project_remark = "No project data available"
+    scam_remark = "No scam analysis available"
+
+    # Special case for major cryptocurrencies
+    if project_name.lower() == "bitcoin" or project_name.lower() == "btc":
+        project_remark = "First decentralized cryptocurrency, created in 2009. Uses proof-of-work consensus."
+        scam_remark = "Bitcoin itself is legitimate, but be aware of Bitcoin-related scams and fake wallets."
+        logger.info("Using predefined project and scam remarks for Bitcoin")
+    elif project_name.lower() == "ethereum" or project_name.lower() == "eth":
+        project_remark = (
+            "Smart contract platform that enables DApps and DeFi applications."
+        )
+        scam_remark = "Ethereum is legitimate, but watch for phishing sites and fake airdrops."
+        logger.info("Using predefined project and scam remarks for Ethereum")
+    else:
         try:
-            # Special case for Bitcoin
-            if project_name.lower() == "bitcoin" or project_name.lower() == "btc":
-                founder_info = "Created by Satoshi Nakamoto (pseudonym). Identity remains unknown. Bitcoin whitepaper was published in 2008."
-                logger.info("Using predefined founder info for Bitcoin")
-            # Special case for Ethereum
-            elif project_name.lower() == "ethereum" or project_name.lower() == "eth":
-                founder_info = "Founded by Vitalik Buterin along with Gavin Wood, Charles Hoskinson, and others in 2015."
-                logger.info("Using predefined founder info for Ethereum")
-            else:
-                # Try to extract just the key founder information
-                founder_section = sections["founder_analysis"].split("\n")
-                for i, line in enumerate(founder_section):
-                    if "Founder" in line or "Team" in line or "CEO" in line:
-                        founder_info = "\n".join(founder_section[i : i + 3])
+            project_lines = sections["project_analysis"].split("\n")
+            if project_lines and len(project_lines) > 0:
+                for line in project_lines:
+                    if line.strip():  # Find first non-empty line
+                        project_remark = line.strip()
                         break
+            logger.info(f"Project remark: {project_remark}")
         except Exception as e:
-            logger.error(f"Error extracting founder info: {str(e)}")
-            pass  # Extract trust level with more robust parsing
-        trust_level = "MEDIUM"
-        try:
-            if "Trust Level:" in trust_score:
-                trust_level = (
-                    trust_score.split("Trust Level:")[1].split("\n")[0].strip()
-                )
-                logger.info(f"Extracted trust level: {trust_level}")
-            else:
-                logger.warning("No 'Trust Level:' found in trust score response")
-        except Exception as e:
-            logger.error(f"Error extracting trust level: {str(e)}")
+            logger.error(f"Error extracting project remark: {str(e)}")
 
-        # Extract reasoning with more robust parsing
-        reasoning = (
-            "Analysis based on market data, security audits, and project history."
-        )
         try:
-            if "Reason:" in trust_score:
-                reasoning = trust_score.split("Reason:")[1].strip()
-                logger.info(f"Extracted reasoning: {reasoning[:50]}...")
-            else:
-                logger.warning("No 'Reason:' found in trust score response")
+            scam_lines = sections["scam_analysis"].split("\n")
+            if scam_lines and len(scam_lines) > 0:
+                for line in scam_lines:
+                    if line.strip():  # Find first non-empty line
+                        scam_remark = line.strip()
+                        break
+            logger.info(f"Scam remark: {scam_remark}")
         except Exception as e:
             logger.error(
-                f"Error extracting reasoning: {str(e)}"
-            )  # Format a simplified concise response with separate string parts to avoid backslash issues
-        project_remark = "No project data available"
-        scam_remark = "No scam analysis available"
-
-        # Special case for major cryptocurrencies
-        if project_name.lower() == "bitcoin" or project_name.lower() == "btc":
-            project_remark = "First decentralized cryptocurrency, created in 2009. Uses proof-of-work consensus."
-            scam_remark = "Bitcoin itself is legitimate, but be aware of Bitcoin-related scams and fake wallets."
-            logger.info("Using predefined project and scam remarks for Bitcoin")
-        elif project_name.lower() == "ethereum" or project_name.lower() == "eth":
-            project_remark = (
-                "Smart contract platform that enables DApps and DeFi applications."
-            )
-            scam_remark = "Ethereum is legitimate, but watch for phishing sites and fake airdrops."
-            logger.info("Using predefined project and scam remarks for Ethereum")
+                f"Error extracting scam remark: {str(e)}"
+            )  # Build response with more robust trust score extraction
+    trust_score_value = "N/A"  # Default if we can't extract a proper score
+    try:
+        if "Overall Trust Score:" in trust_score:
+            parts = trust_score.split("Overall Trust Score:")
+            if len(parts) > 1:
+                score_line = parts[1].split("\n")[0].strip()
+                if score_line:
+                    trust_score_value = score_line
+                    logger.info(f"Extracted trust score value: {trust_score_value}")
+                else:
+                    logger.warning("Empty trust score value extracted")
         else:
-            try:
-                project_lines = sections["project_analysis"].split("\n")
-                if project_lines and len(project_lines) > 0:
-                    for line in project_lines:
-                        if line.strip():  # Find first non-empty line
-                            project_remark = line.strip()
-                            break
-                logger.info(f"Project remark: {project_remark}")
-            except Exception as e:
-                logger.error(f"Error extracting project remark: {str(e)}")
-
-            try:
-                scam_lines = sections["scam_analysis"].split("\n")
-                if scam_lines and len(scam_lines) > 0:
-                    for line in scam_lines:
-                        if line.strip():  # Find first non-empty line
-                            scam_remark = line.strip()
-                            break
-                logger.info(f"Scam remark: {scam_remark}")
-            except Exception as e:
-                logger.error(
-                    f"Error extracting scam remark: {str(e)}"
-                )  # Build response with more robust trust score extraction
-        trust_score_value = "N/A"  # Default if we can't extract a proper score
-        try:
-            if "Overall Trust Score:" in trust_score:
-                parts = trust_score.split("Overall Trust Score:")
-                if len(parts) > 1:
-                    score_line = parts[1].split("\n")[0].strip()
-                    if score_line:
-                        trust_score_value = score_line
-                        logger.info(f"Extracted trust score value: {trust_score_value}")
-                    else:
-                        logger.warning("Empty trust score value extracted")
-            else:
-                logger.warning(
-                    "No 'Overall Trust Score:' found in trust score response"
-                )
-                # Try to generate a score if LLM didn't provide one in expected format
-                if llm and trust_score:
-                    try:
-                        # Ask LLM to extract or generate a score
-                        extract_prompt = f"Extract or generate a trust score from 0-10 for this analysis: {trust_score}\nJust output the number followed by /10."
-                        score_response = llm.invoke(extract_prompt)
-                        if hasattr(score_response, "content"):
-                            extracted = score_response.content.strip()
-                        else:
-                            extracted = str(score_response).strip()
-
-                        # Look for a pattern like "7/10" in the response
-                        import re
-
-                        score_match = re.search(r"(\d+(?:\.\d+)?)/10", extracted)
-                        if score_match:
-                            trust_score_value = score_match.group(0)
-                            logger.info(
-                                f"Generated trust score from content: {trust_score_value}"
-                            )
-                    except Exception as e:
-                        logger.error(
-                            f"Error generating trust score from content: {str(e)}"
+            logger.warning(
+                "No 'Overall Trust Score:' found in trust score response"
+            )
+            # Try to generate a score if LLM didn't provide one in expected format
+            if llm and trust_score:
+                try:
+                    # Ask LLM to extract or generate a score
+                    extract_prompt = f"Extract or generate a trust score from 0-10 for this analysis: {trust_score}\nJust output the number followed by /10."
+                    extracted = invoke_llm(
+                        llm, extract_prompt, "trust_score_extract"
+                    ).strip()
+
+                    # Look for a pattern like "7/10" in the response
+                    import re
+
+                    score_match = re.search(r"(\d+(?:\.\d+)?)/10", extracted)
+                    if score_match:
+                        trust_score_value = score_match.group(0)
+                        logger.info(
+                            f"Generated trust score from content: {trust_score_value}"
                         )
-        except Exception as e:
-            logger.error(f"Error extracting trust score value: {str(e)}")
-
-        # Ensure project and scam remarks are not empty
-        if not project_remark or project_remark.isspace():
-            project_remark = "No significant project data available"
-
-        if not scam_remark or scam_remark.isspace():
-            scam_remark = "No significant risk factors identified"
-
-        # Build the final response with proper formatting
-        response = (
-            f"{project_name.upper()}\n\n"
-            f"Trust Score: {trust_score_value} ({trust_level})\n"
-            f"Current Price: {current_price}\n"
-            f"Market Cap: {market_cap}\n\n"
-            f"Founder: {founder_info}\n\n"
-            f"Key Remarks:\n"
-            f"- {project_remark}\n"
-            f"- {scam_remark}\n\n"
-            f"Reasoning: {reasoning}"
-        )
-
-        logger.info(f"Analysis complete for {project_name}")
-        logger.debug(f"Final response: {response}")
-        return response
+                except Exception as e:
+                    logger.error(
+                        f"Error generating trust score from content: {str(e)}"
+                    )
     except Exception as e:
-        error_msg = f"Error performing Decryptify analysis: {str(e)}"
-        logger.error(error_msg)
-        return error_msg
+        logger.error(f"Error extracting trust score value: {str(e)}")
+
+    # Ensure project and scam remarks are not empty
+    if not project_remark or project_remark.isspace():
+        project_remark = "No significant project data available"
+
+    if not scam_remark or scam_remark.isspace():
+        scam_remark = "No significant risk factors identified"
+
+    # Build the final response with proper formatting
+    record_stage("parse", "report", time.perf_counter() - parse_started)
+    response = (
+        f"{project_name.upper()}\n\n"
+        f"Trust Score: {trust_score_value} ({trust_level})\n"
+        f"Current Price: {current_price}\n"
+        f"Market Cap: {market_cap}\n\n"
+        f"Founder: {founder_info}\n\n"
+        f"Key Remarks:\n"
+        f"- {project_remark}\n"
+        f"- {scam_remark}\n\n"
+        f"Reasoning: {reasoning}"
+    )
+
+    logger.info(f"Analysis complete for {project_name}")
+    logger.debug(f"Final response: {response}")
+    # Reports whose LLM scoring failed, and screening reports, are not cached
+    if prefetched_market is None and (llm is None or trust_scored_by_llm):
+        _report_cache.set((project_key(project_name), address, llm is not None), response)
+    return response
 
 
 # Create the tool
@@ -0,0 +1,132 @@
+"""
+Exchange Index - every CoinGecko-listed exchange, for lookups by name or id
+
+The chainbroker agent has detailed records for a few exchanges in the entity
+store. For the rest, the index holds CoinGecko's exchange list, fetched in
+bulk /exchanges pages (EXCHANGE_INDEX_PAGE_SIZE per call) into
+EXCHANGE_INDEX_PATH (default backend/data/exchange_index.json) and refreshed
+in the background once older than EXCHANGE_INDEX_MAX_AGE (services/snapshot.py).
+
+Each exchange is keyed by its id and its name, both without case, spaces and
+punctuation, and by its name without the word "exchange" ("Coinbase
+Exchange" is found as "coinbase"), so a lookup is one dict hit. Exchanges are
+stored in trust-rank order and earlier ones win shared keys.
+
+scripts/build_exchange_index.py builds the file ahead of time.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .coingecko import coingecko_get
+from services.metrics import REGISTRY
+from services.snapshot import Snapshot, write_snapshot
+
+EXCHANGE_INDEX_PATH = os.getenv(
+    "EXCHANGE_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "exchange_index.json"),
+)
+# Seconds before the index is refreshed; volumes and trust scores move during the day
+EXCHANGE_INDEX_MAX_AGE = float(os.getenv("EXCHANGE_INDEX_MAX_AGE", "21600"))
+# Most exchanges /exchanges returns per page, and the most pages fetched
+EXCHANGE_INDEX_PAGE_SIZE = 250
+EXCHANGE_INDEX_MAX_PAGES = int(os.getenv("EXCHANGE_INDEX_MAX_PAGES", "10"))
+
+EXCHANGE_INDEX_LOOKUPS = REGISTRY.counter(
+    "decryptify_exchange_index_lookups_total",
+    "Exchange index lookups by outcome (hit, or miss when the name is not a listed exchange)",
+    ("outcome",),
+)
+
+_NOT_WORD = re.compile(r"[\W_]+")
+_EXCHANGE_WORD = re.compile(r"\bexchange\b", re.IGNORECASE)
+
+
+def exchange_keys(name: str) -> List[str]:
+    """Lookup keys for an exchange name or id ("Coinbase Exchange" -> coinbaseexchange, coinbase)"""
+    keys = [_NOT_WORD.sub("", name.lower())]
+    stripped = _NOT_WORD.sub("", _EXCHANGE_WORD.sub("", name).lower())
+    # "Exchange 24" is not indexed as "24"
+    if stripped and stripped != keys[0] and not stripped.isdigit():
+        keys.append(stripped)
+    return [key for key in keys if key]
+
+
+def _exchange_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of an /exchanges row the chainbroker report uses"""
+    return {
+        "id": row["id"],
+        "name": row.get("name") or row["id"],
+        "year_established": row.get("year_established"),
+        "country": row.get("country"),
+        "url": row.get("url"),
+        "trust_score": row.get("trust_score"),
+        "trust_score_rank": row.get("trust_score_rank"),
+        "volume_24h_btc": row.get("trade_volume_24h_btc"),
+        "volume_24h_btc_normalized": row.get("trade_volume_24h_btc_normalized"),
+    }
+
+
+def fetch_exchanges() -> Dict[str, Any]:
+    """The index contents from bulk /exchanges pages, in trust-rank order"""
+    rows: List[Dict[str, Any]] = []
+    for page in range(1, EXCHANGE_INDEX_MAX_PAGES + 1):
+        batch = coingecko_get(
+            "/exchanges", {"per_page": EXCHANGE_INDEX_PAGE_SIZE, "page": page}, cache=False
+        )
+        if not isinstance(batch, list) or not batch:
+            break
+        rows.extend(batch)
+        if len(batch) < EXCHANGE_INDEX_PAGE_SIZE:
+            break
+    if not rows:
+        raise ValueError("No exchanges returned by /exchanges")
+    return {"exchanges": [_exchange_record(row) for row in rows if row.get("id")]}
+
+
+def build_index(path: str = EXCHANGE_INDEX_PATH) -> int:
+    """Fetch every /exchanges page and replace the index file atomically.
+    Returns the number of exchanges."""
+    data = fetch_exchanges()
+    write_snapshot(path, data)
+    return len(data["exchanges"])
+
+
+class ExchangeIndex:
+    """Exchange lookups by name or id from the index file (see services/snapshot.py)"""
+
+    def __init__(self, path: str = EXCHANGE_INDEX_PATH):
+        self.snapshot = Snapshot("exchange_index", path, fetch_exchanges, EXCHANGE_INDEX_MAX_AGE)
+        # (loaded data, exchanges, key -> position), swapped as a whole on reload
+        self._loaded: Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int]] = (None, [], {})
+
+    def _table(self, wait: bool) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        data = self.snapshot.load(wait=wait)
+        loaded = self._loaded
+        if data is not loaded[0]:
+            exchanges = data.get("exchanges", []) if data is not None else []
+            keys: Dict[str, int] = {}
+            for i, exchange in enumerate(exchanges):
+                for key in exchange_keys(exchange["id"]) + exchange_keys(exchange["name"]):
+                    keys.setdefault(key, i)
+            loaded = self._loaded = (data, exchanges, keys)
+        return loaded[1], loaded[2]
+
+    def get(self, name: str, wait: bool = False) -> Optional[Dict[str, Any]]:
+        """The listed exchange with this name or id, or None. Makes no API call unless
+        `wait` and the index doesn't exist yet (it is then built first)."""
+        exchanges, keys = self._table(wait)
+        for key in exchange_keys(name):
+            if key in keys:
+                EXCHANGE_INDEX_LOOKUPS.inc(outcome="hit")
+                return exchanges[keys[key]]
+        EXCHANGE_INDEX_LOOKUPS.inc(outcome="miss")
+        return None
+
+    @property
+    def version(self) -> Optional[float]:
+        """Build time of the loaded index, or None without one"""
+        return self.snapshot.version
+
+
+exchange_index = ExchangeIndex()
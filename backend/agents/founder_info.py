@@ -1,114 +1,48 @@
 """
 Founder Info Agent - Investigates founder and team credibility
 """
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 from langchain.tools import Tool
 import re
 
-# Mock database of known founders (in production, this would use real APIs)
-FOUNDER_DATABASE = {
-    "vitalik buterin": {
-        "name": "Vitalik Buterin",
-        "role": "Co-founder of Ethereum",
-        "credibility_score": 10,
-        "background": [
-            "Co-founded Ethereum at age 19",
-            "Received Thiel Fellowship in 2014",
-            "Published Ethereum whitepaper in 2013",
-            "Regular speaker at blockchain conferences",
-            "Active on Twitter with verified account"
-        ],
-        "education": "Studied at University of Waterloo",
-        "previous_projects": ["Bitcoin Magazine"],
-        "social_presence": {
-            "twitter": "@VitalikButerin",
-            "github": "vbuterin",
-            "verified": True
-        },
-        "red_flags": [],
-        "achievements": [
-            "TIME Magazine's 100 most influential people (2021)",
-            "World Technology Award (2014)",
-            "Created one of the largest blockchain platforms"
-        ]
-    },
-    "changpeng zhao": {
-        "name": "Changpeng Zhao (CZ)",
-        "role": "Founder and CEO of Binance",
-        "credibility_score": 9,
-        "background": [
-            "Former developer at Blockchain.info",
-            "CTO at OKCoin",
-            "Founded Binance in 2017",
-            "Built largest crypto exchange by volume"
-        ],
-        "education": "McGill University - Computer Science",
-        "previous_projects": ["Fusion Systems", "OKCoin"],
-        "social_presence": {
-            "twitter": "@cz_binance",
-            "verified": True
-        },
-        "red_flags": ["Regulatory challenges in multiple countries"],
-        "achievements": [
-            "Built Binance to #1 exchange globally",
-            "Forbes Crypto Billionaire",
-            "Pioneered BNB token and BSC"
-        ]
-    }
-}
+from .rendering import bullets
+from services.entity_store import entity_store
 
-def research_founder(founder_name: str, project_name: str = "") -> str:
-    """Research founder and team credibility"""
-    try:
-        # Normalize founder name
-        normalized_name = founder_name.lower().strip()
-        
-        # Check if we have data for this founder
-        if normalized_name in FOUNDER_DATABASE:
-            founder = FOUNDER_DATABASE[normalized_name]
-            
-            response = f"""
-**Founder Analysis: {founder['name']}**
+# Founder records live in the entity store (data/sources/founders.json)
+
+def lookup_founder(founder_name: str) -> Optional[Dict[str, Any]]:
+    """Return the database record for a founder, or None if unknown"""
+    return entity_store.get("founders", founder_name.lower().strip())
+
+def find_project_founders(project_name: str) -> List[Dict[str, Any]]:
+    """Return known founders whose role names the project (e.g. "Co-founder of Ethereum")"""
+    project = project_name.lower().strip()
+    words = re.findall(r"\w+", project)
+    if not words:
+        return []
+    # Candidates from the role word index, then the exact whole-phrase match
+    return [
+        founder for founder in entity_store.search("founders", words[0])
+        if re.search(rf"\b{re.escape(project)}\b", founder["role"].lower())
+    ]
+
+FOUNDER_REPORT = """
+**Founder Analysis: {name}**
 
-👤 Role: {founder['role']}
-🎯 Credibility Score: {founder['credibility_score']}/10
-🎓 Education: {founder['education']}
+👤 Role: {role}
+🎯 Credibility Score: {credibility_score}/10
+🎓 Education: {education}
 
 **Professional Background:**
 """
-            for item in founder['background']:
-                response += f"• {item}\n"
-            
-            response += "\n**Previous Projects:**\n"
-            for project in founder['previous_projects']:
-                response += f"• {project}\n"
-            
-            response += "\n**Achievements:**\n"
-            for achievement in founder['achievements']:
-                response += f"• {achievement}\n"
-            
-            response += f"""
+
+FOUNDER_SOCIAL = """
 **Social Media Presence:**
-• Twitter: {founder['social_presence']['twitter']}
-• Verified Account: {'Yes' if founder['social_presence']['verified'] else 'No'}
+• Twitter: {twitter}
+• Verified Account: {verified}
 """
-            
-            if founder['red_flags']:
-                response += "\n**Potential Concerns:**\n"
-                for flag in founder['red_flags']:
-                    response += f"• {flag}\n"
-            
-            response += "\n**Assessment:**\n"
-            if founder['credibility_score'] >= 8:
-                response += "✅ HIGHLY CREDIBLE: Well-established figure with proven track record"
-            elif founder['credibility_score'] >= 6:
-                response += "✅ CREDIBLE: Legitimate background with some accomplishments"
-            else:
-                response += "⚠️ QUESTIONABLE: Limited track record or concerning factors"
-                
-        else:
-            # Provide general guidance for unknown founders
-            response = f"""
+
+UNKNOWN_FOUNDER_REPORT = """
 **Founder Analysis: {founder_name}**
 
 ❓ No specific information found for this founder.
@@ -167,6 +101,44 @@ For project "{project_name}", ensure you:
 • Look for team token allocations
 • Assess long-term commitment
 """
+
+def research_founder(founder_name: str, project_name: str = "") -> str:
+    """Research founder and team credibility"""
+    try:
+        # Check if we have data for this founder
+        founder = lookup_founder(founder_name)
+        if founder is not None:
+            parts = [
+                FOUNDER_REPORT.format(
+                    name=founder['name'],
+                    role=founder['role'],
+                    credibility_score=founder['credibility_score'],
+                    education=founder['education'],
+                ),
+                bullets(founder['background']),
+                "\n**Previous Projects:**\n",
+                bullets(founder['previous_projects']),
+                "\n**Achievements:**\n",
+                bullets(founder['achievements']),
+                FOUNDER_SOCIAL.format(
+                    twitter=founder['social_presence']['twitter'],
+                    verified='Yes' if founder['social_presence']['verified'] else 'No',
+                ),
+            ]
+            if founder['red_flags']:
+                parts += ["\n**Potential Concerns:**\n", bullets(founder['red_flags'])]
+            parts.append("\n**Assessment:**\n")
+            if founder['credibility_score'] >= 8:
+                parts.append("✅ HIGHLY CREDIBLE: Well-established figure with proven track record")
+            elif founder['credibility_score'] >= 6:
+                parts.append("✅ CREDIBLE: Legitimate background with some accomplishments")
+            else:
+                parts.append("⚠️ QUESTIONABLE: Limited track record or concerning factors")
+            response = "".join(parts)
+                
+        else:
+            # Provide general guidance for unknown founders
+            response = UNKNOWN_FOUNDER_REPORT.format(founder_name=founder_name, project_name=project_name)
         
         return response
         
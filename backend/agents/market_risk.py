@@ -0,0 +1,116 @@
+"""
+Market Risk - numeric risk features from market data, vectorized across coins
+
+Features, one row per coin (NaN when an input is missing):
+
+- volatility: annualized; from the local price history (volatility_30d) when
+  available, else estimated from the 24h/7d/30d price changes
+- drawdown_from_ath: 1 - price / all-time high
+- liquidity_ratio: 24h volume / market cap
+- supply_inflation: total supply / circulating supply - 1 (supply still to come)
+
+score_market_risk() maps each feature to a 0-10 sub-score (10 = lowest risk)
+and takes their weighted mean over the features present. Inputs are the
+market data dicts from coin_info (fetch_coin_market_data or fetch_markets), so
+a whole watch-list is scored in a handful of array operations.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+FEATURES = ("volatility", "drawdown_from_ath", "liquidity_ratio", "supply_inflation")
+
+# Sub-score curves: (feature values, scores), linear in between and clamped outside
+_CURVES = {
+    "volatility": ([0.3, 0.8, 1.5], [10.0, 6.0, 0.0]),
+    "drawdown_from_ath": ([0.0, 0.5, 0.95], [10.0, 6.0, 0.0]),
+    # On log10(volume / market cap): thin books and wash-trading levels both score low
+    "liquidity_ratio": ([-3.0, -2.0, -1.5, -0.3, 0.3, 1.0], [0.0, 4.0, 10.0, 10.0, 3.0, 0.0]),
+    "supply_inflation": ([0.0, 1.0, 4.0], [10.0, 5.0, 0.0]),
+}
+_WEIGHTS = np.array([0.35, 0.25, 0.25, 0.15])
+
+_CHANGE_PERIODS_DAYS = np.array([1.0, 7.0, 30.0])
+
+
+def _column(infos: List[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array(
+        [np.nan if info.get(key) is None else info[key] for info in infos], dtype=np.float64
+    )
+
+
+def market_features(infos: List[Dict[str, Any]]) -> np.ndarray:
+    """Feature matrix of shape (len(infos), len(FEATURES))"""
+    price = _column(infos, "current_price")
+    market_cap = _column(infos, "market_cap")
+    volume = _column(infos, "total_volume")
+    ath = _column(infos, "all_time_high")
+    total_supply = _column(infos, "total_supply")
+    circulating = _column(infos, "circulating_supply")
+
+    # Each period's change as an annualized move; their RMS approximates volatility
+    changes = np.stack(
+        [_column(infos, key) for key in ("price_change_24h", "price_change_7d", "price_change_30d")],
+        axis=1,
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moves = np.log1p(changes / 100.0) / np.sqrt(_CHANGE_PERIODS_DAYS / 365.25)
+        squared = moves * moves
+        counts = np.sum(np.isfinite(squared), axis=1)
+        estimated = np.sqrt(np.nansum(squared, axis=1) / counts)
+        estimated[counts == 0] = np.nan
+        history = _column(infos, "volatility_30d")
+        volatility = np.where(np.isfinite(history), history, estimated)
+
+        drawdown = np.clip(1.0 - price / ath, 0.0, 1.0)
+        liquidity = np.where(market_cap > 0, volume / market_cap, np.nan)
+        inflation = np.where(circulating > 0, np.maximum(total_supply / circulating - 1.0, 0.0), np.nan)
+
+    return np.stack([volatility, drawdown, liquidity, inflation], axis=1)
+
+
+def score_market_risk(features: np.ndarray) -> np.ndarray:
+    """0-10 scores (10 = lowest risk) for a feature matrix; NaN where no feature is known"""
+    sub_scores = np.full(features.shape, np.nan)
+    for i, name in enumerate(FEATURES):
+        values = features[:, i]
+        xs, ys = _CURVES[name]
+        if name == "liquidity_ratio":
+            # Zero volume is the worst liquidity, not unknown: clamp to the curve's floor
+            with np.errstate(invalid="ignore"):
+                values = np.log10(np.maximum(values, 10.0 ** xs[0]))
+        known = np.isfinite(values)
+        sub_scores[known, i] = np.interp(values[known], xs, ys)
+
+    known = np.isfinite(sub_scores)
+    weights = np.where(known, _WEIGHTS, 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.where(known, sub_scores, 0.0) @ _WEIGHTS / total
+    scores[total == 0] = np.nan
+    return np.round(scores, 1)
+
+
+def assess_market_risk(infos: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Per coin: {"score": 0-10, "features": {...}} with unknown features left out,
+    or None when nothing about the coin's market is known"""
+    if not infos:
+        return []
+    features = market_features(infos)
+    scores = score_market_risk(features)
+    results: List[Optional[Dict[str, Any]]] = []
+    for row, score in zip(features, scores):
+        if not np.isfinite(score):
+            results.append(None)
+            continue
+        results.append(
+            {
+                "score": float(score),
+                "features": {
+                    name: round(float(value), 4)
+                    for name, value in zip(FEATURES, row)
+                    if np.isfinite(value)
+                },
+            }
+        )
+    return results
@@ -1,157 +1,43 @@
 """
 Project Info Agent - Gathers comprehensive project information
 """
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 from langchain.tools import Tool
 import re
 
-# Mock project database (in production, this would aggregate from multiple sources)
-PROJECT_DATABASE = {
-    "ethereum": {
-        "name": "Ethereum",
-        "category": "Platform",
-        "description": "Decentralized platform for smart contracts and dApps",
-        "founded": 2015,
-        "mainnet_launch": "July 30, 2015",
-        "consensus": "Proof of Stake (previously Proof of Work)",
-        "token": "ETH",
-        "use_cases": [
-            "Smart contract platform",
-            "DeFi applications",
-            "NFT marketplace",
-            "DAOs",
-            "Layer 2 scaling solutions"
-        ],
-        "technology": {
-            "programming_language": "Solidity",
-            "vm": "Ethereum Virtual Machine (EVM)",
-            "tps": "15-30 (L1), 2000+ (L2)",
-            "block_time": "12 seconds"
-        },
-        "ecosystem": {
-            "dapps": "3000+",
-            "developers": "200,000+",
-            "wallets": "MetaMask, Trust Wallet, Ledger"
-        },
-        "partnerships": [
-            "Microsoft",
-            "JP Morgan",
-            "ConsenSys",
-            "Enterprise Ethereum Alliance"
-        ],
-        "roadmap": [
-            "Shanghai upgrade (completed)",
-            "Cancun-Deneb upgrade",
-            "Sharding implementation",
-            "Further scaling improvements"
-        ],
-        "github": "https://github.com/ethereum",
-        "website": "https://ethereum.org"
-    },
-    "chainlink": {
-        "name": "Chainlink",
-        "category": "Oracle Network",
-        "description": "Decentralized oracle network providing real-world data to smart contracts",
-        "founded": 2017,
-        "mainnet_launch": "May 30, 2019",
-        "consensus": "N/A (Oracle Network)",
-        "token": "LINK",
-        "use_cases": [
-            "Price feeds for DeFi",
-            "VRF for gaming",
-            "Proof of Reserve",
-            "Cross-chain communication",
-            "External API data"
-        ],
-        "technology": {
-            "programming_language": "Go, Solidity",
-            "architecture": "Decentralized Oracle Network",
-            "integrations": "100+ blockchains",
-            "data_providers": "Premium data providers"
-        },
-        "ecosystem": {
-            "integrations": "1000+",
-            "secured_value": "$75+ billion",
-            "node_operators": "100+"
-        },
-        "partnerships": [
-            "Google Cloud",
-            "Oracle",
-            "SWIFT",
-            "Associated Press"
-        ],
-        "roadmap": [
-            "CCIP expansion",
-            "Staking v0.2",
-            "Economics 2.0",
-            "Cross-chain bridges"
-        ],
-        "github": "https://github.com/smartcontractkit/chainlink",
-        "website": "https://chain.link"
-    }
-}
+from .rendering import bullets
+from services.entity_store import entity_store
 
-def gather_project_info(project_name: str) -> str:
-    """Gather comprehensive information about a cryptocurrency project"""
-    try:
-        # Normalize project name
-        project_key = project_name.lower().replace(" ", "")
-        
-        # Check if we have data for this project
-        if project_key in PROJECT_DATABASE:
-            project = PROJECT_DATABASE[project_key]
-            
-            response = f"""
-**Project Analysis: {project['name']}**
-
-📋 Category: {project['category']}
-📅 Founded: {project['founded']}
-🚀 Mainnet Launch: {project['mainnet_launch']}
-🔐 Consensus: {project['consensus']}
-🪙 Token: {project['token']}
+# Project records live in the entity store (data/sources/projects.json)
+
+def lookup_project(project_name: str) -> Optional[Dict[str, Any]]:
+    """Return the database record for a project, or None if unknown"""
+    return entity_store.get("projects", project_name.lower().replace(" ", ""))
+
+PROJECT_REPORT = """
+**Project Analysis: {name}**
+
+📋 Category: {category}
+📅 Founded: {founded}
+🚀 Mainnet Launch: {mainnet_launch}
+🔐 Consensus: {consensus}
+🪙 Token: {token}
 
 **Description:**
-{project['description']}
+{description}
 
 **Use Cases:**
 """
-            for use_case in project['use_cases']:
-                response += f"• {use_case}\n"
-            
-            response += "\n**Technology Stack:**\n"
-            for key, value in project['technology'].items():
-                response += f"• {key.replace('_', ' ').title()}: {value}\n"
-            
-            response += "\n**Ecosystem:**\n"
-            for key, value in project['ecosystem'].items():
-                response += f"• {key.replace('_', ' ').title()}: {value}\n"
-            
-            response += "\n**Key Partnerships:**\n"
-            for partner in project['partnerships']:
-                response += f"• {partner}\n"
-            
-            response += "\n**Roadmap:**\n"
-            for milestone in project['roadmap']:
-                response += f"• {milestone}\n"
-            
-            response += f"""
+
+PROJECT_RESOURCES = """
 **Resources:**
-• GitHub: {project['github']}
-• Website: {project['website']}
+• GitHub: {github}
+• Website: {website}
 
 **Project Assessment:**
 """
-            # Simple assessment based on available data
-            if len(project['partnerships']) > 3 and int(project['ecosystem'].get('dapps', '0').replace('+', '')) > 100:
-                response += "✅ ESTABLISHED: Mature project with strong ecosystem and partnerships"
-            elif project['mainnet_launch'] and len(project['use_cases']) > 2:
-                response += "✅ DEVELOPING: Active project with clear use cases and growing adoption"
-            else:
-                response += "⚠️ EARLY STAGE: Project still in development phase"
-                
-        else:
-            # Provide guidance for unknown projects
-            response = f"""
+
+UNKNOWN_PROJECT_REPORT = """
 **Project Analysis: {project_name}**
 
 ❓ No specific data available for this project.
@@ -218,6 +104,46 @@ def gather_project_info(project_name: str) -> str:
 • LinkedIn profiles
 • Medium articles
 """
+
+def gather_project_info(project_name: str) -> str:
+    """Gather comprehensive information about a cryptocurrency project"""
+    try:
+        # Check if we have data for this project
+        project = lookup_project(project_name)
+        if project is not None:
+            parts = [
+                PROJECT_REPORT.format(
+                    name=project['name'],
+                    category=project['category'],
+                    founded=project['founded'],
+                    mainnet_launch=project['mainnet_launch'],
+                    consensus=project['consensus'],
+                    token=project['token'],
+                    description=project['description'],
+                ),
+                bullets(project['use_cases']),
+                "\n**Technology Stack:**\n",
+                bullets(f"{key.replace('_', ' ').title()}: {value}" for key, value in project['technology'].items()),
+                "\n**Ecosystem:**\n",
+                bullets(f"{key.replace('_', ' ').title()}: {value}" for key, value in project['ecosystem'].items()),
+                "\n**Key Partnerships:**\n",
+                bullets(project['partnerships']),
+                "\n**Roadmap:**\n",
+                bullets(project['roadmap']),
+                PROJECT_RESOURCES.format(github=project['github'], website=project['website']),
+            ]
+            # Simple assessment based on available data
+            if len(project['partnerships']) > 3 and int(project['ecosystem'].get('dapps', '0').replace('+', '')) > 100:
+                parts.append("✅ ESTABLISHED: Mature project with strong ecosystem and partnerships")
+            elif project['mainnet_launch'] and len(project['use_cases']) > 2:
+                parts.append("✅ DEVELOPING: Active project with clear use cases and growing adoption")
+            else:
+                parts.append("⚠️ EARLY STAGE: Project still in development phase")
+            response = "".join(parts)
+                
+        else:
+            # Provide guidance for unknown projects
+            response = UNKNOWN_PROJECT_REPORT.format(project_name=project_name)
         
         return response
         
@@ -0,0 +1,216 @@
+"""
+Related Graph - precomputed project relationships as a compressed adjacency index
+
+Coins are linked when they share a CoinGecko category, an asset platform (the
+chain their token is issued on) or a founder from the entity store. The graph
+is built offline by scripts/build_related_graph.py and saved as one .npz file
+(RELATED_GRAPH_PATH, default backend/data/related_graph.npz) in CSR form:
+
+- ids, names, symbols: one entry per coin, in market-cap order
+- indptr, indices: coin i's neighbours are indices[indptr[i]:indptr[i + 1]],
+  strongest link first
+- weights, label_ids: per edge, the summed link weight and the strongest link's
+  explanation (an index into labels)
+
+A lookup is a dict hit plus an array slice, so related projects no longer need
+an LLM call for coins in the graph. The file is reloaded when it changes.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.entity_store import entity_store
+from services.metrics import REGISTRY
+
+logger = logging.getLogger("decryptify")
+
+RELATED_GRAPH_PATH = os.getenv(
+    "RELATED_GRAPH_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "related_graph.npz"),
+)
+
+# Link weights; a shared founder says more than a shared chain
+CATEGORY_WEIGHT = 1.0
+PLATFORM_WEIGHT = 0.5
+FOUNDER_WEIGHT = 3.0
+# Each coin links to this many of the largest coins in each of its groups
+GROUP_FANOUT = 20
+# Neighbours kept per coin
+MAX_NEIGHBOURS = 16
+
+RELATED_GRAPH_LOOKUPS = REGISTRY.counter(
+    "decryptify_related_graph_lookups_total",
+    "Related-project graph lookups (hit, or miss when the coin is not in the graph)",
+    ("outcome",),
+)
+
+
+def founder_groups(names: List[str]) -> Dict[str, List[int]]:
+    """Coins (by position in `names`) per known founder, matched on the
+    founder's role ("Co-founder of Ethereum") and previous projects"""
+    groups: Dict[str, List[int]] = {}
+    lowered = [name.lower() for name in names]
+    for _, founder in entity_store.records("founders"):
+        projects = [founder["role"].lower()] + [p.lower() for p in founder.get("previous_projects", [])]
+        members = [
+            i for i, name in enumerate(lowered)
+            if name and any(
+                name == project or re.search(rf"\bof {re.escape(name)}\b", project) for project in projects
+            )
+        ]
+        if len(members) > 1:
+            groups[founder["name"]] = members
+    return groups
+
+
+def build_graph(coins: List[Dict[str, Any]], path: str = RELATED_GRAPH_PATH) -> Dict[str, int]:
+    """
+    Build and save the graph. `coins` are dicts with id, name, symbol,
+    market_cap_rank, categories (display names) and asset_platform_id, for
+    example gathered from /coins/markets and /coins/list. Returns node and
+    edge counts.
+    """
+    coins = sorted(
+        {coin["id"]: coin for coin in coins}.values(),
+        key=lambda coin: (coin.get("market_cap_rank") is None, coin.get("market_cap_rank") or 0, coin["id"]),
+    )
+
+    # Groups are (label, weight, members in rank order)
+    groups: List[Tuple[str, float, List[int]]] = []
+    by_category: Dict[str, List[int]] = {}
+    by_platform: Dict[str, List[int]] = {}
+    for i, coin in enumerate(coins):
+        for category in coin.get("categories") or []:
+            by_category.setdefault(category, []).append(i)
+        if coin.get("asset_platform_id"):
+            by_platform.setdefault(coin["asset_platform_id"], []).append(i)
+    groups += [(f"Same {name} category", CATEGORY_WEIGHT, members) for name, members in by_category.items()]
+    groups += [
+        (f"Also built on {platform.title()}", PLATFORM_WEIGHT, members)
+        for platform, members in by_platform.items()
+    ]
+    groups += [
+        (f"Shared founder: {founder}", FOUNDER_WEIGHT, members)
+        for founder, members in founder_groups([coin["name"] for coin in coins]).items()
+    ]
+
+    labels: List[str] = []
+    # (coin, neighbour) -> [summed weight, strongest link weight, label id]
+    edges: Dict[Tuple[int, int], List[float]] = {}
+    for label, weight, members in groups:
+        if len(members) < 2:
+            continue
+        label_id = len(labels)
+        labels.append(label)
+        leaders = members[: GROUP_FANOUT + 1]
+        for i in members:
+            for j in leaders:
+                if i == j:
+                    continue
+                edge = edges.get((i, j))
+                if edge is None:
+                    edges[(i, j)] = [weight, weight, label_id]
+                else:
+                    edge[0] += weight
+                    if weight > edge[1]:
+                        edge[1], edge[2] = weight, label_id
+
+    neighbours: List[List[Tuple[float, int, int]]] = [[] for _ in coins]
+    for (i, j), (weight, _, label_id) in edges.items():
+        neighbours[i].append((weight, j, label_id))
+
+    indptr = np.zeros(len(coins) + 1, dtype=np.int64)
+    indices: List[int] = []
+    weights: List[float] = []
+    label_ids: List[int] = []
+    for i, links in enumerate(neighbours):
+        # Strongest first, then larger coins
+        links.sort(key=lambda link: (-link[0], link[1]))
+        for weight, j, label_id in links[:MAX_NEIGHBOURS]:
+            indices.append(j)
+            weights.append(weight)
+            label_ids.append(label_id)
+        indptr[i + 1] = len(indices)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        ids=np.array([coin["id"] for coin in coins], dtype=str),
+        names=np.array([coin.get("name") or coin["id"] for coin in coins], dtype=str),
+        symbols=np.array([(coin.get("symbol") or "").lower() for coin in coins], dtype=str),
+        indptr=indptr,
+        indices=np.array(indices, dtype=np.int32),
+        weights=np.array(weights, dtype=np.float32),
+        label_ids=np.array(label_ids, dtype=np.int32),
+        labels=np.array(labels, dtype=str),
+    )
+    os.replace(tmp_path, path)
+    return {"nodes": len(coins), "edges": len(indices)}
+
+
+class RelatedGraph:
+    """Read side of the graph file, loaded lazily and reloaded when the file changes"""
+
+    def __init__(self, path: str = RELATED_GRAPH_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self._lookup: Dict[str, int] = {}
+
+    def _load(self) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return self._arrays
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    with np.load(self.path, allow_pickle=False) as data:
+                        arrays = {name: data[name] for name in data.files}
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Could not load related-project graph {self.path}: {str(e)}")
+                    arrays = None
+                lookup: Dict[str, int] = {}
+                if arrays is not None:
+                    # Ids win over names, names over symbols; larger coins win ties
+                    for column in ("ids", "names", "symbols"):
+                        for i, key in enumerate(arrays[column].tolist()):
+                            if key:
+                                lookup.setdefault(key.lower(), i)
+                self._arrays, self._lookup, self._mtime = arrays, lookup, mtime
+        return self._arrays
+
+    @property
+    def version(self) -> Optional[float]:
+        """Modification time of the loaded file, or None without a graph"""
+        return self._mtime if self._load() is not None else None
+
+    def related(self, project: str, limit: int = MAX_NEIGHBOURS) -> Optional[List[str]]:
+        """Neighbours as "Name (relationship)" lines, or None when the project
+        is not in the graph"""
+        arrays = self._load()
+        node = self._lookup.get(project.lower().strip()) if arrays is not None else None
+        if node is None:
+            RELATED_GRAPH_LOOKUPS.inc(outcome="miss")
+            return None
+        RELATED_GRAPH_LOOKUPS.inc(outcome="hit")
+        start, end = arrays["indptr"][node], arrays["indptr"][node + 1]
+        end = min(end, start + limit)
+        names, labels = arrays["names"], arrays["labels"]
+        return [
+            f"{names[j]} ({labels[label_id]})"
+            for j, label_id in zip(arrays["indices"][start:end].tolist(), arrays["label_ids"][start:end].tolist())
+        ]
+
+
+related_graph = RelatedGraph()
@@ -1,12 +1,112 @@
 """
 Enhanced function for finding related cryptocurrency projects and founders
+
+Category peers come from CoinGecko's category ids: the id index
+(/coins/categories/list) and each category's member list are cached locally,
+and the member lists for a project's categories are fetched concurrently. The
+search and coin detail calls use the same parameters as coin_info, so they hit
+the response cache when the orchestrator has already looked the coin up; a
+project then resolves with at most one upstream call.
+
+Peers come from the precomputed graph (related_graph.py) when it knows the
+coin; the LLM is asked only for projects missing from it.
 """
+import contextvars
+import logging
 import os
-import re
-import requests
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from langchain.llms.base import LLM
 
+from services.cache import create_cache
+from services.llm_usage import invoke_llm
+from .coin_info import COIN_DETAIL_PARAMS, search_coin
+from .coingecko import coingecko_get
+from .related_graph import related_graph
+
+logger = logging.getLogger("decryptify")
+
+CATEGORY_INDEX_TTL = float(os.getenv("CATEGORY_INDEX_TTL", "86400"))
+CATEGORY_MEMBERS_TTL = float(os.getenv("CATEGORY_MEMBERS_TTL", "3600"))
+# Members kept per category; enough to skip the project itself
+CATEGORY_MEMBERS_SIZE = 10
+# Categories of a project used for peers
+MAX_CATEGORIES = 2
+# Graph neighbours listed per project
+GRAPH_PEERS = 3
+
+_category_index = create_cache("category_index", ttl=CATEGORY_INDEX_TTL, maxsize=1)
+_category_members = create_cache("category_members", ttl=CATEGORY_MEMBERS_TTL, maxsize=1024)
+
+
+def category_index() -> Dict[str, str]:
+    """Category display name (lowercased) -> CoinGecko category id"""
+    index = _category_index.get("all")
+    if index is None:
+        categories = coingecko_get("/coins/categories/list", ttl=CATEGORY_INDEX_TTL)
+        index = {
+            category["name"].lower(): category["category_id"]
+            for category in (categories if isinstance(categories, list) else [])
+            if category.get("name") and category.get("category_id")
+        }
+        if index:
+            _category_index.set("all", index)
+    return index
+
+
+def category_members(category_id: str) -> List[Dict[str, str]]:
+    """Largest coins in a category by market cap, as [{"id", "name"}]"""
+    members = _category_members.get(category_id)
+    if members is None:
+        rows = coingecko_get(
+            "/coins/markets",
+            {
+                "vs_currency": "usd",
+                "category": category_id,
+                "order": "market_cap_desc",
+                "per_page": CATEGORY_MEMBERS_SIZE,
+                "page": 1,
+            },
+        )
+        members = [
+            {"id": row["id"], "name": row.get("name")}
+            for row in (rows if isinstance(rows, list) else [])
+            if row.get("id")
+        ]
+        _category_members.set(category_id, members)
+    return members
+
+
+def _category_peers(coin_id: str, categories: List[str]) -> List[str]:
+    """One peer per category, fetching the uncached member lists concurrently"""
+    try:
+        index = category_index()
+    except Exception as e:
+        logger.warning(f"Could not fetch the CoinGecko category index: {str(e)}")
+        return []
+    known = [(name, index[name.lower()]) for name in categories if name.lower() in index]
+    if not known:
+        return []
+
+    with ThreadPoolExecutor(len(known), thread_name_prefix="category") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, category_members, category_id)
+            for _, category_id in known
+        ]
+        peers = []
+        for (name, category_id), future in zip(known, futures):
+            try:
+                members = future.result()
+            except Exception as e:
+                logger.warning(f"Could not fetch CoinGecko category {category_id}: {str(e)}")
+                continue
+            for coin in members:
+                if coin["id"] != coin_id:  # Don't include the project itself
+                    peers.append(f"{coin['name']} (Same {name} category)")
+                    break
+    return peers
+
+
 def find_related_projects(project_name: str, llm: Optional[LLM] = None) -> List[str]:
     """
     Find related cryptocurrency projects and founders based on multiple data sources:
@@ -15,84 +115,54 @@ def find_related_projects(project_name: str, llm: Optional[LLM] = None) -> List[
     - LLM-based relationships when other methods fail
     """
     related = []
-    
+    resolved = False
+    graph_peers = None
+
     # 1. Try to get data from CoinGecko API first
     try:
-        # Get CoinGecko API key if available
-        api_key = os.getenv("COINGECKO_API_KEY", "")
-        api_url = "https://api.coingecko.com/api/v3"
-        headers = {"x-cg-demo-api-key": api_key} if api_key else {}
-        
-        # Search for coin ID
-        search_url = f"{api_url}/search"
-        search_params = {"query": project_name}
-        search_response = requests.get(search_url, params=search_params, headers=headers)
-        search_data = search_response.json()
-        
-        if search_data.get("coins"):
-            coin_id = search_data["coins"][0]["id"]
-            
-            # Get detailed coin data
-            coin_url = f"{api_url}/coins/{coin_id}"
-            coin_params = {
-                "localization": "false",
-                "tickers": "false",
-                "market_data": "false",
-                "community_data": "true",
-                "developer_data": "false"
-            }
-            
-            coin_response = requests.get(coin_url, params=coin_params, headers=headers)
-            coin_data = coin_response.json()
-            
+        coin = search_coin(project_name)
+
+        if coin is not None:
+            resolved = True
+            coin_id = coin["id"]
+            coin_data = coingecko_get(f"/coins/{coin_id}", COIN_DETAIL_PARAMS)
+
             # Get categories for category-related projects
-            if coin_data.get("categories"):
-                categories = coin_data.get("categories", [])
-                for category in categories[:2]:  # Limit to first 2 categories
-                    related.append(f"Category: {category}")
-                    
-                # Try to get similar coins in the same category
-                try:
-                    category_url = f"{api_url}/coins/markets"
-                    category_params = {
-                        "vs_currency": "usd",
-                        "category": categories[0].lower().replace(" ", "-") if categories else "",
-                        "per_page": 5,
-                        "page": 1
-                    }
-                    cat_response = requests.get(category_url, params=category_params, headers=headers)
-                    cat_data = cat_response.json()
-                    
-                    for coin in cat_data:
-                        if coin.get("id") != coin_id:  # Don't include the project itself
-                            related.append(f"{coin.get('name')} (Same {categories[0]} category)")
-                            break
-                except Exception:
-                    pass
-            
+            categories = coin_data.get("categories") or []
+            categories = [category for category in categories if category][:MAX_CATEGORIES]
+            for category in categories:
+                related.append(f"Category: {category}")
+            graph_peers = related_graph.related(coin_id, GRAPH_PEERS)
+            related.extend(graph_peers if graph_peers is not None else _category_peers(coin_id, categories))
+
             # Get blockchain platform if applicable
             if coin_data.get("asset_platform_id"):
                 platform = coin_data.get("asset_platform_id")
                 related.append(f"Built on {platform.title()}")
-                
+
             # Get links data
             links = coin_data.get("links", {})
-            
+
             # Get homepage for related projects
             if links.get("homepage") and links.get("homepage")[0]:
                 domain = links.get("homepage")[0].replace("http://", "").replace("https://", "").split('/')[0]
                 related.append(f"Website: {domain}")
-            
+
             # Get Twitter info
             if links.get("twitter_screen_name"):
                 related.append(f"Twitter: @{links.get('twitter_screen_name')}")
-    
+
     except Exception as e:
         # If CoinGecko fails, we'll fall back to other methods
         print(f"Error fetching CoinGecko data: {str(e)}")
-    
-    # 2. Use LLM as a fallback when needed
-    if llm and (len(related) < 3):
+
+    # 2. Look the name up in the graph when CoinGecko could not resolve it
+    if not resolved:
+        graph_peers = related_graph.related(project_name, GRAPH_PEERS)
+        related.extend(graph_peers or [])
+
+    # 3. Use LLM as a fallback for projects the graph doesn't know
+    if llm and graph_peers is None and (len(related) < 3):
         try:
             prompt = f"""
             Based on your knowledge, list 5 cryptocurrency projects that are related to {project_name}.
@@ -100,20 +170,20 @@ def find_related_projects(project_name: str, llm: Optional[LLM] = None) -> List[
             Format each as a single line like this: "Project Name (explanation of relationship)"
             Example: "Arbitrum (Ethereum L2 scaling solution)"
             """
-            
-            llm_response = llm.predict(prompt)
-            
+
+            llm_response = invoke_llm(llm, prompt, "related_projects")
+
             # Extract projects from LLM response
             for line in llm_response.split('\n'):
                 if line.strip() and "(" in line and ")" in line:
                     related.append(line.strip())
         except Exception as e:
             print(f"Error using LLM for related projects: {str(e)}")
-    
-    # 3. De-duplicate and limit results
+
+    # 4. De-duplicate and limit results
     unique_related = []
     for item in related:
         if item not in unique_related:
             unique_related.append(item)
-    
+
     return unique_related[:8]  # Limit to 8 unique items
@@ -0,0 +1,20 @@
+"""
+Rendering - shared building blocks for the agents' markdown reports
+
+Reports are assembled from parts joined once rather than grown with `+=`:
+
+- report fragments are module-level str.format templates in each agent
+- bullets(): "• item" lines for a list
+- the static guidance blocks (unknown project, founder, exchange, ...) are
+  module-level constants in each agent, built once and shared by every report
+
+scripts/bench_render.py times the report renderers.
+"""
+from typing import Any, Iterable
+
+BULLET = "• "
+
+
+def bullets(items: Iterable[Any]) -> str:
+    """One "• item" line per item"""
+    return "".join([f"{BULLET}{item}\n" for item in items])
@@ -0,0 +1,182 @@
+"""
+Sections - versions and input fingerprints for the orchestrator's report sections
+
+Every stored section carries a fingerprint of its inputs: the project, the
+section's version and anything else it depends on. A section's version joins
+a code version (bump it when the section's logic changes) with a digest of the
+static data it reads (the scam keyword lists, or its kind in the entity
+store), so editing the audits, founders or projects invalidates exactly the
+sections built from them.
+
+When a report expires, the orchestrator reuses each section whose fingerprint
+still matches and recomputes the rest. Market data is always fetched (through
+the CoinGecko response cache). The trust score is fingerprinted from the
+quantized trust facts, so the LLM is asked again only when the facts moved.
+
+Within a run, sections execute as a dependency graph (run_section_graph): each
+starts once its inputs are done, so the trust-score call overlaps the sections
+it doesn't read.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .crypto_scam import SCAM_KEYWORDS, SUSPICIOUS_PATTERNS
+from services.cache import create_cache
+from services.cancellation import RequestCancelled
+from services.entity_store import entity_store
+from services.metrics import REGISTRY
+
+logger = logging.getLogger("decryptify")
+
+SECTION_CACHE_TTL = float(os.getenv("SECTION_CACHE_TTL", "86400"))
+# Threads per analysis for sections whose inputs are ready
+SECTION_CONCURRENCY = int(os.getenv("SECTION_CONCURRENCY", "8"))
+
+SECTION_RESULTS = REGISTRY.counter(
+    "decryptify_section_results_total",
+    "Report sections reused from the previous run or recomputed",
+    ("section", "outcome"),
+)
+
+
+def data_version(*sources: Any) -> str:
+    """Short digest of static data, e.g. a module-level database dict"""
+    encoded = json.dumps(sources, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+# Code version, or "<code version>:<data version>", per section
+SECTION_VERSIONS: Dict[str, str] = {
+    "scam_analysis": "1:" + data_version(SCAM_KEYWORDS, SUSPICIOUS_PATTERNS),
+    "security_audit": "2",
+    "exchange_analysis": "2",
+    "founder_analysis": "1",
+    "project_analysis": "1",
+    "related_projects": "3",
+    "trust_score": "1",
+}
+
+# Entity store kind each section reads; its digest is the section's data version
+SECTION_ENTITIES: Dict[str, str] = {
+    "security_audit": "audits",
+    "exchange_analysis": "exchanges",
+    "founder_analysis": "founders",
+    "project_analysis": "projects",
+}
+
+
+def section_version(section: str) -> str:
+    """The section's code version joined with the current version of its data"""
+    kind = SECTION_ENTITIES.get(section)
+    if kind is None:
+        return SECTION_VERSIONS[section]
+    return f"{SECTION_VERSIONS[section]}:{entity_store.version(kind)}"
+
+
+# Sections each section reads; the others have no inputs besides the project.
+# The trust facts come from these five, not from exchanges or related projects
+SECTION_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "trust_score": (
+        "market_data",
+        "scam_analysis",
+        "security_audit",
+        "founder_analysis",
+        "project_analysis",
+    ),
+}
+
+
+def run_section_graph(
+    tasks: Dict[str, Callable[[], None]],
+    dependencies: Dict[str, Tuple[str, ...]],
+    workers: int = SECTION_CONCURRENCY,
+) -> None:
+    """Run each task once the tasks it depends on have finished, independent ones
+    concurrently (in the caller's context). Tasks report their own errors; a task
+    that raises still releases its dependents, except on cancellation, which
+    starts nothing more and is re-raised once the running tasks are done."""
+    waiting = {name: set(dependencies.get(name, ())) & set(tasks) for name in tasks}
+    cancelled: Optional[RequestCancelled] = None
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="section") as executor:
+        running: Dict[Future, str] = {}
+
+        def start_ready() -> None:
+            for name in [name for name, inputs in waiting.items() if not inputs]:
+                del waiting[name]
+                running[executor.submit(contextvars.copy_context().run, tasks[name])] = name
+
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if isinstance(future.exception(), RequestCancelled):
+                    cancelled = future.exception()
+                    waiting.clear()
+                elif future.exception() is not None:
+                    logger.error(f"Section {name} failed: {str(future.exception())}")
+                for inputs in waiting.values():
+                    inputs.discard(name)
+            start_ready()
+    if cancelled is not None:
+        raise cancelled
+    if waiting:
+        raise ValueError(f"Section dependency cycle: {sorted(waiting)}")
+
+
+def fingerprint(*inputs: Any) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def quantize(value: Any, digits: int = 2) -> Any:
+    """Round numbers to `digits` significant figures (recursively), so that
+    fingerprints ignore tick-level noise in prices and volumes"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        if value == 0 or not math.isfinite(value):
+            return value
+        return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+    if isinstance(value, dict):
+        return {key: quantize(item, digits) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [quantize(item, digits) for item in value]
+    return value
+
+
+class SectionStore:
+    """Last computed value of each (project, section), valid while its fingerprint matches"""
+
+    def __init__(self, ttl: float = SECTION_CACHE_TTL):
+        self._cache = create_cache("section", ttl=ttl, maxsize=int(os.getenv("SECTION_CACHE_SIZE", "4096")))
+
+    def get(self, project: str, section: str, inputs_fingerprint: str) -> Any:
+        entry = self._cache.get((project, section))
+        if entry is not None and entry[0] == inputs_fingerprint:
+            return entry[1]
+        return None
+
+    def put(self, project: str, section: str, inputs_fingerprint: str, value: Any) -> None:
+        self._cache.set((project, section), [inputs_fingerprint, value])
+
+    def run(self, project: str, section: str, compute: Callable[[], Any], *inputs: Any) -> Any:
+        """The stored value when the section's version and inputs are unchanged, else compute()
+        (values must be JSON-serializable; tuples come back as lists)"""
+        inputs_fingerprint = fingerprint(section_version(section), project, *inputs)
+        value = self.get(project, section, inputs_fingerprint)
+        if value is not None:
+            SECTION_RESULTS.inc(section=section, outcome="reused")
+            return value
+        value = compute()
+        self.put(project, section, inputs_fingerprint, value)
+        SECTION_RESULTS.inc(section=section, outcome="computed")
+        return value
+
+
+section_store = SectionStore()
@@ -0,0 +1,157 @@
+"""
+Trust facts - compact structured inputs for the trust-score LLM prompt
+
+The section reports shown to users carry long generic guidance (research
+checklists, red-flag lists) that tells the LLM nothing about the project being
+scored. The trust-score prompt is built from these facts instead.
+"""
+from typing import Any, Dict, List, Optional
+
+from .market_risk import assess_market_risk
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return round(value, digits) if isinstance(value, (int, float)) else None
+
+
+def collect_trust_facts(
+    market: Optional[Dict[str, Any]],
+    scam: Optional[Dict[str, Any]],
+    audit: Optional[Dict[str, Any]],
+    founders: List[Dict[str, Any]],
+    project: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Reduce the structured agent outputs to the facts that matter for scoring"""
+    facts: Dict[str, Any] = {}
+
+    if market:
+        facts["market"] = {
+            "name": market.get("name"),
+            "symbol": market.get("symbol"),
+            "rank": market.get("market_cap_rank"),
+            "price_usd": market.get("current_price"),
+            "market_cap_usd": market.get("market_cap"),
+            "volume_24h_usd": market.get("total_volume"),
+            "change_24h_pct": _round(market.get("price_change_24h")),
+            "change_7d_pct": _round(market.get("price_change_7d")),
+            "change_30d_pct": _round(market.get("price_change_30d")),
+            "ath_usd": market.get("all_time_high"),
+            # From the local price history (services/timeseries.py); None until it has data
+            "volatility_30d": _round(market.get("volatility_30d")),
+            "max_drawdown_30d": _round(market.get("max_drawdown_30d")),
+            "circulating_supply": market.get("circulating_supply"),
+            "total_supply": market.get("total_supply"),
+            # Unknown (None, left out of the prompt) when the data came without project links
+            "has_whitepaper": bool(market["whitepaper"]) if "whitepaper" in market else None,
+            "has_github": bool(market["github"]) if "github" in market else None,
+        }
+        market_risk = assess_market_risk([market])[0]
+        if market_risk is not None:
+            facts["market"]["market_risk_score"] = market_risk["score"]
+            facts["market"].update(market_risk["features"])
+
+    if scam:
+        facts["scam"] = {
+            "risk_level": scam["risk_level"],
+            "risk_score": scam["risk_score"],
+            "indicators": scam["risk_factors"],
+        }
+
+    if audit:
+        facts["audit"] = {
+            "auditor": audit.get("auditor", "CertiK"),
+            "security_score": audit["security_score"],
+            "date": audit["audit_date"],
+            "contract_verified": audit["contract_verified"],
+            "vulnerabilities": audit["vulnerabilities"],
+        }
+
+    if founders:
+        facts["founders"] = [
+            {
+                "name": founder["name"],
+                "role": founder["role"],
+                "credibility": founder["credibility_score"],
+                "concerns": founder["red_flags"],
+            }
+            for founder in founders
+        ]
+
+    if project:
+        facts["project"] = {
+            "category": project["category"],
+            "founded": project["founded"],
+            "mainnet": project["mainnet_launch"],
+            "consensus": project["consensus"],
+            "partnerships": len(project["partnerships"]),
+        }
+
+    return facts
+
+
+def _fmt_number(value: Any) -> str:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)
+    if abs(value) >= 1_000_000_000:
+        return f"{value / 1_000_000_000:.2f}B"
+    if abs(value) >= 1_000_000:
+        return f"{value / 1_000_000:.2f}M"
+    if abs(value) >= 1:
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    return f"{value:.6g}"
+
+
+def render_trust_facts(facts: Dict[str, Any]) -> str:
+    """Render trust facts as terse `key: value` lines for the prompt"""
+    lines = []
+
+    market = facts.get("market")
+    if market:
+        values = ", ".join(
+            f"{key}={_fmt_number(value)}" for key, value in market.items() if value is not None
+        )
+        lines.append(f"Market: {values}")
+    else:
+        lines.append("Market: no listing found")
+
+    scam = facts.get("scam")
+    if scam:
+        indicators = "; ".join(scam["indicators"]) or "none"
+        lines.append(
+            f"Scam check: {scam['risk_level']} ({scam['risk_score']}/100); indicators: {indicators}"
+        )
+
+    audit = facts.get("audit")
+    if audit:
+        vulnerabilities = (
+            ", ".join(f"{k}={v}" for k, v in audit["vulnerabilities"].items())
+            if audit["vulnerabilities"] else "not published"
+        )
+        score = f"score {audit['security_score']}/100" if audit["security_score"] is not None else "no score"
+        lines.append(
+            f"Audit: {audit['auditor']} {score} on {audit['date']}, "
+            f"contract verified={audit['contract_verified']}, findings: {vulnerabilities}"
+        )
+    else:
+        lines.append("Audit: none on record")
+
+    founders = facts.get("founders")
+    if founders:
+        for founder in founders:
+            concerns = "; ".join(founder["concerns"]) or "none"
+            lines.append(
+                f"Founder: {founder['name']} ({founder['role']}), credibility "
+                f"{founder['credibility']}/10, concerns: {concerns}"
+            )
+    else:
+        lines.append("Founders: no verified records")
+
+    project = facts.get("project")
+    if project:
+        lines.append(
+            "Project: " + ", ".join(f"{key}={value}" for key, value in project.items())
+        )
+    else:
+        lines.append("Project: no curated record")
+
+    return "\n".join(lines)
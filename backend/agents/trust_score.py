@@ -1,13 +1,77 @@
 """
 Trust Score Agent - Calculates overall trust score based on all factors
 """
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 from langchain.tools import Tool
 import json
 import re
 
-def calculate_trust_score(project_info: str) -> str:
-    """Calculate overall trust score (0-10) based on all available project data"""
+from .coin_info import fetch_coin_market_data
+from .contract_index import is_contract_address
+from .market_risk import assess_market_risk
+from .rendering import bullets
+
+# Share of the final score taken by the numeric market-risk component, when market data is given
+MARKET_RISK_WEIGHT = 0.15
+
+TRUST_REPORT = """
+**DECRYPTIFY TRUST SCORE REPORT**
+
+{emoji} **Overall Trust Score: {final_score}/10**
+**Trust Level: {trust_level}**
+
+**Scoring Breakdown:**
+• Team Credibility: {team_credibility}/10 (Weight: {team_credibility_weight}%)
+• Technology: {technology}/10 (Weight: {technology_weight}%)
+• Security: {security}/10 (Weight: {security_weight}%)
+• Community: {community}/10 (Weight: {community_weight}%)
+• Tokenomics: {tokenomics}/10 (Weight: {tokenomics_weight}%)
+• Transparency: {transparency}/10 (Weight: {transparency_weight}%)
+• Track Record: {track_record}/10 (Weight: {track_record_weight}%)
+• Red Flags: {red_flags}/10 (Weight: {red_flags_weight}%)
+{market_line}
+**Key Findings:**
+"""
+
+TRUST_RECOMMENDATION = """
+**Recommendation:**
+{recommendation}
+
+**Investment Guidance:**
+"""
+
+LOW_RISK_GUIDANCE = """
+• LOW RISK: Suitable for most investors
+• Conduct standard due diligence
+• Monitor project developments
+• Consider for long-term holdings
+"""
+
+MEDIUM_RISK_GUIDANCE = """
+• MEDIUM RISK: Suitable for experienced investors
+• Perform thorough research
+• Start with small positions
+• Monitor closely for changes
+"""
+
+HIGH_RISK_GUIDANCE = """
+• HIGH RISK: Only for risk-tolerant investors
+• Extensive due diligence required
+• Consider avoiding or minimal exposure
+• High potential for loss
+"""
+
+TRUST_DISCLAIMER = """
+**Disclaimer:**
+This trust score is based on available public information and automated analysis. It should not be considered financial advice. Always do your own research and consult with financial professionals before making investment decisions.
+
+**Trust Score Methodology:**
+Our scoring system evaluates multiple factors including team credibility, technology assessment, security audits, community strength, tokenomics, transparency, track record, and potential red flags. Each factor is weighted based on its importance to overall project trustworthiness.
+"""
+
+def calculate_trust_score(project_info: str, market_info: Optional[Dict[str, Any]] = None) -> str:
+    """Calculate overall trust score (0-10) based on all available project data.
+    `market_info` (coin_info market data) adds a numeric market-risk component."""
     try:
         # Initialize scoring components
         scores = {
@@ -45,14 +109,14 @@ def calculate_trust_score(project_info: str) -> str:
             scores["technology"] += 1
         scores["technology"] = min(scores["technology"], 10)
         
-        # Security assessment
-        if "audit" in info_lower:
+        # Security assessment ("no audit" first: it contains "audit")
+        if "no audit" in info_lower:
+            scores["security"] = 3
+        elif "audit" in info_lower:
             if "certik" in info_lower or "quantstamp" in info_lower:
                 scores["security"] = 9
             else:
                 scores["security"] = 7
-        elif "no audit" in info_lower:
-            scores["security"] = 3
         else:
             scores["security"] = 5
             
@@ -128,9 +192,22 @@ def calculate_trust_score(project_info: str) -> str:
             "red_flags": 0.05
         }
         
+        market_risk = assess_market_risk([market_info])[0] if market_info else None
+        if market_risk is not None:
+            weights = {key: weight * (1 - MARKET_RISK_WEIGHT) for key, weight in weights.items()}
+            weights["market_risk"] = MARKET_RISK_WEIGHT
+            scores["market_risk"] = market_risk["score"]
+
         final_score = sum(scores[key] * weights[key] for key in scores)
         final_score = round(final_score, 1)
         
+        market_line = ""
+        if market_risk is not None:
+            details = ", ".join(
+                f"{name.replace('_', ' ')} {value:.2f}" for name, value in market_risk["features"].items()
+            )
+            market_line = f"• Market Risk: {scores['market_risk']}/10 (Weight: {weights['market_risk']*100}%) - {details}\n"
+
         # Determine trust level
         if final_score >= 8:
             trust_level = "VERY HIGH"
@@ -153,86 +230,94 @@ def calculate_trust_score(project_info: str) -> str:
             emoji = "🔴"
             recommendation = "High risk project - extreme caution advised"
         
-        response = f"""
-**DECRYPTIFY TRUST SCORE REPORT**
-
-{emoji} **Overall Trust Score: {final_score}/10**
-**Trust Level: {trust_level}**
-
-**Scoring Breakdown:**
-• Team Credibility: {scores['team_credibility']}/10 (Weight: {weights['team_credibility']*100}%)
-• Technology: {scores['technology']}/10 (Weight: {weights['technology']*100}%)
-• Security: {scores['security']}/10 (Weight: {weights['security']*100}%)
-• Community: {scores['community']}/10 (Weight: {weights['community']*100}%)
-• Tokenomics: {scores['tokenomics']}/10 (Weight: {weights['tokenomics']*100}%)
-• Transparency: {scores['transparency']}/10 (Weight: {weights['transparency']*100}%)
-• Track Record: {scores['track_record']}/10 (Weight: {weights['track_record']*100}%)
-• Red Flags: {scores['red_flags']}/10 (Weight: {weights['red_flags']*100}%)
-
-**Key Findings:**
-"""
+        parts = [
+            TRUST_REPORT.format(
+                emoji=emoji,
+                final_score=final_score,
+                trust_level=trust_level,
+                team_credibility=scores['team_credibility'],
+                team_credibility_weight=weights['team_credibility']*100,
+                technology=scores['technology'],
+                technology_weight=weights['technology']*100,
+                security=scores['security'],
+                security_weight=weights['security']*100,
+                community=scores['community'],
+                community_weight=weights['community']*100,
+                tokenomics=scores['tokenomics'],
+                tokenomics_weight=weights['tokenomics']*100,
+                transparency=scores['transparency'],
+                transparency_weight=weights['transparency']*100,
+                track_record=scores['track_record'],
+                track_record_weight=weights['track_record']*100,
+                red_flags=scores['red_flags'],
+                red_flags_weight=weights['red_flags']*100,
+                market_line=market_line,
+            ),
+        ]
         
         # Add positive findings
         if scores['team_credibility'] >= 7:
-            response += "✅ Strong team credibility and transparency\n"
+            parts.append("✅ Strong team credibility and transparency\n")
         if scores['security'] >= 7:
-            response += "✅ Comprehensive security audit completed\n"
+            parts.append("✅ Comprehensive security audit completed\n")
         if scores['technology'] >= 7:
-            response += "✅ Solid technology foundation\n"
+            parts.append("✅ Solid technology foundation\n")
         if scores['community'] >= 7:
-            response += "✅ Active and engaged community\n"
+            parts.append("✅ Active and engaged community\n")
             
         # Add concerns
         if red_flags:
-            response += "\n**⚠️ Red Flags Detected:**\n"
-            for flag in red_flags:
-                response += f"• {flag}\n"
-        
-        response += f"""
-**Recommendation:**
-{recommendation}
-
-**Investment Guidance:**
-"""
+            parts += ["\n**⚠️ Red Flags Detected:**\n", bullets(red_flags)]
         
+        parts.append(TRUST_RECOMMENDATION.format(recommendation=recommendation))
         if final_score >= 7:
-            response += """
-• LOW RISK: Suitable for most investors
-• Conduct standard due diligence
-• Monitor project developments
-• Consider for long-term holdings
-"""
+            parts.append(LOW_RISK_GUIDANCE)
         elif final_score >= 5:
-            response += """
-• MEDIUM RISK: Suitable for experienced investors
-• Perform thorough research
-• Start with small positions
-• Monitor closely for changes
-"""
+            parts.append(MEDIUM_RISK_GUIDANCE)
         else:
-            response += """
-• HIGH RISK: Only for risk-tolerant investors
-• Extensive due diligence required
-• Consider avoiding or minimal exposure
-• High potential for loss
-"""
-        
-        response += """
-**Disclaimer:**
-This trust score is based on available public information and automated analysis. It should not be considered financial advice. Always do your own research and consult with financial professionals before making investment decisions.
-
-**Trust Score Methodology:**
-Our scoring system evaluates multiple factors including team credibility, technology assessment, security audits, community strength, tokenomics, transparency, track record, and potential red flags. Each factor is weighted based on its importance to overall project trustworthiness.
-"""
+            parts.append(HIGH_RISK_GUIDANCE)
+        parts.append(TRUST_DISCLAIMER)
+        response = "".join(parts)
         
         return response
         
     except Exception as e:
         return f"Error calculating trust score: {str(e)}"
 
+# The project named on the first line of the tool input ("Project: Uniswap")
+_PROJECT_FIELD = re.compile(r"\A\s*project\s*:\s*([^\n]+)", re.IGNORECASE)
+
+
+def _names_coin(name: str, market_info: Dict[str, Any]) -> bool:
+    """Whether the coin found for a name is that project (same name, symbol or id)"""
+    def key(text: Any) -> str:
+        return re.sub(r"[\W_]+", "", str(text or "").lower())
+
+    if is_contract_address(name):
+        return True
+    return key(name) in (key(market_info.get("name")), key(market_info.get("symbol")), key(market_info.get("id")))
+
+
+def calculate_trust_score_for_agent(tool_input: str) -> str:
+    """Tool entry point. Input is the project data; when it starts with a
+    "Project: <name>" line, the project's market data is looked up so the score
+    includes the market-risk component. A coin whose name, symbol or id doesn't
+    match is ignored rather than scored as the project."""
+    match = _PROJECT_FIELD.match(tool_input)
+    market_info = None
+    if match:
+        name = match.group(1).strip()
+        try:
+            market_info = fetch_coin_market_data(name)
+        except Exception:
+            market_info = None
+        if market_info is not None and not _names_coin(name, market_info):
+            market_info = None
+    return calculate_trust_score(tool_input, market_info)
+
 # Create the tool
 trust_score_tool = Tool(
     name="trust_calculator",
-    func=calculate_trust_score,
-    description="Calculate comprehensive trust score (0-10) based on all available project data including team, technology, security, and red flags"
+    func=calculate_trust_score_for_agent,
+    description="Calculate comprehensive trust score (0-10) based on all available project data including team, technology, security, red flags and market risk. Input: the project data, starting with a 'Project: <name>' line so market risk is included (e.g. 'Project: Uniswap\nTeam doxxed, audited by ...')"
 )
@@ -1,80 +1,179 @@
 import os
+import asyncio
+import hmac
 import json
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Callable, Optional, List, Dict, Any
 from datetime import datetime
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from langchain_openai import ChatOpenAI
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.tools import Tool
-from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-
-# Load environment variables from project root
+
+# Load environment variables from project root (before the services read their settings)
 load_dotenv(
     dotenv_path=os.path.join(
         os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"
     )
 )
 
-# Initialize Firebase
-try:
-    if not firebase_admin._apps:
-        # Try different paths for credentials
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(current_dir)
-        default_cred_path = os.path.join(current_dir, "firebase-credentials.json")
-        root_cred_path = os.path.join(root_dir, "firebase-credentials.json")
-
-        # Check environment variable, then try root directory, then backend directory
-        cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", None)
-        if cred_path and not os.path.isabs(cred_path):
-            cred_path = os.path.join(root_dir, cred_path)
-
-        if not cred_path or not os.path.exists(cred_path):
-            if os.path.exists(root_cred_path):
-                cred_path = root_cred_path
-            elif os.path.exists(default_cred_path):
-                cred_path = default_cred_path
-
-        if os.path.exists(cred_path):
-            cred = credentials.Certificate(cred_path)
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-        else:
-            print(
-                f"Warning: Firebase credentials not found at {cred_path}. Chat history will not be saved."
-            )
-            db = None
-except Exception as e:
-    print(f"Firebase initialization error: {e}")
-    db = None
+from services.admission import AdmissionRejected, analysis_admission, batch_admission
+from services.cancellation import (
+    CancelToken,
+    CancellationCallbackHandler,
+    RequestCancelled,
+    cancel_scope,
+    check_cancelled,
+    current_cancel_token,
+)
+from services.jobs import JobQueueFull, JobRunner
+from services.llm_usage import (
+    BudgetExceededError,
+    UsageCallbackHandler,
+    budget_available,
+    usage_ledger,
+)
+from services.metrics import REGISTRY, render_metrics, span, start_metrics_publisher
+from services.request_context import request_scope
+from services.scheduler import scheduled
+from services.semantic_cache import SEMANTIC_CACHE_ENABLED, agent_answer_cache
+from services.store import CHAT_MEMORY_TTL, get_store
+from services.streaming import EventStream, StreamingCallbackHandler
 
-# Replace the existing LLM initialization
+if TYPE_CHECKING:
+    from langchain.memory import ConversationBufferMemory
+
+# Heavy dependencies (firebase_admin, langchain_openai, langchain.agents and the
+# agent modules) are imported on first use rather than at import time, so the
+# server is ready to accept requests sooner on cold starts.
+
+# Check the key up front so a misconfigured deployment still fails at startup
 openai_key = os.getenv("OPENAI_API_KEY")
 if not openai_key:
     raise ValueError(
         "OPENAI_API_KEY environment variable is not set. Please set it in your .env file or Docker environment."
     )
 
-llm = ChatOpenAI(
-    model="gpt-4o-mini",  # You can use "gpt-3.5-turbo" for a more affordable option
-    openai_api_key=openai_key,
-    temperature=0.7,
-)
+_init_lock = threading.Lock()
+_db = None
+_db_loaded = False
+_llm = None
+
+
+def _init_firestore():
+    """Initialize Firebase and return a Firestore client, or None without credentials"""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    try:
+        if not firebase_admin._apps:
+            # Try different paths for credentials
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            root_dir = os.path.dirname(current_dir)
+            default_cred_path = os.path.join(current_dir, "firebase-credentials.json")
+            root_cred_path = os.path.join(root_dir, "firebase-credentials.json")
+
+            # Check environment variable, then try root directory, then backend directory
+            cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", None)
+            if cred_path and not os.path.isabs(cred_path):
+                cred_path = os.path.join(root_dir, cred_path)
+
+            if not cred_path or not os.path.exists(cred_path):
+                if os.path.exists(root_cred_path):
+                    cred_path = root_cred_path
+                elif os.path.exists(default_cred_path):
+                    cred_path = default_cred_path
+
+            if os.path.exists(cred_path):
+                cred = credentials.Certificate(cred_path)
+                firebase_admin.initialize_app(cred)
+            else:
+                print(
+                    f"Warning: Firebase credentials not found at {cred_path}. Chat history will not be saved."
+                )
+                return None
+        return firestore.client()
+    except Exception as e:
+        print(f"Firebase initialization error: {e}")
+        return None
+
+
+def get_db():
+    """Firestore client, initialized on first use (None when Firebase is not configured)"""
+    global _db, _db_loaded
+    if not _db_loaded:
+        with _init_lock:
+            if not _db_loaded:
+                with span("startup", "firestore_init"):
+                    _db = _init_firestore()
+                _db_loaded = True
+    return _db
+
+
+def set_db(client) -> None:
+    """Use the given Firestore-compatible client (stand-ins in load tests)"""
+    global _db, _db_loaded
+    _db, _db_loaded = client, True
+
+
+def get_llm():
+    """Chat model shared by the agent and the decryptify tool, created on first use"""
+    global _llm
+    if _llm is None:
+        with _init_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+
+                _llm = ChatOpenAI(
+                    model="gpt-4o-mini",  # You can use "gpt-3.5-turbo" for a more affordable option
+                    openai_api_key=openai_key,
+                    temperature=0.7,
+                )
+    return _llm
+
+
+def set_llm(model) -> None:
+    """Use the given chat model instead of ChatOpenAI (stand-ins in load tests)"""
+    global _llm
+    _llm = model
+
+
+def preload() -> None:
+    """Import the agents, initialize Firestore and the LLM client and load the embedding model"""
+    with span("startup", "preload"):
+        get_tools()
+        get_db()
+        get_llm()
+        if SEMANTIC_CACHE_ENABLED:
+            agent_answer_cache.embedder
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background so the server accepts requests before the heavy imports finish"""
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 and not get_store().shared:
+        print(
+            "Warning: several workers with KV_BACKEND=memory; chats lose their context "
+            "when requests land on another worker. Set KV_BACKEND=redis."
+        )
+    if os.getenv("PRELOAD_ON_STARTUP", "true").lower() == "true":
+        threading.Thread(target=preload, name="preload", daemon=True).start()
+    start_metrics_publisher()
+    yield
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Decryptify API",
     description="AI-powered crypto analysis and trust assessment system",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -88,6 +187,41 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+HTTP_REQUESTS = REGISTRY.counter(
+    "decryptify_http_requests_total",
+    "HTTP requests by method, route and status code",
+    ("method", "path", "status"),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "decryptify_http_request_duration_seconds",
+    "HTTP request latency by method and route",
+    ("method", "path"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "decryptify_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count, time and track in-flight HTTP requests per route"""
+    started = time.perf_counter()
+    status = "500"
+    with HTTP_IN_FLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            # Use the route template so ids in the URL don't explode label cardinality
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.inc(method=request.method, path=path, status=status)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=request.method, path=path
+            )
+
 
 # Data Models
 class ChatMessage(BaseModel):
@@ -109,7 +243,6 @@ class ChatResponse(BaseModel):
 
 class CreateChatRequest(BaseModel):
     initial_message: str
-    user_id: Optional[str] = None
 
 
 class CreateChatResponse(BaseModel):
@@ -117,31 +250,54 @@ class CreateChatResponse(BaseModel):
     status: str = "success"
 
 
-# Import agent tools - use relative imports
-from agents.coin_info import coin_info_tool
-from agents.crypto_scam import crypto_scam_tool
-from agents.certik import certik_tool
-from agents.chainbroker import chainbroker_tool
-from agents.founder_info import founder_info_tool
-from agents.project_info import project_info_tool
-from agents.trust_score import trust_score_tool
-from agents.decryptify import decryptify_tool
-
-# Create the agent tools list
-tools = [
-    decryptify_tool,  # Main orchestrator as primary tool
-    coin_info_tool,
-    crypto_scam_tool,
-    certik_tool,
-    chainbroker_tool,
-    founder_info_tool,
-    project_info_tool,
-    trust_score_tool,
-]
+class JobRequest(BaseModel):
+    message: str
+    chat_id: Optional[str] = None  # None starts a new chat
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    result: Optional[Dict[str, Any]] = None  # Set when a cached answer was served at once
+
+
+class BatchAnalysisRequest(BaseModel):
+    projects: List[str]
+    use_llm: bool = True
+
+
+_tools: Optional[list] = None
+_agent_prompt = None
+
+
+def get_tools() -> list:
+    """Agent tools, imported on first use"""
+    global _tools
+    if _tools is None:
+        from agents.coin_info import coin_info_tool
+        from agents.crypto_scam import crypto_scam_tool
+        from agents.certik import certik_tool
+        from agents.chainbroker import chainbroker_tool
+        from agents.founder_info import founder_info_tool
+        from agents.project_info import project_info_tool
+        from agents.trust_score import trust_score_tool
+        from agents.decryptify import decryptify_tool
+
+        _tools = [
+            decryptify_tool,  # Main orchestrator as primary tool
+            coin_info_tool,
+            crypto_scam_tool,
+            certik_tool,
+            chainbroker_tool,
+            founder_info_tool,
+            project_info_tool,
+            trust_score_tool,
+        ]
+    return _tools
+
 
 # Agent prompt template
-agent_prompt = PromptTemplate.from_template(
-    """You are Decryptify, an AI-powered crypto trust assessment system. You help users evaluate the trustworthiness of cryptocurrency projects by analyzing various aspects.
+AGENT_PROMPT = """You are Decryptify, an AI-powered crypto trust assessment system. You help users evaluate the trustworthiness of cryptocurrency projects by analyzing various aspects.
 
 Available tools:
 {tools}
@@ -150,6 +306,16 @@ When a user asks about a cryptocurrency project, use the decryptify_orchestrator
 
 For general crypto questions, use your knowledge to provide helpful information.
 
+Use the following format:
+
+Thought: think about what to do next
+Action: the tool to use, one of [{tool_names}]
+Action Input: the input to the tool
+Observation: the result of the tool
+... (Thought/Action/Action Input/Observation can repeat)
+Thought: I now know the final answer
+Final Answer: the answer to the user
+
 Current conversation:
 {chat_history}
 
@@ -157,7 +323,16 @@ User: {input}
 
 {agent_scratchpad}
 """
-)
+
+
+def get_agent_prompt():
+    """ReAct prompt template, built on first use"""
+    global _agent_prompt
+    if _agent_prompt is None:
+        from langchain.prompts import PromptTemplate
+
+        _agent_prompt = PromptTemplate.from_template(AGENT_PROMPT)
+    return _agent_prompt
 
 
 # Firestore helper functions
@@ -165,7 +340,10 @@ def create_chat_session(user_id: Optional[str], initial_message: str) -> str:
     """Create a new chat session in Firestore"""
     chat_id = str(uuid4())
 
+    db = get_db()
     if db:
+        from firebase_admin import firestore
+
         chat_data = {
             "chat_id": chat_id,
             "user_id": user_id,
@@ -179,30 +357,37 @@ def create_chat_session(user_id: Optional[str], initial_message: str) -> str:
                 }
             ],
         }
-        db.collection("chats").document(chat_id).set(chat_data)
+        with span("firestore", "create_chat"):
+            db.collection("chats").document(chat_id).set(chat_data)
 
     return chat_id
 
 
 def add_message_to_chat(chat_id: str, message: ChatMessage) -> None:
     """Add a message to an existing chat session"""
+    db = get_db()
     if db:
+        from firebase_admin import firestore
+
         chat_ref = db.collection("chats").document(chat_id)
-        chat_ref.update(
-            {
-                "messages": firestore.ArrayUnion([message.model_dump()]),
-                "updated_at": firestore.SERVER_TIMESTAMP,
-            }
-        )
+        with span("firestore", "add_message"):
+            chat_ref.update(
+                {
+                    "messages": firestore.ArrayUnion([message.model_dump()]),
+                    "updated_at": firestore.SERVER_TIMESTAMP,
+                }
+            )
 
 
 def get_chat_history(chat_id: str) -> List[Dict[str, Any]]:
     """Retrieve chat history from Firestore"""
+    db = get_db()
     if not db:
         return []
 
     chat_ref = db.collection("chats").document(chat_id)
-    chat_doc = chat_ref.get()
+    with span("firestore", "get_history"):
+        chat_doc = chat_ref.get()
 
     if not chat_doc.exists:
         raise HTTPException(status_code=404, detail="Chat not found")
@@ -211,17 +396,89 @@ def get_chat_history(chat_id: str) -> List[Dict[str, Any]]:
     return chat_data.get("messages", [])
 
 
-# Create agent memory store
-memory_store = {}
+# Conversation memory and chat owners live in the KV store (services.store) so
+# that every worker can serve every chat
+
+
+def set_chat_owner(chat_id: str, user_id: Optional[str]) -> None:
+    """Remember who created a chat, so usage of follow-up messages is attributed to them"""
+    get_store().set(f"chat:{chat_id}:owner", user_id, ttl=CHAT_MEMORY_TTL)
+
+
+def get_chat_owner(chat_id: str) -> Optional[str]:
+    return get_store().get(f"chat:{chat_id}:owner")
+
+
+# Identity: budgets and usage are keyed on who is calling, never on a body field
 
+# Header a trusted reverse proxy sets to the signed-in user's id (e.g. X-Forwarded-User);
+# only set it when the proxy strips the header from client requests
+AUTH_USER_HEADER = os.getenv("AUTH_USER_HEADER", "")
+# Sent as X-Admin-Token, lets /api/usage report any user or chat
+USAGE_ADMIN_TOKEN = os.getenv("USAGE_ADMIN_TOKEN", "")
+# Addresses of reverse proxies (the frontend's Next.js server, a load balancer) whose
+# X-Forwarded-For is trusted. Without them, anonymous callers behind one proxy or
+# NAT share one budget, keyed on its address.
+TRUSTED_PROXIES = {p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()}
 
-def get_or_create_memory(chat_id: str) -> ConversationBufferMemory:
+
+def verify_id_token(token: str) -> Optional[str]:
+    """The uid of a Firebase ID token, or None if it is invalid or Firebase is not configured"""
+    if get_db() is None:
+        return None
+    from firebase_admin import auth
+
+    try:
+        return auth.verify_id_token(token)["uid"]
+    except Exception:
+        return None
+
+
+def client_address(http_request: Request) -> str:
+    """The caller's address: the peer, or behind TRUSTED_PROXIES the last
+    X-Forwarded-For hop they didn't add (earlier hops can be forged by the client)"""
+    host = http_request.client.host if http_request.client else "unknown"
+    if host not in TRUSTED_PROXIES:
+        return host
+    hops = [hop.strip() for hop in http_request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in TRUSTED_PROXIES:
+            return hop
+    return host
+
+
+async def request_user(http_request: Request) -> str:
+    """The caller's user id: the proxy's AUTH_USER_HEADER, else the uid of the Firebase ID
+    token in Authorization, else anon:<client address> (see TRUSTED_PROXIES)"""
+    if AUTH_USER_HEADER:
+        user_id = http_request.headers.get(AUTH_USER_HEADER)
+        if user_id:
+            return user_id
+    authorization = http_request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        # Verifying may fetch Google's signing keys
+        user_id = await run_in_threadpool(verify_id_token, authorization[7:].strip())
+        if user_id:
+            return user_id
+    return f"anon:{client_address(http_request)}"
+
+
+BUDGET_EXHAUSTED_REPLY = (
+    "I've reached my AI usage limit for now, so I can't answer open-ended questions. "
+    "You can still ask for a project analysis such as \"Analyze Bitcoin\" and I'll "
+    "return a data-based assessment."
+)
+
+
+def get_or_create_memory(chat_id: str) -> "ConversationBufferMemory":
     """Get or create a conversation memory for a chat session"""
-    if chat_id not in memory_store:
-        # Using the updated API to address deprecation warning
-        memory = ConversationBufferMemory(return_messages=True)
-        memory_store[chat_id] = memory
-    return memory_store[chat_id]
+    from langchain.memory import ConversationBufferMemory
+
+    from services.chat_history import StoreChatMessageHistory
+
+    return ConversationBufferMemory(
+        memory_key="chat_history", chat_memory=StoreChatMessageHistory(chat_id)
+    )
 
 
 # API Endpoints
@@ -234,6 +491,32 @@ async def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint (every worker's metrics when they share a store)"""
+    return PlainTextResponse(
+        await run_in_threadpool(render_metrics), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/api/usage")
+async def get_usage(
+    http_request: Request, user_id: Optional[str] = None, chat_id: Optional[str] = None
+):
+    """LLM token and cost usage, globally and for the caller and one of their chats.
+    Other users and chats need the X-Admin-Token header."""
+    caller = await request_user(http_request)
+    admin = bool(USAGE_ADMIN_TOKEN) and hmac.compare_digest(
+        http_request.headers.get("x-admin-token", ""), USAGE_ADMIN_TOKEN
+    )
+    if not admin:
+        if user_id and user_id != caller:
+            raise HTTPException(status_code=403, detail="Usage of other users needs an admin token")
+        if chat_id and await run_in_threadpool(get_chat_owner, chat_id) != caller:
+            raise HTTPException(status_code=403, detail="Usage of other chats needs an admin token")
+    return {"usage": usage_ledger.snapshot(user_id or caller, chat_id), "status": "success"}
+
+
 @app.get("/api/agents")
 async def list_agents():
     """List all available agents and their capabilities"""
@@ -286,41 +569,54 @@ async def get_model_info():
 
 
 @app.post("/api/chats/create", response_model=CreateChatResponse)
-async def create_chat(request: CreateChatRequest):
+async def create_chat(request: CreateChatRequest, http_request: Request):
     """Create a new chat session"""
     try:
-        chat_id = create_chat_session(
-            user_id=request.user_id, initial_message=request.initial_message
+        user_id = await request_user(http_request)
+        chat_id = await run_in_threadpool(
+            create_chat_session, user_id, request.initial_message
         )
 
         # Process the initial message
-        response_content = await process_message(chat_id, request.initial_message)
+        await run_in_threadpool(set_chat_owner, chat_id, user_id)
+        with request_scope(chat_id, user_id):
+            response_content = await process_message(
+                chat_id, request.initial_message, http_request
+            )
 
         # Add assistant response to chat
         assistant_message = ChatMessage(role="assistant", content=response_content)
-        add_message_to_chat(chat_id, assistant_message)
+        await run_in_threadpool(add_message_to_chat, chat_id, assistant_message)
 
         return CreateChatResponse(chat_id=chat_id, status="success")
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/chats/message", response_model=ChatResponse)
-async def send_message(request: ChatRequest):
+async def send_message(request: ChatRequest, http_request: Request):
     """Send a message to an existing chat"""
     try:
         # Add user message to chat
         user_message = ChatMessage(role="user", content=request.message)
-        add_message_to_chat(request.chat_id, user_message)
-
-        # Process message
-        response_content = await process_message(request.chat_id, request.message)
+        await run_in_threadpool(add_message_to_chat, request.chat_id, user_message)
+
+        # Process message; usage is attributed to whoever started the chat
+        user_id = await run_in_threadpool(get_chat_owner, request.chat_id)
+        if user_id is None:
+            user_id = await request_user(http_request)
+        with request_scope(request.chat_id, user_id):
+            response_content = await process_message(
+                request.chat_id, request.message, http_request
+            )
 
         # Add assistant response to chat
         assistant_message = ChatMessage(role="assistant", content=response_content)
-        add_message_to_chat(request.chat_id, assistant_message)
+        await run_in_threadpool(add_message_to_chat, request.chat_id, assistant_message)
 
         return ChatResponse(
             chat_id=request.chat_id, message=assistant_message, status="success"
@@ -333,11 +629,239 @@ async def send_message(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: BatchAnalysisRequest, http_request: Request):
+    """Screen a watch-list; streams one NDJSON line per project as it completes, then a summary"""
+    from agents.batch import BATCH_MAX_PROJECTS, screen_projects
+
+    if not request.projects:
+        raise HTTPException(status_code=400, detail="No projects given")
+    if len(request.projects) > BATCH_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_MAX_PROJECTS} projects per batch",
+        )
+
+    llm = get_llm() if request.use_llm else None
+    user_id = await request_user(http_request)
+    # A batch takes a batch slot, then one analysis slot for its whole run, so
+    # watch-lists are shed with 429/503 like chats instead of filling the pools
+    try:
+        await batch_admission.acquire()
+        try:
+            await analysis_admission.acquire()
+        except AdmissionRejected:
+            batch_admission.release()
+            raise
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    def events():
+        for event in screen_projects(request.projects, llm, user_id):
+            yield json.dumps(event) + "\n"
+
+    async def lines():
+        started = time.monotonic()
+        try:
+            async for line in iterate_in_threadpool(events()):
+                yield line
+        finally:
+            # A batch's run time says nothing about chat service times
+            analysis_admission.release()
+            batch_admission.release(time.monotonic() - started)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+_stream_workers: set = set()
+
+
+@app.post("/api/chats/message/stream")
+async def stream_message(request: ChatRequest, http_request: Request):
+    """
+    Send a message to an existing chat and stream the answer as NDJSON events:
+    tool_start / tool_end while the agent works, token for each piece of the
+    final answer, then final with the stored reply (or error). Closing the
+    connection cancels the run, including its pending CoinGecko and LLM calls.
+    """
+    try:
+        await analysis_admission.acquire()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    caller = await request_user(http_request)
+    events = EventStream()
+    token = CancelToken()
+
+    def run() -> None:
+        try:
+            with cancel_scope(token):
+                user_message = ChatMessage(role="user", content=request.message)
+                add_message_to_chat(request.chat_id, user_message)
+                user_id = get_chat_owner(request.chat_id) or caller
+                with request_scope(request.chat_id, user_id):
+                    response_content = answer_message(request.chat_id, request.message, events)
+                token.check()
+                assistant_message = ChatMessage(role="assistant", content=response_content)
+                add_message_to_chat(request.chat_id, assistant_message)
+                events.put(
+                    {
+                        "type": "final",
+                        "chat_id": request.chat_id,
+                        "message": assistant_message.model_dump(mode="json"),
+                    }
+                )
+        except RequestCancelled:
+            pass
+        except Exception as e:
+            print(f"Error streaming message: {str(e)}")
+            events.put({"type": "error", "detail": str(e)})
+        finally:
+            events.close()
+
+    async def work() -> None:
+        # The slot is held until the run has stopped, even after a disconnect
+        async with analysis_admission.slot(acquired=True):
+            await run_in_threadpool(run)
+
+    # Keep a reference until it finishes; the event loop only holds tasks weakly
+    worker = asyncio.ensure_future(work())
+    _stream_workers.add(worker)
+    worker.add_done_callback(_stream_workers.discard)
+
+    async def lines():
+        finished = False
+        try:
+            async for event in events:
+                yield json.dumps(event) + "\n"
+            finished = True
+        finally:
+            if not finished:
+                # The client went away before the run ended
+                token.cancel("client_disconnected")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# Chat messages answered off the request path (see /api/jobs)
+chat_jobs = JobRunner("chat_message")
+
+
+def run_chat_job(
+    chat_id: Optional[str],
+    user_id: str,
+    message: str,
+    answer: Optional[Callable[[str, str], str]] = None,
+) -> Dict[str, Any]:
+    """Record the message (starting a chat if needed), answer it with `answer(chat_id,
+    message)` (answer_message by default) and record the reply. `user_id` is the
+    caller; follow-ups are attributed to the chat's owner."""
+    answer = answer or answer_message
+    if chat_id is None:
+        chat_id = create_chat_session(user_id, message)
+        set_chat_owner(chat_id, user_id)
+    else:
+        add_message_to_chat(chat_id, ChatMessage(role="user", content=message))
+        user_id = get_chat_owner(chat_id) or user_id
+
+    with request_scope(chat_id, user_id):
+        response_content = answer(chat_id, message)
+    # A cancelled job leaves no reply in the chat
+    check_cancelled()
+
+    assistant_message = ChatMessage(role="assistant", content=response_content)
+    add_message_to_chat(chat_id, assistant_message)
+    return {"chat_id": chat_id, "message": assistant_message.model_dump(mode="json")}
+
+
+@app.post("/api/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: JobRequest, http_request: Request, response: Response):
+    """
+    Queue a chat message and return at once; poll /api/jobs/{job_id} for the reply.
+    A cached answer (a fresh report or a semantic-cache hit, or a stale report while
+    saturated) is returned right away with status 200. Queued jobs hold an analysis
+    admission slot until they finish, so a saturated worker sheds them with 429/503
+    and Retry-After like the synchronous endpoints.
+    """
+    user_id = await request_user(http_request)
+    acquired = analysis_admission.try_acquire()
+    cached = await run_in_threadpool(lookup_cached_answer, request.message, not acquired)
+    if cached is not None:
+        if acquired:
+            analysis_admission.release()
+        job = await run_in_threadpool(
+            lambda: chat_jobs.completed(
+                run_chat_job(
+                    request.chat_id, user_id, request.message, lambda c, m: remember_answer(c, m, cached)
+                )
+            )
+        )
+        response.status_code = 200
+        return JobResponse(job_id=job["job_id"], status=job["status"], result=job["result"])
+
+    try:
+        if not acquired:
+            await analysis_admission.acquire()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    # The slot is released on the event loop once the job is over
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+
+    def release() -> None:
+        loop.call_soon_threadsafe(analysis_admission.release, time.monotonic() - started)
+
+    try:
+        job = await run_in_threadpool(
+            chat_jobs.submit,
+            lambda: run_chat_job(request.chat_id, user_id, request.message),
+            release,
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return JobResponse(job_id=job["job_id"], status=job["status"])
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, with the chat id and reply once it has succeeded"""
+    job = await run_in_threadpool(chat_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (a finished one is left as is)"""
+    job = await run_in_threadpool(chat_jobs.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
 @app.get("/api/chats/{chat_id}/history")
 async def get_chat(chat_id: str):
     """Get chat history"""
     try:
-        messages = get_chat_history(chat_id)
+        messages = await run_in_threadpool(get_chat_history, chat_id)
         return {"chat_id": chat_id, "messages": messages, "status": "success"}
     except HTTPException:
         raise
@@ -346,67 +870,215 @@ async def get_chat(chat_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def process_message(chat_id: str, message: str) -> str:
-    """Process a message using the Decryptify agent"""
+def route_message(message: str) -> Optional[str]:
+    """Return the project name (or contract address) for simple crypto queries, or None
+    to use the agent"""
+    from agents.contract_index import contract_index, find_contract_address, mentions_address
+
+    # A message that is just a token contract address of a known coin is analyzed
+    # directly (with its original case); any other message with an address (a
+    # Bitcoin one included) goes to the agent, which can tell what is asked about it
+    address = find_contract_address(message)
+    if address is not None and message.strip().strip("?.,!\"'`").strip() == address:
+        if contract_index.resolve(address):
+            return address
+        return None
+    if mentions_address(message):
+        return None
+
+    # Check if message is asking for crypto analysis
+    crypto_keywords = [
+        "bitcoin",
+        "btc",
+        "ethereum",
+        "eth",
+        "crypto",
+        "coin",
+        "token",
+        "trust",
+        "score",
+        "analysis",
+        "check",
+        "evaluate",
+        "assess",
+    ]
+    message_lower = message.lower()
+
+    # If it's clearly asking about a specific crypto, extract the project name
+    is_crypto_query = any(keyword in message_lower for keyword in crypto_keywords)
+    if not is_crypto_query:
+        return None
+
+    # Extract project name from queries like "What's the trust score for Bitcoin?"
+    # or "Analyze Ethereum" or just "Bitcoin"
+    project_name = message
+    for phrase in [
+        "what's the trust score for",
+        "what is the trust score of",
+        "analyze",
+        "check",
+        "evaluate",
+        "assess",
+        "tell me about",
+    ]:
+        if phrase in message_lower:
+            project_name = message_lower.split(phrase)[-1].strip()
+            break
+
+    # Clean up the project name
+    project_name = project_name.strip("?.,!").strip()
+
+    # Simple queries like "Bitcoin" or "Ethereum Classic" use the decryptify tool directly
+    if len(project_name.split()) <= 3:
+        return project_name
+    return None
+
+
+async def wait_for_disconnect(http_request: Request) -> None:
+    """Return once the client has closed the connection (the body is already read)"""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_until_disconnected(http_request: Optional[Request], fn, *args) -> Any:
+    """
+    Run `fn` in a worker thread under a cancel token that is cancelled if the
+    client disconnects first. The worker then stops at its next checkpoint
+    (in-flight CoinGecko and LLM calls are left to finish in the background and
+    fill the caches) and the request ends with 499.
+    """
+    token = CancelToken()
+
+    def run() -> Any:
+        with cancel_scope(token):
+            return fn(*args)
+
+    worker = asyncio.ensure_future(run_in_threadpool(run))
+    if http_request is not None:
+        watcher = asyncio.ensure_future(wait_for_disconnect(http_request))
+        await asyncio.wait({worker, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not worker.done():
+            token.cancel("client_disconnected")
+        watcher.cancel()
+    await asyncio.wait({worker})
+    try:
+        result = worker.result()
+    except RequestCancelled:
+        result = None
+    if token.cancelled:
+        # Nobody is waiting for the answer, so it isn't written to the chat either
+        raise HTTPException(status_code=499, detail="Client closed the request")
+    return result
+
+
+async def process_message(
+    chat_id: str, message: str, http_request: Optional[Request] = None
+) -> str:
+    """Process a message using the Decryptify agent, in a worker thread; a client
+    disconnect cancels the work"""
+    acquired = analysis_admission.try_acquire()
+    if not acquired:
+        # Saturated: serve a cached (even stale) answer rather than queueing for a slot
+        cached = await run_in_threadpool(cached_answer, chat_id, message)
+        if cached is not None:
+            return cached
+
+    try:
+        async with analysis_admission.slot(acquired=acquired):
+            # The agents block on HTTP and LLM calls; keep them off the event loop so
+            # concurrent requests overlap (and identical analyses can be coalesced)
+            return await run_until_disconnected(http_request, answer_message, chat_id, message)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def lookup_cached_answer(message: str, allow_stale: bool = True) -> Optional[str]:
+    """A cached reply for the message (a report, stale ones with `allow_stale`, or a
+    semantic-cache hit), or None"""
+    project_name = route_message(message)
+    if project_name is not None:
+        from agents.decryptify import cached_report
+
+        return cached_report(project_name, allow_stale=allow_stale)
+    if SEMANTIC_CACHE_ENABLED:
+        return agent_answer_cache.lookup(message)
+    return None
+
+
+def remember_answer(chat_id: str, message: str, response: str) -> str:
+    """Record a message and its reply in the chat memory"""
+    memory = get_or_create_memory(chat_id)
+    memory.chat_memory.add_user_message(message)
+    memory.chat_memory.add_ai_message(response)
+    return response
+
+
+def cached_answer(chat_id: str, message: str) -> Optional[str]:
+    """A cached reply for the message (stale reports included), recorded in the chat memory"""
+    response = lookup_cached_answer(message)
+    if response is not None:
+        remember_answer(chat_id, message, response)
+    return response
+
+
+def answer_message(chat_id: str, message: str, events: Optional[EventStream] = None) -> str:
+    """Answer a chat message through the decryptify fast path or the ReAct agent.
+    With `events`, tool calls and final-answer tokens are streamed as they happen."""
     try:
         # Get or create memory for this chat
         memory = get_or_create_memory(chat_id)
 
-        # Check if message is asking for crypto analysis
-        crypto_keywords = [
-            "bitcoin",
-            "btc",
-            "ethereum",
-            "eth",
-            "crypto",
-            "coin",
-            "token",
-            "trust",
-            "score",
-            "analysis",
-            "check",
-            "evaluate",
-            "assess",
-        ]
-        message_lower = message.lower()
-
-        # If it's clearly asking about a specific crypto, extract the project name
-        is_crypto_query = any(keyword in message_lower for keyword in crypto_keywords)
-
-        if is_crypto_query:
-            # Extract project name from queries like "What's the trust score for Bitcoin?"
-            # or "Analyze Ethereum" or just "Bitcoin"
-            project_name = message
-            for phrase in [
-                "what's the trust score for",
-                "what is the trust score of",
-                "analyze",
-                "check",
-                "evaluate",
-                "assess",
-                "tell me about",
-            ]:
-                if phrase in message_lower:
-                    project_name = message_lower.split(phrase)[-1].strip()
-                    break
-
-            # Clean up the project name
-            project_name = project_name.strip("?.,!").strip()
-
-            # If it's a simple project name query, use the decryptify tool directly
-            if (
-                len(project_name.split()) <= 3
-            ):  # Simple queries like "Bitcoin" or "Ethereum Classic"
-                # Pass the LLM to the decryptify tool so it can calculate the trust score & find related projects
-                from agents.decryptify import decryptify_analysis
-
-                response = decryptify_analysis(project_name, llm=llm)
+        # Decide between the decryptify fast path and the ReAct agent
+        with span("route", "keywords"):
+            project_name = route_message(message)
+
+        if project_name is not None:
+            # Pass the LLM to the decryptify tool so it can calculate the trust score & find related projects
+            from agents.decryptify import decryptify_analysis, decryptify_tool
+
+            if events is not None:
+                events.put({"type": "tool_start", "tool": decryptify_tool.name, "input": project_name})
+            response = decryptify_analysis(project_name, llm=get_llm())
+            if events is not None:
+                events.put({"type": "tool_end", "tool": decryptify_tool.name, "output": response})
+            memory.chat_memory.add_user_message(message)
+            memory.chat_memory.add_ai_message(response)
+            return response
+
+        # Near-duplicates of recent free-form questions reuse the earlier answer
+        if SEMANTIC_CACHE_ENABLED:
+            with span("cache", "semantic_lookup"):
+                cached = agent_answer_cache.lookup(message)
+            if cached is not None:
                 memory.chat_memory.add_user_message(message)
-                memory.chat_memory.add_ai_message(response)
-                return response
-
-        # For all other queries, use the agent
-        agent = create_react_agent(llm=llm, tools=tools, prompt=agent_prompt)
+                memory.chat_memory.add_ai_message(cached)
+                return cached
+
+        # For all other queries, use the agent (which needs LLM budget)
+        if not budget_available():
+            memory.chat_memory.add_user_message(message)
+            memory.chat_memory.add_ai_message(BUDGET_EXHAUSTED_REPLY)
+            return BUDGET_EXHAUSTED_REPLY
+
+        from langchain.agents import AgentExecutor, create_react_agent
+
+        had_history = bool(memory.chat_memory.messages)
+        tools = get_tools()
+        callbacks = [UsageCallbackHandler("react_agent")]
+        llm = get_llm()
+        if current_cancel_token() is not None:
+            # Streamed tokens let a cancelled run stop mid-answer (and feed `events`)
+            callbacks.append(CancellationCallbackHandler())
+            llm = llm.bind(stream=True)
+        if events is not None:
+            callbacks.append(StreamingCallbackHandler(events))
+        agent = create_react_agent(llm=llm, tools=tools, prompt=get_agent_prompt())
 
         # Create agent executor
         agent_executor = AgentExecutor(
@@ -422,10 +1094,21 @@ async def process_message(chat_id: str, message: str) -> str:
         )
 
         # Run the agent
-        response = agent_executor.run(input=message)
+        with scheduled("agent"), span("agent", "react_executor"):
+            result = agent_executor.invoke(
+                {"input": message},
+                config={"callbacks": callbacks},
+            )
+            response = result["output"]
 
+        # Don't replay runs that hit the iteration/time limit, nor answers that may
+        # draw on this chat's history (the cache is shared by every chat)
+        if SEMANTIC_CACHE_ENABLED and not had_history and not response.startswith("Agent stopped"):
+            agent_answer_cache.store(message, response)
         return response
 
+    except BudgetExceededError:
+        return BUDGET_EXHAUSTED_REPLY
     except Exception as e:
         print(f"Error in agent processing: {str(e)}")
         return f"I encountered an error processing your request: {str(e)}. Please try again."
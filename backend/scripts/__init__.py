@@ -0,0 +1,3 @@
+"""
+Developer tooling for the Decryptify backend (load testing, profiling, data builds)
+"""
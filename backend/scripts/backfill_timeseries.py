@@ -0,0 +1,99 @@
+"""
+Backfill the local market time series (services/timeseries.py) from CoinGecko.
+
+Fetches /coins/{id}/market_chart for each coin and merges the prices, market
+caps and volumes into the coin's columns; samples already on disk win on equal
+timestamps. Coins are given as CoinGecko ids, or --top N takes the N largest by
+market cap.
+
+    python -m scripts.backfill_timeseries bitcoin ethereum --days 90
+    python -m scripts.backfill_timeseries --top 100 --days 30
+    python -m scripts.backfill_timeseries --stub --top 20     # generated data, no API calls
+"""
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+def fetch_chart(coin_id: str, days: int):
+    """market_chart as columns (ts in seconds), or None when CoinGecko has no data"""
+    from agents.coingecko import coingecko_get
+
+    chart = coingecko_get(
+        f"/coins/{coin_id}/market_chart", {"vs_currency": "usd", "days": days}
+    )
+    if not isinstance(chart, dict) or not chart.get("prices"):
+        return None
+    prices = np.asarray(chart["prices"], dtype=np.float64)
+    # The three series share timestamps; align caps and volumes to the price samples
+    columns = {"ts": prices[:, 0] / 1000.0, "price": prices[:, 1]}
+    for column, field in (("market_cap", "market_caps"), ("volume", "total_volumes")):
+        values = np.asarray(chart.get(field) or [], dtype=np.float64).reshape(-1, 2)
+        lookup = dict(zip(values[:, 0].tolist(), values[:, 1].tolist()))
+        columns[column] = np.array([lookup.get(ms, np.nan) for ms in prices[:, 0].tolist()])
+    return columns
+
+
+def top_coins(count: int) -> List[str]:
+    from agents.coingecko import coingecko_get
+
+    ids: List[str] = []
+    page = 1
+    while len(ids) < count:
+        per_page = min(250, count - len(ids))
+        rows = coingecko_get(
+            "/coins/markets",
+            {"vs_currency": "usd", "order": "market_cap_desc", "per_page": per_page, "page": page},
+        )
+        if not isinstance(rows, list) or not rows:
+            break
+        ids.extend(row["id"] for row in rows)
+        page += 1
+    return ids[:count]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("coins", nargs="*", help="CoinGecko coin ids")
+    parser.add_argument("--top", type=int, default=0, help="Also backfill the N largest coins")
+    parser.add_argument("--days", type=int, default=90, help="History to fetch (default 90)")
+    parser.add_argument("--stub", action="store_true", help="Use the CoinGecko stub (no API calls)")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from scripts.stubs import install_coingecko_stub
+
+        install_coingecko_stub()
+    from services.timeseries import timeseries_store
+
+    coins = list(dict.fromkeys(args.coins + (top_coins(args.top) if args.top else [])))
+    if not coins:
+        parser.error("give coin ids or --top N")
+
+    started = time.perf_counter()
+    failed = 0
+    for coin_id in coins:
+        try:
+            columns = fetch_chart(coin_id, args.days)
+            if columns is None:
+                print(f"{coin_id}: no market chart data")
+                failed += 1
+                continue
+            rows = timeseries_store.write_history(coin_id, columns)
+            print(f"{coin_id}: {len(columns['ts'])} samples fetched, {rows} stored")
+        except Exception as e:
+            print(f"{coin_id}: failed ({e})")
+            failed += 1
+
+    print(
+        f"Backfilled {len(coins) - failed}/{len(coins)} coins into {timeseries_store.root} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return 1 if failed == len(coins) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Time the agents' markdown report renderers (their templates and agents/rendering.py).
+
+Each case renders one report from the agents' local databases; CoinGecko is
+stubbed, so only formatting is measured. Prints the best per-call time over
+--repeat runs of --number calls.
+
+    python -m scripts.bench_render
+    python -m scripts.bench_render --number 50000 --repeat 7
+"""
+import argparse
+import sys
+import timeit
+from typing import Callable, List, Optional, Tuple
+
+
+def cases() -> List[Tuple[str, Callable[[], str]]]:
+    from agents.certik import get_certik_audit
+    from agents.chainbroker import analyze_exchange
+    from agents.coin_info import fetch_coin_market_data
+    from agents.crypto_scam import analyze_scam_risk
+    from agents.founder_info import research_founder
+    from agents.project_info import gather_project_info
+    from agents.trust_score import calculate_trust_score
+
+    market = fetch_coin_market_data("bitcoin")
+    project_text = "verified github mainnet audit certik active community tokenomics fair scam"
+    return [
+        ("founder (known)", lambda: research_founder("vitalik buterin")),
+        ("founder (unknown)", lambda: research_founder("satoshi", "bitcoin")),
+        ("project (known)", lambda: gather_project_info("ethereum")),
+        ("project (unknown)", lambda: gather_project_info("pepe")),
+        ("exchange (known)", lambda: analyze_exchange("binance")),
+        ("exchange (unknown)", lambda: analyze_exchange("foo exchange")),
+        ("audit (known)", lambda: get_certik_audit("uniswap")),
+        ("audit (unknown)", lambda: get_certik_audit("pepe")),
+        ("scam assessment", lambda: analyze_scam_risk("safemoon guaranteed returns")),
+        ("trust score", lambda: calculate_trust_score(project_text)),
+        ("trust score + market", lambda: calculate_trust_score(project_text, market)),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per run (default 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case, best one reported (default 5)")
+    args = parser.parse_args(argv)
+
+    from scripts.stubs import install_coingecko_stub
+
+    install_coingecko_stub()
+
+    print(f"{'report':<22} {'us/call':>8} {'chars':>6}")
+    for name, render in cases():
+        best = min(timeit.repeat(render, number=args.number, repeat=args.repeat)) / args.number
+        print(f"{name:<22} {best * 1e6:>8.2f} {len(render()):>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
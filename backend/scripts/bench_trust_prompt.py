@@ -0,0 +1,131 @@
+"""
+Compare the size (and optionally latency) of the trust-score prompt before and
+after prompt compaction.
+
+The legacy prompt pasted every section report into the LLM call; the compact
+prompt sends only the facts from agents/trust_facts.py. By default CoinGecko
+is stubbed and only token counts are reported. With --live the real CoinGecko
+API and OpenAI model (OPENAI_API_KEY) are used and each prompt is timed.
+
+    python -m scripts.bench_trust_prompt
+    python -m scripts.bench_trust_prompt --live --repeat 5 bitcoin uniswap
+"""
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional
+
+DEFAULT_PROJECTS = ["bitcoin", "ethereum", "uniswap", "chainlink", "pepe", "safemoon"]
+
+LEGACY_PROMPT = """
+                Based on the following analysis of the cryptocurrency project {project_name},
+                calculate a trust score from 0-10 and provide a brief explanation.
+                Higher scores indicate higher trustworthiness. Consider security, tokenomics,
+                team credibility, code audits, and other risk factors.
+
+                {combined_analysis}
+
+                Return only a trust score section in this format:
+                Overall Trust Score: [SCORE]/10
+                Trust Level: [HIGH/MEDIUM/LOW]
+                Reason: [1-2 sentence explanation]                """
+
+
+def _token_counter() -> Callable[[str], int]:
+    """tiktoken's gpt-4o encoding when available, else the ~4 chars/token estimate"""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        from services.llm_usage import estimate_tokens
+
+        print("tiktoken encoding unavailable - using the 4 chars/token estimate")
+        return estimate_tokens
+
+
+def build_prompts(project_name: str):
+    """Return (legacy prompt, compact prompt) for a project"""
+    from agents.certik import format_audit_report, lookup_audit
+    from agents.coin_info import fetch_coin_market_data, format_coin_info
+    from agents.crypto_scam import assess_scam_risk, format_scam_assessment
+    from agents.decryptify import TRUST_SCORE_PROMPT
+    from agents.founder_info import find_project_founders, research_founder
+    from agents.project_info import gather_project_info, lookup_project
+    from agents.trust_facts import collect_trust_facts, render_trust_facts
+
+    market = fetch_coin_market_data(project_name)
+    scam = assess_scam_risk(project_name)
+    audit = lookup_audit(project_name)
+    founders = find_project_founders(project_name)
+    project = lookup_project(project_name)
+
+    try:
+        market_section = format_coin_info(market) if market else f"No cryptocurrency found with name '{project_name}'"
+    except Exception as e:
+        market_section = f"Market data unavailable: {str(e)}"
+
+    combined_analysis = f"""
+                Market Data: {market_section}
+                Scam Analysis: {format_scam_assessment(project_name, scam)}
+                Security Audit: {format_audit_report(project_name, audit)}
+                Founder Analysis: {research_founder(project_name)}
+                Project Analysis: {gather_project_info(project_name)}
+                """
+    legacy = LEGACY_PROMPT.format(project_name=project_name, combined_analysis=combined_analysis)
+    compact = TRUST_SCORE_PROMPT.format(
+        project_name=project_name,
+        facts=render_trust_facts(collect_trust_facts(market, scam, audit, founders, project)),
+    )
+    return legacy, compact
+
+
+def _time_llm(llm, prompt: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        llm.invoke(prompt)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("projects", nargs="*", default=DEFAULT_PROJECTS)
+    parser.add_argument("--live", action="store_true", help="Use real CoinGecko and OpenAI and time each prompt")
+    parser.add_argument("--repeat", type=int, default=3, help="LLM calls per prompt in --live mode")
+    args = parser.parse_args(argv)
+
+    llm = None
+    if args.live:
+        import os
+
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=os.environ["OPENAI_API_KEY"], temperature=0.7)
+    else:
+        from scripts.stubs import install_coingecko_stub
+
+        install_coingecko_stub()
+
+    count = _token_counter()
+    legacy_total = compact_total = 0
+    print(f"{'project':<12} {'legacy tok':>10} {'compact tok':>11} {'saved':>7}" + ("  legacy s  compact s" if llm else ""))
+    for project_name in args.projects:
+        legacy, compact = build_prompts(project_name)
+        legacy_tokens, compact_tokens = count(legacy), count(compact)
+        legacy_total += legacy_tokens
+        compact_total += compact_tokens
+        row = f"{project_name:<12} {legacy_tokens:>10} {compact_tokens:>11} {1 - compact_tokens / legacy_tokens:>6.0%}"
+        if llm:
+            row += f"  {_time_llm(llm, legacy, args.repeat):>8.2f}  {_time_llm(llm, compact, args.repeat):>9.2f}"
+        print(row)
+
+    print(f"{'total':<12} {legacy_total:>10} {compact_total:>11} {1 - compact_total / legacy_total:>6.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
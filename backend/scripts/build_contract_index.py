@@ -0,0 +1,51 @@
+"""
+Build the contract address index (agents/contract_index.py) from CoinGecko.
+
+Maps every token contract address in /coins/list?include_platform=true to its
+coin id, symbol and platform. The index replaces CONTRACT_INDEX_PATH
+atomically; running API workers reload it on their next lookup (they also
+refresh it themselves once it is older than CONTRACT_INDEX_MAX_AGE).
+
+    python -m scripts.build_contract_index
+    python -m scripts.build_contract_index --output /srv/contract_index.json
+    python -m scripts.build_contract_index --stub      # generated data, no API calls
+    python -m scripts.build_contract_index --lookup 0x1f98...f984   # resolve one address and exit
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Index file (default CONTRACT_INDEX_PATH)")
+    parser.add_argument("--stub", action="store_true", help="Use the CoinGecko stub (no API calls)")
+    parser.add_argument("--lookup", help="Print the coin for a contract address and exit")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from scripts.stubs import install_coingecko_stub
+
+        install_coingecko_stub()
+
+    from agents.contract_index import CONTRACT_INDEX_PATH, ContractIndex, build_index
+
+    path = args.output or CONTRACT_INDEX_PATH
+    if args.lookup:
+        print(json.dumps(ContractIndex(path).resolve(args.lookup), indent=2))
+        return 0
+
+    started = time.perf_counter()
+    count = build_index(path)
+    print(
+        f"Built {path}: {count} addresses, {os.path.getsize(path) / 1024:.0f} KiB "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Compile the entity store (services/entity_store.py) from its JSON sources.
+
+Each `<kind>.json` in the sources directory (default ENTITY_SOURCES_DIR,
+backend/data/sources) is an object of key -> record: founders keyed by
+lower-cased name, projects, exchanges and audits by lower-cased name without
+spaces. The store replaces ENTITY_STORE_PATH atomically; running API workers
+reopen it on their next lookup.
+
+    python -m scripts.build_entity_store
+    python -m scripts.build_entity_store --sources research/export --output /srv/entities.sqlite
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from services.entity_store import ENTITY_SOURCES_DIR, ENTITY_STORE_PATH, build_store, load_sources
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sources", default=ENTITY_SOURCES_DIR, help="Directory of <kind>.json files")
+    parser.add_argument("--output", default=ENTITY_STORE_PATH, help="Store file (default ENTITY_STORE_PATH)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    sources = load_sources(args.sources)
+    if not sources:
+        print(f"No <kind>.json files in {args.sources}; keeping the existing store")
+        return 1
+    counts = build_store(sources, args.output)
+    summary = ", ".join(f"{count} {kind}" for kind, count in counts.items())
+    print(
+        f"Built {args.output}: {summary}, {os.path.getsize(args.output) / 1024:.0f} KiB "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
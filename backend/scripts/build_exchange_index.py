@@ -0,0 +1,51 @@
+"""
+Build the exchange index (agents/exchange_index.py) from CoinGecko.
+
+Fetches every /exchanges page (250 exchanges per call) and keeps the fields
+the chainbroker report uses. The index replaces EXCHANGE_INDEX_PATH
+atomically; running API workers reload it on their next lookup (they also
+refresh it themselves once it is older than EXCHANGE_INDEX_MAX_AGE).
+
+    python -m scripts.build_exchange_index
+    python -m scripts.build_exchange_index --output /srv/exchange_index.json
+    python -m scripts.build_exchange_index --stub      # generated data, no API calls
+    python -m scripts.build_exchange_index --lookup "coinbase exchange"   # show one exchange and exit
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Index file (default EXCHANGE_INDEX_PATH)")
+    parser.add_argument("--stub", action="store_true", help="Use the CoinGecko stub (no API calls)")
+    parser.add_argument("--lookup", help="Print the indexed exchange for a name or id and exit")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from scripts.stubs import install_coingecko_stub
+
+        install_coingecko_stub()
+
+    from agents.exchange_index import EXCHANGE_INDEX_PATH, ExchangeIndex, build_index
+
+    path = args.output or EXCHANGE_INDEX_PATH
+    if args.lookup:
+        print(json.dumps(ExchangeIndex(path).get(args.lookup, wait=True), indent=2))
+        return 0
+
+    started = time.perf_counter()
+    count = build_index(path)
+    print(
+        f"Built {path}: {count} exchanges, {os.path.getsize(path) / 1024:.0f} KiB "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
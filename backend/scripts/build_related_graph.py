@@ -0,0 +1,116 @@
+"""
+Build the related-project graph (agents/related_graph.py) from CoinGecko.
+
+Takes the largest categories by market cap and their largest members, plus the
+top coins overall, then links coins that share a category, an asset platform
+(from /coins/list?include_platform=true) or a founder from the entity store.
+The graph replaces RELATED_GRAPH_PATH atomically; running API workers pick it
+up on their next lookup.
+
+    python -m scripts.build_related_graph
+    python -m scripts.build_related_graph --categories 200 --members 100 --top 1000
+    python -m scripts.build_related_graph --stub      # generated data, no API calls
+"""
+import argparse
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _markets(params: Dict[str, Any], count: int) -> List[Dict[str, Any]]:
+    from agents.coingecko import coingecko_get
+
+    rows: List[Dict[str, Any]] = []
+    page = 1
+    while len(rows) < count:
+        per_page = min(250, count - len(rows))
+        batch = coingecko_get(
+            "/coins/markets",
+            {"vs_currency": "usd", "order": "market_cap_desc", "per_page": per_page, "page": page, **params},
+        )
+        if not isinstance(batch, list) or not batch:
+            break
+        rows.extend(batch)
+        if len(batch) < per_page:
+            break
+        page += 1
+    return rows[:count]
+
+
+def gather_coins(categories: int, members: int, top: int) -> List[Dict[str, Any]]:
+    """Coins with their categories and asset platform, ready for build_graph()"""
+    from agents.coingecko import coingecko_get
+
+    coins: Dict[str, Dict[str, Any]] = {}
+
+    def add(row: Dict[str, Any]) -> Dict[str, Any]:
+        return coins.setdefault(
+            row["id"],
+            {
+                "id": row["id"],
+                "name": row.get("name"),
+                "symbol": row.get("symbol"),
+                "market_cap_rank": row.get("market_cap_rank"),
+                "categories": [],
+                "asset_platform_id": None,
+            },
+        )
+
+    for row in _markets({}, top):
+        add(row)
+
+    listed = coingecko_get("/coins/categories")
+    listed = sorted(
+        (c for c in (listed if isinstance(listed, list) else []) if c.get("id")),
+        key=lambda c: -(c.get("market_cap") or 0),
+    )[:categories]
+    for n, category in enumerate(listed, 1):
+        rows = _markets({"category": category["id"]}, members)
+        for row in rows:
+            add(row)["categories"].append(category["name"])
+        print(f"[{n}/{len(listed)}] {category['name']}: {len(rows)} coins")
+
+    platforms = coingecko_get("/coins/list", {"include_platform": "true"})
+    for row in platforms if isinstance(platforms, list) else []:
+        coin = coins.get(row.get("id"))
+        if coin is None:
+            continue
+        # Native coins list {"": ""}; tokens their issuing chain(s), first one wins
+        for platform, address in (row.get("platforms") or {}).items():
+            if platform and address:
+                coin["asset_platform_id"] = platform
+                break
+    return list(coins.values())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--categories", type=int, default=100, help="Largest categories to include (default 100)")
+    parser.add_argument("--members", type=int, default=100, help="Coins per category (default 100)")
+    parser.add_argument("--top", type=int, default=500, help="Largest coins overall (default 500)")
+    parser.add_argument("--output", help="Graph file (default RELATED_GRAPH_PATH)")
+    parser.add_argument("--stub", action="store_true", help="Use the CoinGecko stub (no API calls)")
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        from scripts.stubs import install_coingecko_stub
+
+        install_coingecko_stub()
+    from agents.related_graph import RELATED_GRAPH_PATH, build_graph
+
+    started = time.perf_counter()
+    coins = gather_coins(args.categories, args.members, args.top)
+    if not coins:
+        print("No coins fetched; keeping the existing graph")
+        return 1
+    path = args.output or RELATED_GRAPH_PATH
+    counts = build_graph(coins, path)
+    print(
+        f"Built {path}: {counts['nodes']} coins, {counts['edges']} links "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Import-time profile of the API (cold start report).
+
+Runs `python -X importtime -c "import api"` in fresh interpreters and reports
+the wall-clock import time plus the modules with the largest cumulative and
+self import times. With --ready it also starts uvicorn and measures the time
+until `/` answers and until the first chat message is answered. With
+--budget-ms the exit code is 1 when the median import time exceeds the budget,
+so the report can gate CI.
+
+Run from the backend directory:
+
+    python -m scripts.import_profile
+    python -m scripts.import_profile --module agents.decryptify --top 15
+    python -m scripts.import_profile --ready --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # api.py refuses to start without a key; the profile never calls OpenAI
+    env.setdefault("OPENAI_API_KEY", "import-profile")
+    return env
+
+
+def profile_import(module: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """Import `module` in a fresh interpreter; return (wall seconds, [(name, self us, cumulative us, depth)])"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR,
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return float(result.stdout.strip().splitlines()[-1]), entries
+
+
+def _direct_imports(entries: List[Tuple[str, int, int, int]], module: str) -> List[Tuple[str, int, int, int]]:
+    """Entries imported directly by `module` (importtime lists children before their parent)"""
+    children: List[Tuple[str, int, int, int]] = []
+    for entry in entries:
+        if entry[3] == 0:
+            if entry[0] == module:
+                return children
+            children = []
+        elif entry[3] == 1:
+            children.append(entry)
+    return []
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(app: str, timeout: float = 60.0) -> Dict[str, float]:
+    """Seconds from process start until `/` answers and until the first chat reply"""
+    import httpx
+
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=_env(),
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = started + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{app} exited during startup")
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{app} did not become ready within {timeout:.0f}s")
+            try:
+                if httpx.get(base + "/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.05)
+        ready = time.perf_counter() - started
+
+        httpx.post(
+            base + "/api/chats/create",
+            json={"initial_message": "Analyze Bitcoin"},
+            timeout=timeout,
+        ).raise_for_status()
+        first_reply = time.perf_counter() - started
+        return {"ready_s": ready, "first_reply_s": first_reply}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="api", help="Module to import (default: api)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Modules to list by cumulative and self time")
+    parser.add_argument(
+        "--ready",
+        action="store_true",
+        help="Also time uvicorn startup and the first reply (uses scripts.stub_server, no API keys needed)",
+    )
+    parser.add_argument("--app", default="scripts.stub_server:app", help="ASGI app for --ready")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when the median import exceeds this")
+    parser.add_argument("--json-out", default=None, help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    timings = []
+    entries: List[Tuple[str, int, int, int]] = []
+    for _ in range(args.runs):
+        seconds, entries = profile_import(args.module)
+        timings.append(seconds)
+    median = statistics.median(timings)
+
+    print(f"import {args.module}: median {median * 1000:.0f} ms over {args.runs} runs "
+          f"(min {min(timings) * 1000:.0f}, max {max(timings) * 1000:.0f}), {len(entries)} modules")
+
+    direct = _direct_imports(entries, args.module)
+    print(f"\nTop {args.top} imports made by {args.module}, by cumulative time:")
+    for name, _, cumulative_us, _ in sorted(direct, key=lambda e: -e[2])[: args.top]:
+        print(f"  {cumulative_us / 1000:>9.1f} ms  {name}")
+
+    print(f"\nTop {args.top} modules by self time:")
+    for name, self_us, _, _ in sorted(entries, key=lambda e: -e[1])[: args.top]:
+        print(f"  {self_us / 1000:>9.1f} ms  {name}")
+
+    report = {
+        "module": args.module,
+        "import_ms": [round(t * 1000, 1) for t in timings],
+        "median_import_ms": round(median * 1000, 1),
+        "modules": len(entries),
+        "top_cumulative": [
+            {"module": name, "ms": round(cumulative_us / 1000, 1)}
+            for name, _, cumulative_us, _ in sorted(direct, key=lambda e: -e[2])[: args.top]
+        ],
+    }
+
+    if args.ready:
+        ready = measure_ready(args.app)
+        print(f"\n{args.app}: ready after {ready['ready_s']:.2f}s, first reply after {ready['first_reply_s']:.2f}s")
+        report.update({key: round(value, 3) for key, value in ready.items()})
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.budget_ms is not None and median * 1000 > args.budget_ms:
+        print(f"\nFAIL: median import {median * 1000:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
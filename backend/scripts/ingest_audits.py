@@ -0,0 +1,50 @@
+"""
+Ingest auditor dumps into the audit index (agents/audit_index.py).
+
+Reads every .json, .jsonl and .csv file under the dumps directory (default
+AUDIT_DUMPS_DIR, backend/data/audit_dumps), one subdirectory per auditor.
+Only new or changed files are read; --full re-reads everything. Malformed
+entries are skipped and counted, and the rest of their file is still
+ingested. Running API workers see the new reports on their next lookup.
+
+    python -m scripts.ingest_audits
+    python -m scripts.ingest_audits --dumps /mnt/dumps --full
+    python -m scripts.ingest_audits --lookup uniswap    # show the indexed reports for a name or address
+"""
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from agents.audit_index import AUDIT_DUMPS_DIR, AUDIT_INDEX_PATH, AuditIndex
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dumps", default=AUDIT_DUMPS_DIR, help="Dumps directory, one subdirectory per auditor")
+    parser.add_argument("--index", default=AUDIT_INDEX_PATH, help="Index file (default AUDIT_INDEX_PATH)")
+    parser.add_argument("--full", action="store_true", help="Re-read every file instead of only changed ones")
+    parser.add_argument("--lookup", help="Print the indexed reports for a project name, symbol or address and exit")
+    args = parser.parse_args(argv)
+
+    index = AuditIndex(args.index)
+    if args.lookup:
+        for report in index.lookup(args.lookup):
+            print(json.dumps(report, indent=2))
+        return 0
+
+    started = time.perf_counter()
+    counts = index.ingest(args.dumps, full=args.full)
+    stats = index.stats()
+    print(
+        f"{counts['added']} files added, {counts['updated']} updated, {counts['removed']} removed, "
+        f"{counts['unchanged']} unchanged, {counts['failed']} failed; {counts['reports']} reports written "
+        f"({counts['skipped']} malformed entries skipped) in {time.perf_counter() - started:.2f}s"
+    )
+    print(f"{args.index}: {stats['reports']} reports from {stats['sources']} auditors")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
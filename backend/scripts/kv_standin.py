@@ -0,0 +1,265 @@
+"""
+Local stand-in for the network key-value store (a small Redis-protocol server).
+
+Implements the subset of Redis commands used by services.store, so multi-worker
+runs and load tests need no Redis install. Data lives in memory and is lost on
+exit; this is not meant for production.
+
+Run from the backend directory:
+
+    python -m scripts.kv_standin --port 6379
+    KV_BACKEND=redis KV_URL=redis://127.0.0.1:6379/0 uvicorn api:app --workers 4
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class KVData:
+    """Keyspace of strings and lists with millisecond expiry"""
+
+    def __init__(self):
+        self.values: Dict[bytes, Any] = {}
+        self.expires: Dict[bytes, float] = {}
+
+    def _alive(self, key: bytes) -> bool:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values
+
+    def _set_expiry(self, key: bytes, ms: int) -> None:
+        self.expires[key] = time.monotonic() + ms / 1000.0
+
+    def sweep(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, expires in self.expires.items() if expires <= now]:
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+
+    # Commands return RESP-encodable values: bytes, int, None, list or Exception
+
+    def cmd_ping(self, *args: bytes) -> Any:
+        return args[0] if args else "PONG"
+
+    def cmd_get(self, key: bytes) -> Any:
+        if not self._alive(key):
+            return None
+        value = self.values[key]
+        if isinstance(value, list):
+            return ProtocolError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def cmd_mget(self, *keys: bytes) -> Any:
+        # Like Redis, keys holding lists read as nil
+        return [None if isinstance(value, ProtocolError) else value for value in map(self.cmd_get, keys)]
+
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes) -> Any:
+        ttl_ms: Optional[int] = None
+        opts = [o.upper() for o in options]
+        for i, option in enumerate(opts):
+            if option == b"EX":
+                ttl_ms = int(options[i + 1]) * 1000
+            elif option == b"PX":
+                ttl_ms = int(options[i + 1])
+        self.values[key] = value
+        self.expires.pop(key, None)
+        if ttl_ms is not None:
+            self._set_expiry(key, ttl_ms)
+        return "OK"
+
+    def cmd_del(self, *keys: bytes) -> Any:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.values[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_exists(self, *keys: bytes) -> Any:
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_rpush(self, key: bytes, *items: bytes) -> Any:
+        if not self._alive(key):
+            self.values[key] = []
+        values = self.values[key]
+        if not isinstance(values, list):
+            return ProtocolError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        values.extend(items)
+        return len(values)
+
+    def cmd_lrange(self, key: bytes, start: bytes, stop: bytes) -> Any:
+        if not self._alive(key):
+            return []
+        values = self.values[key]
+        first, last = int(start), int(stop)
+        if last < 0:
+            last += len(values)
+        if first < 0:
+            first = max(0, first + len(values))
+        return values[first : last + 1]
+
+    def cmd_pexpire(self, key: bytes, ms: bytes, *flags: bytes) -> Any:
+        if not self._alive(key):
+            return 0
+        if b"NX" in [f.upper() for f in flags] and key in self.expires:
+            return 0
+        self._set_expiry(key, int(ms))
+        return 1
+
+    def cmd_expire(self, key: bytes, seconds: bytes, *flags: bytes) -> Any:
+        return self.cmd_pexpire(key, str(int(seconds) * 1000).encode(), *flags)
+
+    def cmd_pttl(self, key: bytes) -> Any:
+        if not self._alive(key):
+            return -2
+        expires = self.expires.get(key)
+        return -1 if expires is None else int((expires - time.monotonic()) * 1000)
+
+    def _incr(self, key: bytes, amount: float, as_float: bool) -> Any:
+        current = self.values.get(key) if self._alive(key) else None
+        try:
+            value = (float(current) if as_float else int(current)) if current is not None else 0
+        except ValueError:
+            return ProtocolError("ERR value is not a valid number")
+        value += amount
+        encoded = repr(value).encode() if as_float else str(value).encode()
+        if as_float and encoded.endswith(b".0"):
+            encoded = encoded[:-2]
+        self.values[key] = encoded
+        return encoded if as_float else value
+
+    def cmd_incrby(self, key: bytes, amount: bytes) -> Any:
+        return self._incr(key, int(amount), as_float=False)
+
+    def cmd_incr(self, key: bytes) -> Any:
+        return self._incr(key, 1, as_float=False)
+
+    def cmd_incrbyfloat(self, key: bytes, amount: bytes) -> Any:
+        return self._incr(key, float(amount), as_float=True)
+
+    def cmd_flushdb(self, *args: bytes) -> Any:
+        self.values.clear()
+        self.expires.clear()
+        return "OK"
+
+    def cmd_dbsize(self) -> Any:
+        self.sweep()
+        return len(self.values)
+
+    # Connection housekeeping sent by clients; accepted and ignored
+    def cmd_client(self, *args: bytes) -> Any:
+        return "OK"
+
+    def cmd_select(self, *args: bytes) -> Any:
+        return "OK"
+
+
+def encode(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, ProtocolError):
+        return b"-" + str(value).encode() + b"\r\n"
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, bool) or isinstance(value, int):
+        return b":" + str(int(value)).encode() + b"\r\n"
+    if isinstance(value, bytes):
+        return b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n"
+    if isinstance(value, list):
+        return b"*" + str(len(value)).encode() + b"\r\n" + b"".join(encode(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value)}")
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """Read one RESP array of bulk strings (or an inline command); None at EOF"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.strip().split()
+    count = int(line[1:])
+    parts = []
+    for _ in range(count):
+        header = await reader.readline()
+        if not header.startswith(b"$"):
+            raise ProtocolError("ERR Protocol error: expected '$'")
+        size = int(header[1:])
+        data = await reader.readexactly(size + 2)
+        parts.append(data[:-2])
+    return parts
+
+
+class KVServer:
+    def __init__(self):
+        self.data = KVData()
+        self.commands = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    command = await read_command(reader)
+                except ProtocolError as e:
+                    writer.write(encode(e))
+                    break
+                if command is None:
+                    break
+                if not command:
+                    continue
+                self.commands += 1
+                handler = getattr(self.data, "cmd_" + command[0].decode().lower(), None)
+                if handler is None:
+                    reply: Any = ProtocolError(f"ERR unknown command '{command[0].decode()}'")
+                else:
+                    try:
+                        reply = handler(*command[1:])
+                    except (TypeError, ValueError, IndexError):
+                        reply = ProtocolError(f"ERR wrong arguments for '{command[0].decode()}' command")
+                writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def sweep_forever(self, interval: float = 1.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.data.sweep()
+
+
+async def serve(host: str, port: int) -> Tuple[asyncio.AbstractServer, KVServer]:
+    kv = KVServer()
+    server = await asyncio.start_server(kv.handle, host, port)
+    asyncio.get_running_loop().create_task(kv.sweep_forever())
+    return server, kv
+
+
+async def _main(host: str, port: int) -> None:
+    server, _ = await serve(host, port)
+    print(f"KV stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
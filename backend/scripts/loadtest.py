@@ -0,0 +1,408 @@
+"""
+Load generator for the Decryptify chat endpoints.
+
+Each virtual user creates a chat through /api/chats/create and then sends
+follow-up messages through /api/chats/message until the run ends. The report
+covers requests per second, latency percentiles and histograms, and error
+rates per endpoint.
+
+Examples (from the backend directory):
+
+    # single run against a stubbed app started by the harness
+    python -m scripts.loadtest --spawn-stub --concurrency 8 --duration 30
+
+    # sweep concurrency to find the knee
+    python -m scripts.loadtest --spawn-stub --sweep 1,2,4,8,16,32 --duration 20
+
+    # four workers sharing chat state through the KV stand-in
+    python -m scripts.loadtest --spawn-stub --workers 4 --sweep 4,8,16,32
+
+    # drive an already running server
+    python -m scripts.loadtest --url http://localhost:8000 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf]
+
+# Short project names take the decryptify fast path, the rest go through the ReAct agent
+FAST_PATH_MESSAGES = [
+    "Bitcoin",
+    "Ethereum",
+    "Solana",
+    "analyze Chainlink",
+    "check Uniswap",
+    "What's the trust score for Cardano?",
+    "evaluate Polkadot",
+    "tell me about Avalanche",
+]
+AGENT_PATH_MESSAGES = [
+    "Which is the safer long-term holding between bitcoin and gold?",
+    "How do I recognise a rug pull before buying a token?",
+    "Should I trust a project whose founders are anonymous?",
+]
+
+
+class EndpointStats:
+    """Latency and error bookkeeping for one endpoint"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+
+    def record(self, seconds: float, error: Optional[str] = None) -> None:
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            self.latencies.append(seconds)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+    def histogram(self) -> List[int]:
+        counts = [0] * len(HISTOGRAM_BUCKETS_MS)
+        for seconds in self.latencies:
+            ms = seconds * 1000
+            for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+                if ms <= bound:
+                    counts[i] += 1
+                    break
+        return counts
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        total = self.requests
+        return {
+            "requests": total,
+            "rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            "errors": dict(self.errors),
+            "p50_ms": round(self.percentile(0.50) * 1000, 1),
+            "p90_ms": round(self.percentile(0.90) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(max(self.latencies, default=0.0) * 1000, 1),
+            "histogram_ms": dict(
+                zip([str(b) for b in HISTOGRAM_BUCKETS_MS], self.histogram())
+            ),
+        }
+
+
+async def _timed_post(
+    client: httpx.AsyncClient, stats: EndpointStats, path: str, payload: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        response = await client.post(path, json=payload)
+    except httpx.HTTPError as e:
+        stats.record(time.perf_counter() - started, type(e).__name__)
+        return None
+
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        stats.record(elapsed, f"HTTP {response.status_code}")
+        return None
+    stats.record(elapsed)
+    return response.json()
+
+
+async def _virtual_user(
+    client: httpx.AsyncClient,
+    stats: Dict[str, EndpointStats],
+    deadline: float,
+    messages_per_chat: int,
+    agent_ratio: float,
+    rng: random.Random,
+) -> None:
+    def next_message() -> str:
+        pool = AGENT_PATH_MESSAGES if rng.random() < agent_ratio else FAST_PATH_MESSAGES
+        return rng.choice(pool)
+
+    while time.perf_counter() < deadline:
+        created = await _timed_post(
+            client,
+            stats["create"],
+            "/api/chats/create",
+            {"initial_message": next_message()},
+        )
+        if not created:
+            continue
+
+        for _ in range(messages_per_chat):
+            if time.perf_counter() >= deadline:
+                return
+            await _timed_post(
+                client,
+                stats["message"],
+                "/api/chats/message",
+                {"chat_id": created["chat_id"], "message": next_message()},
+            )
+
+
+async def run_load(
+    url: str,
+    concurrency: int,
+    duration: float,
+    messages_per_chat: int = 3,
+    agent_ratio: float = 0.2,
+    timeout: float = 120.0,
+    seed: int = 7,
+) -> Dict[str, Any]:
+    """Drive the chat endpoints with `concurrency` virtual users for `duration` seconds"""
+    stats = {"create": EndpointStats(), "message": EndpointStats()}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(
+                _virtual_user(
+                    client,
+                    stats,
+                    deadline,
+                    messages_per_chat,
+                    agent_ratio,
+                    random.Random(seed + i),
+                )
+                for i in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    combined = EndpointStats()
+    for endpoint_stats in stats.values():
+        combined.latencies.extend(endpoint_stats.latencies)
+        for error, count in endpoint_stats.errors.items():
+            combined.errors[error] = combined.errors.get(error, 0) + count
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "total": combined.summary(elapsed),
+        "endpoints": {name: s.summary(elapsed) for name, s in stats.items()},
+    }
+
+
+def find_knee(
+    results: List[Dict[str, Any]],
+    min_gain: float = 0.10,
+    latency_factor: float = 3.0,
+    max_error_rate: float = 0.01,
+) -> Optional[Dict[str, Any]]:
+    """
+    Return the last sweep step before throughput stops scaling.
+
+    A step is past the knee when it adds less than `min_gain` relative RPS over
+    the previous step, when its p99 exceeds `latency_factor` times the p99 at
+    the lowest concurrency, or when its error rate exceeds `max_error_rate`.
+    """
+    if not results:
+        return None
+
+    baseline_p99 = results[0]["total"]["p99_ms"] or 1.0
+    knee = results[0]
+    for previous, current in zip(results, results[1:]):
+        total = current["total"]
+        gain = (total["rps"] - previous["total"]["rps"]) / max(previous["total"]["rps"], 1e-9)
+        if (
+            gain < min_gain
+            or total["p99_ms"] > latency_factor * baseline_p99
+            or total["error_rate"] > max_error_rate
+        ):
+            break
+        knee = current
+    return knee
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_kv_standin(port: int) -> subprocess.Popen:
+    """Start scripts.kv_standin and wait until it accepts connections"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "scripts.kv_standin", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("KV stand-in did not start within 10s")
+
+
+def spawn_stub_server(
+    port: int,
+    llm_latency_ms: float,
+    upstream_latency_ms: float,
+    workers: int = 1,
+    kv_url: Optional[str] = None,
+    data_dir: Optional[str] = None,
+) -> subprocess.Popen:
+    """Start scripts.stub_server under uvicorn and wait until it answers. Its
+    workers share `data_dir` for the data files built from the stubbed CoinGecko."""
+    env = dict(os.environ)
+    if data_dir:
+        env["STUB_DATA_DIR"] = data_dir
+    env["STUB_LLM_LATENCY_MS"] = str(llm_latency_ms)
+    env["STUB_UPSTREAM_LATENCY_MS"] = str(upstream_latency_ms)
+    if kv_url:
+        env["KV_BACKEND"] = "redis"
+        env["KV_URL"] = kv_url
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "scripts.stub_server:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--workers",
+            str(workers),
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Stub server exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Stub server did not become ready within 60s")
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    print(f"\n=== concurrency {result['concurrency']} ({result['elapsed_s']}s) ===")
+    print(f"{'endpoint':<10} {'reqs':>6} {'rps':>8} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    rows = dict(result["endpoints"], total=result["total"])
+    for name, s in rows.items():
+        print(
+            f"{name:<10} {s['requests']:>6} {s['rps']:>8} {s['error_rate'] * 100:>5.1f}%"
+            f" {s['p50_ms']:>7}ms {s['p90_ms']:>7}ms {s['p99_ms']:>7}ms {s['max_ms']:>7}ms"
+        )
+    print("latency histogram (total, upper bound ms: count):")
+    print("  " + "  ".join(f"{k}:{v}" for k, v in result["total"]["histogram_ms"].items()))
+    if result["total"]["errors"]:
+        print(f"errors: {result['total']['errors']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the API")
+    parser.add_argument("--spawn-stub", action="store_true", help="Start scripts.stub_server and target it")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of virtual users")
+    parser.add_argument("--sweep", help="Comma-separated concurrency levels, e.g. 1,2,4,8,16")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per run")
+    parser.add_argument("--messages-per-chat", type=int, default=3)
+    parser.add_argument("--agent-ratio", type=float, default=0.2, help="Share of free-form agent-path messages")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--stub-llm-latency-ms", type=float, default=400)
+    parser.add_argument("--stub-upstream-latency-ms", type=float, default=50)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="uvicorn workers for --spawn-stub; more than one also starts scripts.kv_standin as the shared store",
+    )
+    parser.add_argument("--knee-gain", type=float, default=0.10, help="Minimum relative RPS gain per sweep step")
+    parser.add_argument("--knee-latency-factor", type=float, default=3.0, help="Allowed p99 growth over the first step")
+    parser.add_argument("--json-out", help="Write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    server = kv_standin = data_dir = None
+    url = args.url
+    if args.spawn_stub:
+        kv_url = None
+        if args.workers > 1:
+            kv_port = _free_port()
+            kv_standin = spawn_kv_standin(kv_port)
+            kv_url = f"redis://127.0.0.1:{kv_port}/0"
+        port = _free_port()
+        data_dir = tempfile.mkdtemp(prefix="decryptify-stub-")
+        server = spawn_stub_server(
+            port, args.stub_llm_latency_ms, args.stub_upstream_latency_ms, args.workers, kv_url, data_dir
+        )
+        url = f"http://127.0.0.1:{port}"
+
+    levels = [int(level) for level in args.sweep.split(",")] if args.sweep else [args.concurrency]
+    results = []
+    try:
+        for level in levels:
+            result = asyncio.run(
+                run_load(
+                    url,
+                    level,
+                    args.duration,
+                    messages_per_chat=args.messages_per_chat,
+                    agent_ratio=args.agent_ratio,
+                    timeout=args.timeout,
+                )
+            )
+            _print_result(result)
+            results.append(result)
+    finally:
+        for process in (server, kv_standin):
+            if process:
+                process.terminate()
+                process.wait(timeout=10)
+        if data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    output: Dict[str, Any] = {"url": url, "runs": results}
+    if len(results) > 1:
+        knee = find_knee(results, args.knee_gain, args.knee_latency_factor)
+        output["knee_concurrency"] = knee["concurrency"] if knee else None
+        if knee:
+            print(
+                f"\nKnee: throughput stops scaling after concurrency {knee['concurrency']}"
+                f" ({knee['total']['rps']} rps, p99 {knee['total']['p99_ms']}ms)"
+            )
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(output, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Decryptify API wired to local stubs instead of OpenAI, CoinGecko and Firestore.
+
+Run from the backend directory:
+
+    uvicorn scripts.stub_server:app --port 8765
+
+Latencies of the stubbed dependencies are tunable through the environment:
+STUB_LLM_LATENCY_MS (default 400) and STUB_UPSTREAM_LATENCY_MS (default 50).
+Data files built from the stubbed CoinGecko go to STUB_DATA_DIR (default a new
+temporary directory), never to backend/data.
+For several workers, point KV_BACKEND/KV_URL at scripts.kv_standin:
+
+    KV_BACKEND=redis uvicorn scripts.stub_server:app --port 8765 --workers 4
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "stub-openai-key")
+
+from scripts.stubs import (  # noqa: E402
+    InMemoryFirestore,
+    StoreFirestore,
+    StubChatModel,
+    install_coingecko_stub,
+)
+from services.store import get_store  # noqa: E402
+
+# Before importing the app, so its data files point at the scratch directory
+install_coingecko_stub()
+
+import api  # noqa: E402
+
+api.set_llm(StubChatModel(latency=float(os.getenv("STUB_LLM_LATENCY_MS", 400)) / 1000.0))
+# With a shared KV store (KV_BACKEND=redis) chats are visible to every worker
+api.set_db(StoreFirestore() if get_store().shared else InMemoryFirestore())
+
+app = api.app
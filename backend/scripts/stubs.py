@@ -0,0 +1,439 @@
+"""
+Local stand-ins for the backend's external services.
+
+Used by the load-test harness so the API can be driven without an OpenAI key,
+CoinGecko quota or a Firebase project:
+
+- StubChatModel: deterministic chat model with configurable latency
+- CoinGecko stub: answers api.coingecko.com requests from generated fixtures.
+  Installing it moves the data files built from CoinGecko into a scratch
+  directory, so generated data never lands in backend/data
+- InMemoryFirestore: the subset of the Firestore client used by api.py
+  (StoreFirestore keeps the documents in the shared KV store instead)
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from langchain_core.language_models.chat_models import SimpleChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from services.store import get_store
+
+COINGECKO_HOST = "api.coingecko.com"
+
+
+def _env_ms(name: str, default: float) -> float:
+    return float(os.getenv(name, default)) / 1000.0
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.lower().encode()).hexdigest()[:8], 16)
+
+
+# ---------------------------------------------------------------------------
+# LLM
+# ---------------------------------------------------------------------------
+
+
+class StubChatModel(SimpleChatModel):
+    """Chat model that answers each Decryptify prompt shape with a canned reply"""
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "decryptify-stub"
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt = "\n".join(str(message.content) for message in messages)
+        if "trust score from 0-10" in prompt:
+            score = 4 + _seed(prompt) % 6
+            level = "HIGH" if score >= 7 else "MEDIUM"
+            return (
+                f"Overall Trust Score: {score}/10\n"
+                f"Trust Level: {level}\n"
+                "Reason: Stubbed assessment based on the supplied market and audit data."
+            )
+        if "Extract or generate a trust score" in prompt:
+            return "5/10"
+        if "cryptocurrency projects that are related to" in prompt:
+            return (
+                "Ethereum (Smart contract platform)\n"
+                "Solana (High-throughput layer 1)\n"
+                "Arbitrum (Ethereum L2 scaling solution)\n"
+                "Chainlink (Oracle network)\n"
+                "Polygon (Ethereum sidechain)"
+            )
+        return (
+            "Thought: I can answer this from general knowledge.\n"
+            "Final Answer: This is a stubbed answer from the Decryptify load-test model."
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        """The canned reply word by word, STUB_LLM_TOKEN_MS apart"""
+        text = self._call(messages, stop=stop)
+        delay = _env_ms("STUB_LLM_TOKEN_MS", 0)
+        for piece in re.findall(r"\s*\S+", text):
+            if delay:
+                time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+# ---------------------------------------------------------------------------
+# CoinGecko
+# ---------------------------------------------------------------------------
+
+
+_CATEGORIES = [
+    ("smart-contract-platform", "Smart Contract Platform"),
+    ("layer-1", "Layer 1 (L1)"),
+    ("decentralized-finance-defi", "Decentralized Finance (DeFi)"),
+    ("meme-token", "Meme"),
+]
+
+
+def _coin_for_query(query: str) -> Dict[str, Any]:
+    slug = "-".join(query.lower().split()) or "unknown"
+    seed = _seed(slug)
+    return {
+        "id": slug,
+        "symbol": slug.replace("-", "")[:4],
+        "name": query.title(),
+        "market_cap_rank": 1 + seed % 500,
+        "seed": seed,
+    }
+
+
+def _coin_detail(coin_id: str) -> Dict[str, Any]:
+    coin = _coin_for_query(coin_id.replace("-", " "))
+    seed = coin["seed"]
+    price = round(0.01 + (seed % 100000) / 7.0, 4)
+    circulating = float(10_000_000 + seed % 900_000_000)
+    return {
+        "id": coin_id,
+        "symbol": coin["symbol"],
+        "name": coin["name"],
+        "market_cap_rank": coin["market_cap_rank"],
+        "categories": ["Smart Contract Platform", "Layer 1 (L1)"],
+        "asset_platform_id": None,
+        "description": {"en": f"{coin['name']} is a stubbed project used for load testing. " * 5},
+        "links": {
+            "homepage": [f"https://{coin_id}.example.org"],
+            "whitepaper": f"https://{coin_id}.example.org/whitepaper.pdf",
+            "repos_url": {"github": [f"https://github.com/{coin_id}/{coin_id}"]},
+            "twitter_screen_name": coin_id.replace("-", ""),
+            "subreddit_url": f"https://reddit.com/r/{coin_id}",
+        },
+        "market_data": {
+            "current_price": {"usd": price},
+            "market_cap": {"usd": price * circulating},
+            "total_volume": {"usd": price * circulating / 20},
+            "price_change_percentage_24h": (seed % 2000) / 100.0 - 10,
+            "price_change_percentage_7d": (seed % 4000) / 100.0 - 20,
+            "price_change_percentage_30d": (seed % 8000) / 100.0 - 40,
+            "ath": {"usd": price * 2.5},
+            "atl": {"usd": price / 10},
+            "total_supply": circulating * 1.2,
+            "circulating_supply": circulating,
+        },
+    }
+
+
+def _coin_markets(params: Dict[str, str]) -> List[Dict[str, Any]]:
+    per_page = int(params.get("per_page", 100))
+    ids = [i for i in params.get("ids", "").split(",") if i]
+    if not ids:
+        category = params.get("category", "layer-1")
+        ids = [f"{category}-coin-{n}" for n in range(per_page)]
+
+    markets = []
+    for coin_id in ids[:per_page]:
+        detail = _coin_detail(coin_id)
+        market = detail["market_data"]
+        markets.append(
+            {
+                "id": coin_id,
+                "symbol": detail["symbol"],
+                "name": detail["name"],
+                "current_price": market["current_price"]["usd"],
+                "market_cap": market["market_cap"]["usd"],
+                "market_cap_rank": detail["market_cap_rank"],
+                "total_volume": market["total_volume"]["usd"],
+                "price_change_percentage_24h": market["price_change_percentage_24h"],
+                "ath": market["ath"]["usd"],
+                "atl": market["atl"]["usd"],
+                "total_supply": market["total_supply"],
+                "circulating_supply": market["circulating_supply"],
+            }
+        )
+        for window in [w for w in params.get("price_change_percentage", "").split(",") if w]:
+            markets[-1][f"price_change_percentage_{window}_in_currency"] = market[
+                f"price_change_percentage_{window}"
+            ]
+    return markets
+
+
+def _coin_list(params: Dict[str, str]) -> List[Dict[str, Any]]:
+    """The coins of every stub category; tokens are spread over two platforms"""
+    coins = []
+    for category_id, _ in _CATEGORIES:
+        for n in range(100):
+            coin_id = f"{category_id}-coin-{n}"
+            detail = _coin_for_query(coin_id.replace("-", " "))
+            coin = {"id": coin_id, "symbol": detail["symbol"], "name": detail["name"]}
+            if params.get("include_platform") == "true":
+                platform = ("", "ethereum", "solana")[detail["seed"] % 3]
+                coin["platforms"] = {platform: f"0x{detail['seed']:040x}" if platform else ""}
+            coins.append(coin)
+    return coins
+
+
+# Named exchanges first, then generated ones
+_EXCHANGES = [
+    ("binance", "Binance"),
+    ("gdax", "Coinbase Exchange"),
+    ("kraken", "Kraken"),
+    ("okex", "OKX"),
+    ("bybit_spot", "Bybit"),
+    ("gemini", "Gemini"),
+]
+_STUB_EXCHANGE_COUNT = 600
+
+
+def _exchanges(params: Dict[str, str]) -> List[Dict[str, Any]]:
+    """/exchanges pages in trust-rank order"""
+    per_page = int(params.get("per_page", 100))
+    page = int(params.get("page", 1))
+    rows = []
+    for rank in range((page - 1) * per_page + 1, min(page * per_page, _STUB_EXCHANGE_COUNT) + 1):
+        exchange_id, name = _EXCHANGES[rank - 1] if rank <= len(_EXCHANGES) else (f"exchange_{rank}", f"Exchange {rank}")
+        seed = _seed(exchange_id)
+        volume = float(100 + seed % 500_000)
+        rows.append(
+            {
+                "id": exchange_id,
+                "name": name,
+                "year_established": 2010 + seed % 15 if seed % 5 else None,
+                "country": ("United States", "Seychelles", "Cayman Islands", None)[seed % 4],
+                "url": f"https://{exchange_id.replace('_', '')}.example.com",
+                "trust_score": max(1, 10 - rank // 60),
+                "trust_score_rank": rank,
+                "trade_volume_24h_btc": volume,
+                "trade_volume_24h_btc_normalized": volume * (0.2 + (seed % 80) / 100.0),
+            }
+        )
+    return rows
+
+
+def _market_chart(coin_id: str, params: Dict[str, str]) -> Dict[str, List[List[float]]]:
+    """Deterministic daily random walk ending today at the coin's stub price"""
+    detail = _coin_detail(coin_id)
+    market = detail["market_data"]
+    days = int(params.get("days", 30))
+    seed = _seed(coin_id)
+    now_ms = int(time.time() // 86400 * 86400 * 1000)
+    price = market["current_price"]["usd"]
+    prices, caps, volumes = [], [], []
+    for day in range(days, -1, -1):
+        # Step sizes from the seed, so every coin has its own volatility
+        step = ((seed >> (day % 24)) % 201 - 100) / 100.0 * (0.01 + (seed % 7) / 100.0)
+        ts = now_ms - day * 86400 * 1000
+        prices.append([ts, price])
+        caps.append([ts, price * market["circulating_supply"]])
+        volumes.append([ts, price * market["circulating_supply"] / 20])
+        price = max(price * (1 + step), 1e-6)
+    # Oldest first, with the walk ending at the current price
+    scale = market["current_price"]["usd"] / prices[-1][1]
+    for series in (prices, caps, volumes):
+        for point in series:
+            point[1] *= scale
+    return {"prices": prices, "market_caps": caps, "total_volumes": volumes}
+
+
+def coingecko_fixture(path: str, params: Dict[str, str]) -> Any:
+    """Return a plausible CoinGecko JSON payload for an API path"""
+    path = path.split("/api/v3", 1)[-1].rstrip("/")
+    if path == "/search":
+        coin = _coin_for_query(params.get("query", ""))
+        coin.pop("seed")
+        return {"coins": [coin]}
+    if path == "/coins/markets":
+        return _coin_markets(params)
+    if path == "/coins/categories/list":
+        return [{"category_id": category_id, "name": name} for category_id, name in _CATEGORIES]
+    if path == "/coins/categories":
+        return [
+            {"id": category_id, "name": name, "market_cap": 1e12 / (n + 1)}
+            for n, (category_id, name) in enumerate(_CATEGORIES)
+        ]
+    if path == "/coins/list":
+        return _coin_list(params)
+    if path == "/exchanges":
+        return _exchanges(params)
+    if path.startswith("/coins/") and "/contract/" in path:
+        platform, address = path.split("/")[2], path.split("/")[4].lower()
+        for coin in _coin_list({"include_platform": "true"}):
+            if coin["platforms"].get(platform, "").lower() == address:
+                return _coin_detail(coin["id"])
+        return {"error": "coin not found"}
+    if path.startswith("/coins/") and path.endswith("/market_chart"):
+        return _market_chart(path.split("/")[2], params)
+    if path.startswith("/coins/"):
+        return _coin_detail(path.split("/")[2])
+    return {}
+
+
+_original_send = requests.adapters.HTTPAdapter.send
+
+
+def _stub_send(adapter, request, *args, **kwargs):
+    url = urlparse(request.url)
+    if url.hostname != COINGECKO_HOST:
+        return _original_send(adapter, request, *args, **kwargs)
+
+    latency = _env_ms("STUB_UPSTREAM_LATENCY_MS", 50)
+    if latency:
+        time.sleep(latency)
+
+    params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(coingecko_fixture(url.path, params)).encode()
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+# Data files built from CoinGecko responses: setting -> file name in the scratch directory
+STUB_DATA_PATHS = {
+    "EXCHANGE_INDEX_PATH": "exchange_index.json",
+    "CONTRACT_INDEX_PATH": "contract_index.json",
+    "TIMESERIES_DIR": "timeseries",
+}
+
+
+def isolate_stub_data() -> str:
+    """Point the data files built from CoinGecko at STUB_DATA_DIR (a new temporary
+    directory unless set, shared by the workers of one server). Takes effect for
+    modules imported afterwards. Returns the directory."""
+    directory = os.environ.get("STUB_DATA_DIR") or tempfile.mkdtemp(prefix="decryptify-stub-")
+    os.environ["STUB_DATA_DIR"] = directory
+    for setting, name in STUB_DATA_PATHS.items():
+        os.environ[setting] = os.path.join(directory, name)
+    return directory
+
+
+def install_coingecko_stub() -> None:
+    """Route every requests call to api.coingecko.com through the fixture generator.
+    Call it before importing the agents, so their data files go to the scratch
+    directory (see isolate_stub_data)."""
+    directory = isolate_stub_data()
+    timeseries = sys.modules.get("services.timeseries")
+    if timeseries is not None and not timeseries.TIMESERIES_DIR.startswith(directory):
+        # Imported too early to follow the scratch directory: generated prices must
+        # not reach the real history, which feeds volatility and drawdown
+        timeseries.TIMESERIES_ENABLED = False
+    requests.adapters.HTTPAdapter.send = _stub_send
+
+
+# ---------------------------------------------------------------------------
+# Firestore
+# ---------------------------------------------------------------------------
+
+
+def _resolve(value: Any, current: Any = None) -> Any:
+    """Apply Firestore sentinels (SERVER_TIMESTAMP, ArrayUnion) to a field value"""
+    if type(value).__name__ == "Sentinel":
+        return datetime.utcnow()
+    if type(value).__name__ == "ArrayUnion":
+        merged = list(current or [])
+        for item in value.values:
+            if item not in merged:
+                merged.append(item)
+        return merged
+    return value
+
+
+class _Snapshot:
+    def __init__(self, data: Optional[Dict[str, Any]]):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class _Document:
+    def __init__(self, store: "InMemoryFirestore", path: str):
+        self._store = store
+        self._path = path
+
+    def set(self, data: Dict[str, Any]) -> None:
+        with self._store.lock:
+            self._store.save(self._path, {k: _resolve(v) for k, v in data.items()})
+
+    def update(self, data: Dict[str, Any]) -> None:
+        with self._store.lock:
+            document = self._store.load(self._path)
+            if document is None:
+                raise ValueError(f"No document to update: {self._path}")
+            for key, value in data.items():
+                document[key] = _resolve(value, document.get(key))
+            self._store.save(self._path, document)
+
+    def get(self) -> _Snapshot:
+        with self._store.lock:
+            return _Snapshot(self._store.load(self._path))
+
+
+class _Collection:
+    def __init__(self, store: "InMemoryFirestore", name: str):
+        self._store = store
+        self._name = name
+
+    def document(self, document_id: str) -> _Document:
+        return _Document(self._store, f"{self._name}/{document_id}")
+
+
+class InMemoryFirestore:
+    """Thread-safe in-memory replacement for firestore.client()"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.documents: Dict[str, Dict[str, Any]] = {}
+
+    def load(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(path)
+
+    def save(self, path: str, document: Dict[str, Any]) -> None:
+        self.documents[path] = document
+
+    def collection(self, name: str) -> _Collection:
+        return _Collection(self, name)
+
+
+class StoreFirestore(InMemoryFirestore):
+    """Firestore stand-in kept in the shared KV store, so several workers see the same chats"""
+
+    def load(self, path: str) -> Optional[Dict[str, Any]]:
+        return get_store().get(f"firestore:{path}")
+
+    def save(self, path: str, document: Dict[str, Any]) -> None:
+        # Round-trip through JSON so timestamps become strings, as they do over the API
+        get_store().set(f"firestore:{path}", json.loads(json.dumps(document, default=str)))
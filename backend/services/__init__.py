@@ -0,0 +1,3 @@
+"""
+Shared backend services (metrics, caching) used by the API and the agents
+"""
@@ -0,0 +1,184 @@
+"""
+Admission control - cap concurrent expensive work and shed load quickly
+
+At most ADMISSION_MAX_CONCURRENT analyses or agent runs execute at once per
+worker. Further requests wait in a FIFO queue of ADMISSION_MAX_QUEUE entries
+for up to ADMISSION_QUEUE_TIMEOUT seconds. A request is rejected right away
+when:
+
+- the queue is full (429), or
+- its expected wait, estimated from the recent service time, already exceeds
+  the deadline (503).
+
+A request whose deadline passes while it is still queued is rejected with 503.
+Rejections carry a Retry-After estimate.
+
+Batch screenings also pass `batch_admission`, which runs at most
+ADMISSION_BATCH_MAX_CONCURRENT of them per worker (ADMISSION_BATCH_MAX_QUEUE
+more may wait), and then hold one analysis slot each, so watch-lists can't
+crowd out chats unseen.
+
+The controller is asyncio-based: acquire and release from the event loop.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+from services.metrics import REGISTRY
+
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "15"))
+ADMISSION_BATCH_MAX_CONCURRENT = int(os.getenv("ADMISSION_BATCH_MAX_CONCURRENT", "2"))
+ADMISSION_BATCH_MAX_QUEUE = int(os.getenv("ADMISSION_BATCH_MAX_QUEUE", "4"))
+
+ADMISSION_DECISIONS = REGISTRY.counter(
+    "decryptify_admission_decisions_total",
+    "Admission decisions by controller and outcome (admitted, queue_full, deadline)",
+    ("controller", "outcome"),
+)
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "decryptify_admission_active", "Admitted requests currently running", ("controller",)
+)
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "decryptify_admission_queued", "Requests waiting for admission", ("controller",)
+)
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "decryptify_admission_wait_seconds", "Time spent queued before admission", ("controller",)
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; maps to an HTTP status with Retry-After"""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency cap with a bounded, deadline-aware wait queue"""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted request holds its slot
+        self._service_seconds: Optional[float] = None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _update_gauges(self) -> None:
+        ADMISSION_ACTIVE.set(self._active, controller=self.name)
+        ADMISSION_QUEUED.set(len(self._waiters), controller=self.name)
+
+    def expected_wait(self, position: int) -> float:
+        """Seconds until the request at queue `position` (0-based) gets a slot"""
+        if self._service_seconds is None:
+            return 0.0
+        return (position + 1) * self._service_seconds / self.max_concurrent
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.expected_wait(len(self._waiters))))
+
+    def _reject(self, reason: str, status_code: int) -> AdmissionRejected:
+        ADMISSION_DECISIONS.inc(controller=self.name, outcome=reason)
+        return AdmissionRejected(reason, status_code, self.retry_after())
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free and nobody is queued ahead"""
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            ADMISSION_DECISIONS.inc(controller=self.name, outcome="admitted")
+            self._update_gauges()
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait for a slot or raise AdmissionRejected"""
+        if self.try_acquire():
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full", 429)
+        if self.expected_wait(len(self._waiters)) > self.queue_timeout:
+            raise self._reject("deadline", 503)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._active -= 1
+                self._wake_next()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("deadline", 503)
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - started, controller=self.name)
+        ADMISSION_DECISIONS.inc(controller=self.name, outcome="admitted")
+
+    def _wake_next(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+                return
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        if service_seconds is not None:
+            previous = self._service_seconds
+            self._service_seconds = (
+                service_seconds if previous is None else 0.8 * previous + 0.2 * service_seconds
+            )
+        self._active -= 1
+        self._wake_next()
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, acquired: bool = False) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block (pass acquired=True after try_acquire)"""
+        if not acquired:
+            await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+
+analysis_admission = AdmissionController("analysis")
+batch_admission = AdmissionController(
+    "batch", max_concurrent=ADMISSION_BATCH_MAX_CONCURRENT, max_queue=ADMISSION_BATCH_MAX_QUEUE
+)
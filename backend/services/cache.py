@@ -0,0 +1,107 @@
+"""
+Cache - TTL caches with hit/miss metrics
+
+`TTLCache` is a thread-safe in-process LRU. `SharedCache` keeps entries in the
+KV store (services.store) so every worker sees them. `create_cache` picks the
+shared one when the configured store is shared.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from services.metrics import record_cache
+from services.store import get_store
+
+# How long expired shared entries are kept around for get_stale()
+CACHE_STALE_SECONDS = float(os.getenv("CACHE_STALE_SECONDS", "86400"))
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                record_cache(self.name, True)
+                return entry[1]
+        record_cache(self.name, False)
+        return default
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Return a value even if it has expired; expired entries stay until evicted"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[1] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SharedCache:
+    """TTL cache stored in the shared KV store; keys and values must be JSON-serializable"""
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = CACHE_STALE_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def _key(self, key: Hashable) -> str:
+        return f"cache:{self.name}:{json.dumps(key, separators=(',', ':'))}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = get_store().get(self._key(key))
+        if entry is not None and entry[0] > time.time():
+            record_cache(self.name, True)
+            return entry[1]
+        record_cache(self.name, False)
+        return default
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Return a value even if it has expired, for up to `stale_ttl` seconds after that"""
+        entry = get_store().get(self._key(key))
+        return entry[1] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        # Wall-clock expiry: the entry is read by other processes and hosts
+        get_store().set(self._key(key), [time.time() + ttl, value], ttl=ttl + self.stale_ttl)
+
+    def delete(self, key: Hashable) -> None:
+        get_store().delete(self._key(key))
+
+
+def create_cache(name: str, ttl: float, maxsize: int = 1024):
+    """SharedCache when the KV store is shared between workers, else an in-process TTLCache"""
+    if get_store().shared:
+        return SharedCache(name, ttl)
+    return TTLCache(name, ttl, maxsize)
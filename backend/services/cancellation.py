@@ -0,0 +1,157 @@
+"""
+Cancellation - abandon a request's work once nobody is waiting for the answer
+
+A request binds a CancelToken with `cancel_scope`; the agents and services it
+calls into check it at their blocking points (before CoinGecko calls, LLM
+calls and between streamed LLM tokens) and raise RequestCancelled once it is
+cancelled. RequestCancelled derives from BaseException, like
+asyncio.CancelledError, so the agents' `except Exception` fallbacks don't turn
+a cancelled run into a degraded answer.
+
+Upstream calls that are already in flight go through `run_cancellable`: the
+caller stops waiting the moment the token is cancelled, while the call itself
+completes on a helper thread, so its response still lands in the caches for
+the next request.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from services.metrics import REGISTRY
+
+# Helper threads for upstream calls made by cancellable requests
+CANCELLABLE_WORKERS = int(os.getenv("CANCELLABLE_WORKERS", "32"))
+
+REQUESTS_CANCELLED = REGISTRY.counter(
+    "decryptify_requests_cancelled_total",
+    "Requests whose work was cancelled, by reason",
+    ("reason",),
+)
+
+
+class RequestCancelled(BaseException):
+    """Raised inside a cancelled request's work"""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared by a request's worker threads"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        REQUESTS_CANCELLED.inc(reason=reason)
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Call `callback` on cancellation (at once if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+
+
+_token: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    return _token.get()
+
+
+def check_cancelled() -> None:
+    """Raise RequestCancelled if the current request has been cancelled"""
+    token = _token.get()
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def cancel_scope(token: Optional[CancelToken]) -> Iterator[Optional[CancelToken]]:
+    """Bind a cancel token (or none) for the duration of a request's work"""
+    reset = _token.set(token)
+    try:
+        yield token
+    finally:
+        _token.reset(reset)
+
+
+_helpers = ThreadPoolExecutor(CANCELLABLE_WORKERS, thread_name_prefix="cancellable")
+
+
+def _detached(fn: Callable[..., Any], *args: Any) -> Any:
+    # The call outlives a cancelled caller, so it must not see the caller's token
+    with cancel_scope(None):
+        return fn(*args)
+
+
+def run_cancellable(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking call, returning its result, or raise RequestCancelled as soon
+    as the current request is cancelled. Without a cancel token the call runs
+    inline; with one it runs on a helper thread (in a copy of this context) and
+    is left to finish there after a cancellation.
+    """
+    token = _token.get()
+    if token is None:
+        return fn(*args)
+    token.check()
+    future = _helpers.submit(contextvars.copy_context().run, _detached, fn, *args)
+    wake = threading.Event()
+    future.add_done_callback(lambda _: wake.set())
+    token.add_callback(wake.set)
+    try:
+        wake.wait()
+    finally:
+        token.remove_callback(wake.set)
+    if not future.done():
+        raise RequestCancelled(token.reason)
+    return future.result()
+
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """Stops a LangChain agent run of a cancelled request at its next LLM call,
+    streamed token or tool call (streaming tokens aborts the model's response)"""
+
+    raise_error = True
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs) -> None:
+        check_cancelled()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs) -> None:
+        check_cancelled()
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        check_cancelled()
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs) -> None:
+        check_cancelled()
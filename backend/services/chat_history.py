@@ -0,0 +1,34 @@
+"""
+Chat history - conversation memory kept in the KV store
+
+Backs LangChain's ConversationBufferMemory with a per-chat message list in
+services.store, so any API worker can continue any chat.
+"""
+from typing import List, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from services.store import CHAT_MEMORY_TTL, get_store
+
+
+class StoreChatMessageHistory(BaseChatMessageHistory):
+    """Message history of one chat, stored as a list under chat:<id>:messages"""
+
+    def __init__(self, chat_id: str, ttl: float = CHAT_MEMORY_TTL):
+        self.key = f"chat:{chat_id}:messages"
+        self.ttl = ttl
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return messages_from_dict(get_store().get_list(self.key))
+
+    def add_message(self, message: BaseMessage) -> None:
+        get_store().append(self.key, message_to_dict(message), ttl=self.ttl)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        for message in messages:
+            self.add_message(message)
+
+    def clear(self) -> None:
+        get_store().delete(self.key)
@@ -0,0 +1,254 @@
+"""
+Entity store - founders, projects, exchanges and audits in one indexed SQLite file
+
+The research databases are compiled from JSON sources (ENTITY_SOURCES_DIR,
+default backend/data/sources, one `<kind>.json` object of key -> record per
+kind) into ENTITY_STORE_PATH (default backend/data/entities.sqlite) by
+scripts/build_entity_store.py. Workers open the file read-only and memory-map
+it, so they share one copy through the page cache instead of each importing
+the records, and a record is decoded only when it is looked up:
+
+- entities: (kind, key) -> record as compact JSON, in a WITHOUT ROWID table
+- terms: (kind, term) -> key for the words of ENTITY_SEARCH_FIELDS, so
+  search() doesn't scan the records
+- meta: a digest per kind, used as the data version of the report sections
+
+The file is replaced atomically and reopened when it changes. When it is
+missing or older than its sources (local development), it is rebuilt on
+first use.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from services.cache import TTLCache
+from services.metrics import REGISTRY
+
+logger = logging.getLogger("decryptify")
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+ENTITY_STORE_PATH = os.getenv("ENTITY_STORE_PATH", os.path.join(_DATA_DIR, "entities.sqlite"))
+ENTITY_SOURCES_DIR = os.getenv("ENTITY_SOURCES_DIR", os.path.join(_DATA_DIR, "sources"))
+# Decoded records kept per worker
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "2048"))
+# Bytes of the file each connection memory-maps
+ENTITY_STORE_MMAP_SIZE = int(os.getenv("ENTITY_STORE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Record fields indexed word by word for search(), per kind
+ENTITY_SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "founders": ("role",),
+}
+
+ENTITY_LOOKUPS = REGISTRY.counter(
+    "decryptify_entity_lookups_total",
+    "Entity store lookups by kind and outcome (hit, miss when the key is unknown)",
+    ("kind", "outcome"),
+)
+
+_WORD = re.compile(r"\w+")
+_MISSING = object()
+
+SCHEMA = """
+CREATE TABLE entities (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE TABLE terms (
+    kind TEXT NOT NULL,
+    term TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (kind, term, key)
+) WITHOUT ROWID;
+CREATE TABLE meta (
+    kind TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+"""
+
+
+def data_digest(records: Dict[str, Any]) -> str:
+    """Short digest of one kind's records (same as sections.data_version of the dict)"""
+    encoded = json.dumps([records], sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+def load_sources(directory: str = ENTITY_SOURCES_DIR) -> Dict[str, Dict[str, Any]]:
+    """Records per kind from `<kind>.json` files"""
+    sources: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                sources[name[: -len(".json")]] = json.load(f)
+    return sources
+
+
+def build_store(sources: Dict[str, Dict[str, Any]], path: str = ENTITY_STORE_PATH) -> Dict[str, int]:
+    """Compile records per kind into a store file, replacing `path` atomically.
+    Returns the record count per kind."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        for kind, records in sources.items():
+            conn.executemany(
+                "INSERT INTO entities (kind, key, seq, record) VALUES (?, ?, ?, ?)",
+                (
+                    (kind, key, seq, json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+                    for seq, (key, record) in enumerate(records.items())
+                ),
+            )
+            fields = ENTITY_SEARCH_FIELDS.get(kind, ())
+            conn.executemany(
+                "INSERT OR IGNORE INTO terms (kind, term, key) VALUES (?, ?, ?)",
+                (
+                    (kind, term, key)
+                    for key, record in records.items()
+                    for field in fields
+                    for term in _WORD.findall(str(record.get(field) or "").lower())
+                ),
+            )
+            conn.execute(
+                "INSERT INTO meta (kind, version, count) VALUES (?, ?, ?)",
+                (kind, data_digest(records), len(records)),
+            )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return {kind: len(records) for kind, records in sources.items()}
+
+
+class EntityStore:
+    """Read side of the store file: lazy per-key lookups, one connection per thread"""
+
+    def __init__(self, path: str = ENTITY_STORE_PATH, sources_dir: Optional[str] = ENTITY_SOURCES_DIR):
+        self.path = path
+        self.sources_dir = sources_dir
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stamp: Optional[Tuple[int, float]] = None
+        self._versions: Dict[str, str] = {}
+        self._records = TTLCache("entities", ttl=float("inf"), maxsize=ENTITY_CACHE_SIZE)
+
+    def _stale(self) -> bool:
+        try:
+            built = os.path.getmtime(self.path)
+        except OSError:
+            return True
+        if not self.sources_dir or not os.path.isdir(self.sources_dir):
+            return False
+        return any(
+            os.path.getmtime(os.path.join(self.sources_dir, name)) > built
+            for name in os.listdir(self.sources_dir)
+            if name.endswith(".json")
+        )
+
+    def _rebuild(self) -> None:
+        """Build the file from its sources, once across workers"""
+        lock_path = self.path + ".lock"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = open(lock_path, "a")
+        except OSError:
+            # Read-only data directory: build a private copy instead
+            self.path = os.path.join(tempfile.mkdtemp(prefix="entities-"), os.path.basename(self.path))
+            logger.warning(f"Entity store directory is read-only; building {self.path}")
+            build_store(load_sources(self.sources_dir), self.path)
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self._stale():
+                    counts = build_store(load_sources(self.sources_dir), self.path)
+                    logger.info(f"Built entity store {self.path}: {counts}")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _conn(self) -> sqlite3.Connection:
+        try:
+            stat = os.stat(self.path)
+            stamp: Optional[Tuple[int, float]] = (stat.st_ino, stat.st_mtime)
+        except OSError:
+            stamp = None
+        if stamp is None or stamp != self._stamp:
+            with self._lock:
+                if self.sources_dir and self._stale():
+                    self._rebuild()
+                stat = os.stat(self.path)
+                stamp = (stat.st_ino, stat.st_mtime)
+                if stamp != self._stamp:
+                    conn = self._open()
+                    try:
+                        self._versions = dict(conn.execute("SELECT kind, version FROM meta"))
+                    finally:
+                        conn.close()
+                    self._records.clear()
+                    self._stamp = stamp
+        local = self._local
+        if getattr(local, "stamp", None) != stamp:
+            if getattr(local, "conn", None) is not None:
+                local.conn.close()
+            local.conn, local.stamp = self._open(), stamp
+        return local.conn
+
+    def _open(self) -> sqlite3.Connection:
+        # The file is only ever replaced, never written in place, so no locking is needed
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True)
+        conn.execute(f"PRAGMA mmap_size = {ENTITY_STORE_MMAP_SIZE}")
+        return conn
+
+    def version(self, kind: str) -> str:
+        """Digest of a kind's records ("" when the kind is empty)"""
+        self._conn()
+        return self._versions.get(kind, "")
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """The record stored under `key`, or None"""
+        conn = self._conn()
+        record = self._records.get((kind, key), _MISSING)
+        if record is _MISSING:
+            row = conn.execute("SELECT record FROM entities WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            record = json.loads(row[0]) if row else None
+            self._records.set((kind, key), record)
+        ENTITY_LOOKUPS.inc(kind=kind, outcome="hit" if record is not None else "miss")
+        return record
+
+    def search(self, kind: str, term: str) -> List[Dict[str, Any]]:
+        """Records whose search fields contain the word `term`, in source order"""
+        conn = self._conn()
+        keys = [
+            key for (key,) in conn.execute(
+                "SELECT e.key FROM terms t JOIN entities e ON e.kind = t.kind AND e.key = t.key "
+                "WHERE t.kind = ? AND t.term = ? ORDER BY e.seq",
+                (kind, term.lower()),
+            )
+        ]
+        return [record for record in (self.get(kind, key) for key in keys) if record is not None]
+
+    def records(self, kind: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """All (key, record) pairs of a kind, in source order (for offline builds)"""
+        conn = self._conn()
+        for key, record in conn.execute(
+            "SELECT key, record FROM entities WHERE kind = ? ORDER BY seq", (kind,)
+        ).fetchall():
+            yield key, json.loads(record)
+
+
+entity_store = EntityStore()
@@ -0,0 +1,260 @@
+"""
+Jobs - run long work off the request path and keep the results for polling
+
+submit() returns a job record right away; the work runs on a local thread pool
+(JOB_WORKERS, default 4) in a copy of the submitter's context, so the request
+scope and priority class carry over. At most JOB_MAX_PENDING jobs are queued or
+running per worker process (default 64); beyond that submit raises JobQueueFull.
+
+Job records (status, result or error, timestamps) are kept in the key-value
+store for JOB_RESULT_TTL seconds (default 3600), so with a shared store any
+worker can answer a poll.
+
+Each job runs under its own cancel token. A heartbeat thread in the worker
+that owns the job, every JOB_HEARTBEAT_INTERVAL seconds:
+
+- marks the job alive for JOB_ORPHAN_AFTER seconds (default 60). A poll that
+  finds a queued or running job no longer alive (its process died) marks it
+  failed
+- cancels jobs that were deleted (cancel(), from any worker) or that nobody
+  has polled for JOB_ABANDON_AFTER seconds (default 30, 0 to disable)
+
+A cancelled job ends with status "cancelled".
+"""
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+from services.cancellation import CancelToken, RequestCancelled, cancel_scope
+from services.metrics import REGISTRY
+from services.store import get_store
+
+logger = logging.getLogger("decryptify")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "64"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "5"))
+JOB_ORPHAN_AFTER = float(os.getenv("JOB_ORPHAN_AFTER", "60"))
+JOB_ABANDON_AFTER = float(os.getenv("JOB_ABANDON_AFTER", "30"))
+
+JOBS_TOTAL = REGISTRY.counter(
+    "decryptify_jobs_total",
+    "Finished jobs by kind and status (succeeded, failed, cancelled, orphaned)",
+    ("kind", "status"),
+)
+JOBS_PENDING = REGISTRY.gauge(
+    "decryptify_jobs_pending", "Jobs queued or running in this worker", ("kind",)
+)
+JOB_SECONDS = REGISTRY.histogram(
+    "decryptify_job_seconds", "Job run time, excluding time queued", ("kind",)
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are pending; maps to 429 with Retry-After"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many pending jobs, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobRunner:
+    """Bounded local worker pool whose job records live in the key-value store"""
+
+    def __init__(
+        self,
+        kind: str,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        ttl: float = JOB_RESULT_TTL,
+    ):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        # Cancel tokens of this worker's queued and running jobs
+        self._tokens: Dict[str, CancelToken] = {}
+        self._heartbeat: Optional[threading.Thread] = None
+        # Moving average of job run time, for Retry-After estimates
+        self._run_seconds: Optional[float] = None
+
+    @staticmethod
+    def _key(job_id: str, suffix: str = "") -> str:
+        return f"job:{job_id}{suffix}"
+
+    def _save(self, record: Dict[str, Any]) -> None:
+        get_store().set(self._key(record["job_id"]), dict(record), ttl=self.ttl)
+
+    def retry_after(self) -> int:
+        if self._run_seconds is None:
+            return 1
+        return max(1, math.ceil(self._pending * self._run_seconds / self.workers))
+
+    def _new_record(self) -> Dict[str, Any]:
+        return {
+            "job_id": uuid4().hex,
+            "kind": self.kind,
+            "status": QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+
+    def completed(self, result: Any) -> Dict[str, Any]:
+        """Record work done without queueing (a cached answer) as a succeeded job"""
+        now = time.time()
+        record = dict(self._new_record(), status=SUCCEEDED, started_at=now, finished_at=now, result=result)
+        self._save(record)
+        JOBS_TOTAL.inc(kind=self.kind, status=SUCCEEDED)
+        return record
+
+    def submit(
+        self, fn: Callable[[], Any], on_done: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """Queue `fn` (its return value must be JSON-serializable) and return the job record.
+        `fn` runs under the job's cancel token; `on_done` is called once the job is over."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(self.retry_after())
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"job-{self.kind}")
+        JOBS_PENDING.inc(kind=self.kind)
+
+        record = self._new_record()
+        job_id = record["job_id"]
+        queued = dict(record)
+        try:
+            self._mark_alive(job_id)
+            self._save(record)
+            with self._lock:
+                self._tokens[job_id] = CancelToken()
+                self._start_heartbeat()
+            self._executor.submit(contextvars.copy_context().run, self._run, record, fn, on_done)
+        except BaseException:
+            self._done(job_id, on_done)
+            raise
+        return queued
+
+    def _run(
+        self, record: Dict[str, Any], fn: Callable[[], Any], on_done: Optional[Callable[[], None]]
+    ) -> None:
+        started = time.monotonic()
+        token = self._tokens[record["job_id"]]
+        record.update(status=RUNNING, started_at=time.time())
+        try:
+            with cancel_scope(token):
+                token.check()
+                self._save(record)
+                record.update(status=SUCCEEDED, result=fn())
+        except RequestCancelled:
+            record.update(status=CANCELLED, error=f"Job cancelled ({token.reason})")
+        except Exception as e:
+            record.update(status=FAILED, error=str(e))
+        finally:
+            elapsed = time.monotonic() - started
+            record["finished_at"] = time.time()
+            JOBS_TOTAL.inc(kind=self.kind, status=record["status"])
+            JOB_SECONDS.observe(elapsed, kind=self.kind)
+            with self._lock:
+                previous = self._run_seconds
+                self._run_seconds = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            try:
+                self._save(record)
+            finally:
+                self._done(record["job_id"], on_done)
+
+    def _done(self, job_id: str, on_done: Optional[Callable[[], None]]) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._tokens.pop(job_id, None)
+        JOBS_PENDING.dec(kind=self.kind)
+        get_store().delete(self._key(job_id, ":alive"))
+        if on_done is not None:
+            on_done()
+
+    def _mark_alive(self, job_id: str) -> None:
+        store = get_store()
+        store.set(self._key(job_id, ":alive"), True, ttl=JOB_ORPHAN_AFTER)
+        if JOB_ABANDON_AFTER > 0:
+            store.set(self._key(job_id, ":polled"), True, ttl=JOB_ABANDON_AFTER)
+
+    def _start_heartbeat(self) -> None:
+        # Called with the lock held
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = threading.Thread(
+                target=self._beat, name=f"job-{self.kind}-heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(JOB_HEARTBEAT_INTERVAL)
+            with self._lock:
+                tokens = dict(self._tokens)
+                if not tokens:
+                    self._heartbeat = None
+                    return
+            store = get_store()
+            for job_id, token in tokens.items():
+                try:
+                    cancelled, polled = store.get_many(
+                        [self._key(job_id, ":cancel"), self._key(job_id, ":polled")]
+                    )
+                    if cancelled:
+                        token.cancel("job_deleted")
+                    elif JOB_ABANDON_AFTER > 0 and polled is None:
+                        token.cancel("job_abandoned")
+                    store.set(self._key(job_id, ":alive"), True, ttl=JOB_ORPHAN_AFTER)
+                except Exception as e:
+                    logger.warning(f"Job heartbeat failed for {job_id}: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job record, or None if unknown or expired. Counts as a poll, and marks a
+        queued or running job whose worker is gone as failed."""
+        store = get_store()
+        # Read together: the worker saves the final record before dropping :alive
+        alive, record = store.get_many([self._key(job_id, ":alive"), self._key(job_id)])
+        if record is None or record["status"] not in (QUEUED, RUNNING):
+            return record
+        if alive is None:
+            record.update(status=FAILED, error="The worker running this job stopped", finished_at=time.time())
+            self._save(record)
+            JOBS_TOTAL.inc(kind=self.kind, status="orphaned")
+            return record
+        if JOB_ABANDON_AFTER > 0:
+            store.set(self._key(job_id, ":polled"), True, ttl=JOB_ABANDON_AFTER)
+        return record
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job, on whichever worker owns it. Returns the job
+        record, or None if unknown or expired."""
+        record = get_store().get(self._key(job_id))
+        if record is None or record["status"] not in (QUEUED, RUNNING):
+            return record
+        with self._lock:
+            token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel("job_deleted")
+        else:
+            # Another worker owns it; its heartbeat picks this up
+            get_store().set(self._key(job_id, ":cancel"), True, ttl=self.ttl)
+        return record
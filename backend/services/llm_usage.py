@@ -0,0 +1,245 @@
+"""
+LLM usage - token and cost accounting per call site, chat and user, with budgets
+
+Every LLM call goes through `invoke_llm` (direct calls) or `UsageCallbackHandler`
+(calls made inside LangChain agents). Usage is attributed to the chat and user
+bound by `services.request_context` and exported as metrics.
+
+Budgets are token counts per fixed window (LLM_BUDGET_WINDOW_SECONDS, default one
+day). Once the per-user (LLM_BUDGET_TOKENS_PER_USER) or global
+(LLM_BUDGET_TOKENS_GLOBAL) budget is spent, `invoke_llm` raises
+BudgetExceededError and callers fall back to cached or deterministic answers.
+A budget of 0 means unlimited.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from services.cancellation import run_cancellable
+from services.metrics import REGISTRY, span
+from services.request_context import current_chat_id, current_user_id
+from services.scheduler import scheduled
+from services.store import get_store
+
+BUDGET_TOKENS_PER_USER = int(os.getenv("LLM_BUDGET_TOKENS_PER_USER", "0"))
+BUDGET_TOKENS_GLOBAL = int(os.getenv("LLM_BUDGET_TOKENS_GLOBAL", "0"))
+BUDGET_WINDOW_SECONDS = float(os.getenv("LLM_BUDGET_WINDOW_SECONDS", "86400"))
+
+# USD per 1K tokens; defaults are gpt-4o-mini list prices
+COST_PER_1K_INPUT = float(os.getenv("LLM_COST_PER_1K_INPUT", "0.00015"))
+COST_PER_1K_OUTPUT = float(os.getenv("LLM_COST_PER_1K_OUTPUT", "0.0006"))
+
+ANONYMOUS_USER = "anonymous"
+
+LLM_CALLS = REGISTRY.counter(
+    "decryptify_llm_calls_total", "LLM calls by call site", ("call_site",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "decryptify_llm_tokens_total",
+    "LLM tokens by call site and kind (input or output)",
+    ("call_site", "kind"),
+)
+LLM_COST = REGISTRY.counter(
+    "decryptify_llm_cost_usd_total", "Estimated LLM spend in USD by call site", ("call_site",)
+)
+LLM_BUDGET_EXCEEDED = REGISTRY.counter(
+    "decryptify_llm_budget_exceeded_total",
+    "LLM calls refused because a budget was spent, by scope (user or global)",
+    ("scope",),
+)
+LLM_BUDGET_REMAINING = REGISTRY.gauge(
+    "decryptify_llm_budget_remaining_tokens",
+    "Tokens left in the current global budget window (-1 when unlimited)",
+)
+
+
+class BudgetExceededError(Exception):
+    """Raised when an LLM call would exceed the user or global token budget"""
+
+    def __init__(self, scope: str):
+        super().__init__(f"LLM token budget exceeded ({scope})")
+        self.scope = scope
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for providers that report no usage"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def cost_usd(input_tokens: int, output_tokens: int) -> float:
+    return input_tokens / 1000 * COST_PER_1K_INPUT + output_tokens / 1000 * COST_PER_1K_OUTPUT
+
+
+_TOTAL_FIELDS = ("calls", "input_tokens", "output_tokens", "cost_usd")
+
+# Lifetime totals per chat/user expire this long after they were first recorded
+USAGE_TOTALS_TTL = float(os.getenv("LLM_USAGE_TOTALS_TTL", str(30 * 86400)))
+
+
+class UsageLedger:
+    """Aggregates token usage per chat and user, and tracks budget windows
+
+    Counters live in the KV store (services.store), so budgets hold across
+    all API workers. Windows are fixed, aligned to multiples of
+    BUDGET_WINDOW_SECONDS since the epoch.
+    """
+
+    @staticmethod
+    def _window_key(scope: Tuple[str, str]) -> str:
+        window = int(time.time() // BUDGET_WINDOW_SECONDS)
+        return f"usage:window:{window}:{scope[0]}:{scope[1]}"
+
+    @staticmethod
+    def _total_key(scope: Tuple[str, str], field: str) -> str:
+        return f"usage:total:{scope[0]}:{scope[1]}:{field}"
+
+    def record(self, call_site: str, input_tokens: int, output_tokens: int) -> None:
+        chat_id = current_chat_id()
+        user_id = current_user_id() or ANONYMOUS_USER
+        cost = cost_usd(input_tokens, output_tokens)
+
+        LLM_CALLS.inc(call_site=call_site)
+        LLM_TOKENS.inc(input_tokens, call_site=call_site, kind="input")
+        LLM_TOKENS.inc(output_tokens, call_site=call_site, kind="output")
+        LLM_COST.inc(cost, call_site=call_site)
+
+        scopes = [("global", "all"), ("user", user_id)]
+        if chat_id:
+            scopes.append(("chat", chat_id))
+        store = get_store()
+        totals: Dict[str, float] = {}
+        for scope in scopes:
+            for field, amount in zip(_TOTAL_FIELDS, (1, input_tokens, output_tokens, cost)):
+                totals[self._total_key(scope, field)] = amount
+        store.incr_many(totals, ttl=USAGE_TOTALS_TTL)
+        store.incr_many(
+            {self._window_key(scope): input_tokens + output_tokens for scope in scopes},
+            ttl=BUDGET_WINDOW_SECONDS,
+        )
+
+    def _window_tokens(self, *scopes: Tuple[str, str]) -> List[float]:
+        return [value or 0 for value in get_store().get_many([self._window_key(scope) for scope in scopes])]
+
+    def exceeded_scope(self, user_id: Optional[str] = None) -> Optional[str]:
+        """Return the budget scope that is spent ("user" or "global"), or None"""
+        if not (BUDGET_TOKENS_GLOBAL or BUDGET_TOKENS_PER_USER):
+            return None
+        user_id = user_id or current_user_id() or ANONYMOUS_USER
+        global_tokens, user_tokens = self._window_tokens(("global", "all"), ("user", user_id))
+        if BUDGET_TOKENS_GLOBAL and global_tokens >= BUDGET_TOKENS_GLOBAL:
+            return "global"
+        if BUDGET_TOKENS_PER_USER and user_tokens >= BUDGET_TOKENS_PER_USER:
+            return "user"
+        return None
+
+    def global_remaining(self) -> float:
+        if not BUDGET_TOKENS_GLOBAL:
+            return -1
+        (global_tokens,) = self._window_tokens(("global", "all"))
+        return max(0, BUDGET_TOKENS_GLOBAL - global_tokens)
+
+    def snapshot(self, user_id: Optional[str] = None, chat_id: Optional[str] = None) -> Dict[str, Any]:
+        """Usage totals for the global scope and, optionally, one user and one chat"""
+        def view(scope: Tuple[str, str], budget: int) -> Dict[str, Any]:
+            keys = [self._total_key(scope, field) for field in _TOTAL_FIELDS]
+            values = [value or 0 for value in get_store().get_many(keys + [self._window_key(scope)])]
+            totals: Dict[str, Any] = {field: int(value) for field, value in zip(_TOTAL_FIELDS, values)}
+            totals["cost_usd"] = round(values[3], 6)
+            totals["window_tokens"] = int(values[4])
+            totals["window_budget"] = budget or None
+            return totals
+
+        result = {
+            "window_seconds": BUDGET_WINDOW_SECONDS,
+            "global": view(("global", "all"), BUDGET_TOKENS_GLOBAL),
+        }
+        if user_id:
+            result["user"] = view(("user", user_id), BUDGET_TOKENS_PER_USER)
+        if chat_id:
+            result["chat"] = view(("chat", chat_id), 0)
+        return result
+
+
+usage_ledger = UsageLedger()
+LLM_BUDGET_REMAINING.set_function(lambda: {(): usage_ledger.global_remaining()})
+
+
+def check_budget() -> None:
+    """Raise BudgetExceededError if the current user or the service is out of budget"""
+    scope = usage_ledger.exceeded_scope()
+    if scope:
+        LLM_BUDGET_EXCEEDED.inc(scope=scope)
+        raise BudgetExceededError(scope)
+
+
+def budget_available() -> bool:
+    return usage_ledger.exceeded_scope() is None
+
+
+def _message_usage(message: Any) -> Optional[Tuple[int, int]]:
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+    return None
+
+
+def invoke_llm(llm: Any, prompt: str, call_site: str) -> str:
+    """Invoke an LLM with a text prompt under budget control and return the text reply"""
+    check_budget()
+    # A cancelled request stops waiting; the call's usage is still recorded when it ends
+    return run_cancellable(_invoke, llm, prompt, call_site)
+
+
+def _invoke(llm: Any, prompt: str, call_site: str) -> str:
+    with scheduled("llm"), span("llm", call_site):
+        response = llm.invoke(prompt)
+
+    # Extract content based on the return type (could be message object or string)
+    text = response.content if hasattr(response, "content") else str(response)
+    usage = _message_usage(response) or (estimate_tokens(prompt), estimate_tokens(text))
+    usage_ledger.record(call_site, *usage)
+    return text
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Meters LLM calls made inside LangChain chains and agents (e.g. each ReAct step)"""
+
+    raise_error = True
+
+    def __init__(self, call_site: str):
+        self.call_site = call_site
+        self._prompt_tokens: Dict[Any, int] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id=None, **kwargs) -> None:
+        check_budget()
+        self._prompt_tokens[run_id] = sum(estimate_tokens(p) for p in prompts)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id=None, **kwargs) -> None:
+        check_budget()
+        self._prompt_tokens[run_id] = sum(
+            estimate_tokens(str(m.content)) for batch in messages for m in batch
+        )
+
+    def on_llm_end(self, response: Any, *, run_id=None, **kwargs) -> None:
+        estimated_input = self._prompt_tokens.pop(run_id, 0)
+        token_usage = (response.llm_output or {}).get("token_usage") if response.llm_output else None
+        if token_usage:
+            usage = (token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0))
+        else:
+            generations = [g for batch in response.generations for g in batch]
+            usage = None
+            for generation in generations:
+                usage = _message_usage(getattr(generation, "message", None))
+                if usage:
+                    break
+            if usage is None:
+                usage = (estimated_input, sum(estimate_tokens(g.text) for g in generations))
+        usage_ledger.record(self.call_site, *usage)
+
+    def on_llm_error(self, error: BaseException, *, run_id=None, **kwargs) -> None:
+        self._prompt_tokens.pop(run_id, None)
@@ -0,0 +1,383 @@
+"""
+Metrics - Prometheus-style counters, gauges and histograms with timing spans
+
+Metrics live in a process-wide registry and are rendered in the Prometheus text
+exposition format by the /metrics endpoint. Pipeline stages are timed with
+`span(stage, name)`, which feeds a single stage-duration histogram labelled by
+stage (route, agent, upstream, llm, parse, firestore) and a stage name.
+
+With a shared KV store (KV_BACKEND=redis) every worker publishes its samples
+to the store every METRICS_PUBLISH_INTERVAL seconds, and /metrics on any
+worker renders all of them: counters and histograms are summed over the
+workers, gauges (in-flight requests, hit ratios) get a `worker` label. A
+worker that stops publishing drops out after three intervals, so sums can go
+down as after a restart. With the in-process store only this worker's
+metrics are rendered.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from services.store import get_store
+
+logger = logging.getLogger("decryptify.metrics")
+
+# Seconds between publishes of this worker's samples to the shared store
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", "15"))
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+# (name suffix, label names, label values, value)
+Sample = Tuple[str, Sequence[str], Sequence[str], float]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def merge(self, per_worker: Dict[str, List[Sample]]) -> List[Sample]:
+        """Samples of this metric over several workers: values of the same series are summed"""
+        totals: Dict[Tuple[str, Tuple[str, ...], Tuple[str, ...]], float] = {}
+        for samples in per_worker.values():
+            for suffix, names, values, value in samples:
+                key = (suffix, tuple(names), tuple(values))
+                totals[key] = totals.get(key, 0.0) + value
+        return [(suffix, names, values, value) for (suffix, names, values), value in totals.items()]
+
+    def render(self, samples: Optional[List[Sample]] = None) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, names, values, value in self.samples() if samples is None else samples:
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("_total" if not self.name.endswith("_total") else "", self.labelnames, k, v) for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed when scraped"""
+
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def set_function(self, callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Compute the gauge's samples at scrape time instead of storing them"""
+        self._callback = callback
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        if self._callback:
+            items = sorted(self._callback().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [("", self.labelnames, k, v) for k, v in items]
+
+    def merge(self, per_worker: Dict[str, List[Sample]]) -> List[Sample]:
+        """A gauge is a worker's state (in flight, a ratio), so each worker keeps its series"""
+        return [
+            (suffix, tuple(names) + ("worker",), tuple(values) + (worker,), value)
+            for worker, samples in per_worker.items()
+            for suffix, names, values, value in samples
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution of observed values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts followed by the running sum and count
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+
+        samples = []
+        bucket_names = self.labelnames + ("le",)
+        for key, state in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                samples.append(("_bucket", bucket_names, key + (_format_value(bound),), cumulative))
+            samples.append(("_sum", self.labelnames, key, state[-2]))
+            samples.append(("_count", self.labelnames, key, state[-1]))
+        return samples
+
+
+class Registry:
+    """Collection of named metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different shape")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def collect(self) -> Dict[str, List[Sample]]:
+        """Current samples of every metric, by metric name"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.samples() for metric in metrics}
+
+    def render(self, per_worker: Optional[Dict[str, Dict[str, List[Sample]]]] = None) -> str:
+        """The metrics in the text format; with `per_worker` (worker -> collect() of
+        that worker), merged over the workers"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            if per_worker is None:
+                lines.extend(metric.render())
+            else:
+                samples = {worker: data.get(metric.name, []) for worker, data in per_worker.items()}
+                lines.extend(metric.render(metric.merge(samples)))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "decryptify_stage_duration_seconds",
+    "Duration of pipeline stages (route, agent, upstream, llm, parse, firestore)",
+    ("stage", "name"),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "decryptify_stage_errors_total",
+    "Pipeline stages that raised an exception",
+    ("stage", "name"),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "decryptify_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "decryptify_cache_hit_ratio",
+    "Share of cache lookups that were hits since process start",
+    ("cache",),
+)
+
+
+def record_stage(stage: str, name: str, seconds: float) -> None:
+    """Record the duration of a stage that was timed by the caller"""
+    STAGE_SECONDS.observe(seconds, stage=stage, name=name)
+    logger.debug("stage=%s name=%s duration_ms=%.1f", stage, name, seconds * 1000)
+
+
+@contextmanager
+def span(stage: str, name: str) -> Iterator[None]:
+    """Time a block as one pipeline stage; exceptions are counted and re-raised"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage, name=name)
+        raise
+    finally:
+        record_stage(stage, name, time.perf_counter() - started)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    totals: Dict[str, List[float]] = {}
+    for _, _, (cache, result), value in CACHE_REQUESTS.samples():
+        hits_and_total = totals.setdefault(cache, [0.0, 0.0])
+        if result == "hit":
+            hits_and_total[0] += value
+        hits_and_total[1] += value
+    return {(cache,): hits / total for cache, (hits, total) in totals.items() if total}
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
+
+
+def worker_id() -> str:
+    """This worker process, as host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def publish_metrics() -> None:
+    """Write this worker's samples to the shared store, next to the other workers'"""
+    store = get_store()
+    ttl = 3 * METRICS_PUBLISH_INTERVAL
+    now = time.time()
+    store.set(f"metrics:worker:{worker_id()}", REGISTRY.collect(), ttl=ttl)
+    # Workers that stopped publishing are dropped; a concurrent update losing an
+    # entry is corrected by that worker's next publish
+    workers: Dict[str, Any] = store.get("metrics:workers") or {}
+    workers = {worker: seen for worker, seen in workers.items() if now - seen < ttl}
+    workers[worker_id()] = now
+    store.set("metrics:workers", workers, ttl=ttl)
+
+
+def start_metrics_publisher() -> None:
+    """Publish this worker's samples every METRICS_PUBLISH_INTERVAL seconds (shared store only)"""
+    if not get_store().shared:
+        return
+
+    def run() -> None:
+        while True:
+            try:
+                publish_metrics()
+            except Exception as e:
+                logger.warning(f"Could not publish metrics: {str(e)}")
+            time.sleep(METRICS_PUBLISH_INTERVAL)
+
+    threading.Thread(target=run, name="metrics-publisher", daemon=True).start()
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text format, over all
+    workers when they share a store"""
+    store = get_store()
+    if not store.shared:
+        return REGISTRY.render()
+    try:
+        publish_metrics()
+        workers = sorted(store.get("metrics:workers") or {})
+        snapshots = store.get_many([f"metrics:worker:{worker}" for worker in workers])
+    except Exception as e:
+        logger.warning(f"Could not read other workers' metrics: {str(e)}")
+        return REGISTRY.render()
+    # This worker first, so series keep the local order (histogram buckets ascending)
+    per_worker = {worker_id(): REGISTRY.collect()}
+    for worker, snapshot in zip(workers, snapshots):
+        if snapshot is not None and worker not in per_worker:
+            per_worker[worker] = snapshot
+    return REGISTRY.render(per_worker)
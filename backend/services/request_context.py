@@ -0,0 +1,29 @@
+"""
+Request context - per-request values (chat and user ids) visible to agents and services
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_chat_id: ContextVar[Optional[str]] = ContextVar("chat_id", default=None)
+_user_id: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+
+
+def current_chat_id() -> Optional[str]:
+    return _chat_id.get()
+
+
+def current_user_id() -> Optional[str]:
+    return _user_id.get()
+
+
+@contextmanager
+def request_scope(chat_id: Optional[str] = None, user_id: Optional[str] = None) -> Iterator[None]:
+    """Bind the chat and user ids for the duration of a request"""
+    chat_token = _chat_id.set(chat_id)
+    user_token = _user_id.set(user_id)
+    try:
+        yield
+    finally:
+        _chat_id.reset(chat_token)
+        _user_id.reset(user_token)
@@ -0,0 +1,149 @@
+"""
+Scheduler - priority classes for shared worker capacity and upstream quotas
+
+Work runs in one of three priority classes, carried by the request context:
+
+- interactive: live chat traffic (the default)
+- background: refreshes and other work nobody is waiting on
+- batch: bulk screening
+
+Agent runs, CoinGecko calls and LLM calls each draw from a bounded pool
+(SCHED_AGENT_CAPACITY, SCHED_COINGECKO_CAPACITY, SCHED_LLM_CAPACITY; default
+8 each). A free slot goes to the highest class waiting, and a share of every
+pool (SCHED_INTERACTIVE_RESERVED, default 0.25) is only usable by interactive
+work. Background and batch work therefore soak up spare capacity without
+queueing ahead of chats, and chats always find headroom.
+
+Thread pools must run tasks in a copy of the caller's context
+(`contextvars.copy_context().run`) to keep the caller's class.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+
+from services.metrics import REGISTRY
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BACKGROUND, BATCH)  # highest first
+
+SCHED_INTERACTIVE_RESERVED = float(os.getenv("SCHED_INTERACTIVE_RESERVED", "0.25"))
+
+SCHED_WAIT_SECONDS = REGISTRY.histogram(
+    "decryptify_scheduler_wait_seconds",
+    "Time spent waiting for a pool slot, by pool and priority class",
+    ("pool", "priority"),
+)
+SCHED_IN_USE = REGISTRY.gauge(
+    "decryptify_scheduler_slots_in_use",
+    "Pool slots held, by pool and priority class",
+    ("pool", "priority"),
+)
+SCHED_WAITING = REGISTRY.gauge(
+    "decryptify_scheduler_waiting",
+    "Callers waiting for a pool slot, by pool and priority class",
+    ("pool", "priority"),
+)
+
+_priority: ContextVar[str] = ContextVar("priority", default=INTERACTIVE)
+# Pools the current context already holds a slot of (nested use doesn't take a second one)
+_held: ContextVar[frozenset] = ContextVar("held_pools", default=frozenset())
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """Run the block (and the calls it makes) in the given priority class"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PriorityPool:
+    """Counting semaphore that admits waiters strictly by priority class"""
+
+    def __init__(self, name: str, capacity: int, reserved: float = SCHED_INTERACTIVE_RESERVED):
+        self.name = name
+        self.capacity = max(1, capacity)
+        # Slots only interactive work may take; at least one unless the pool has a single slot
+        self.reserved = min(self.capacity - 1, math.ceil(self.capacity * reserved))
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._waiting: Dict[str, int] = {p: 0 for p in PRIORITIES}
+
+    def _limit(self, priority: str) -> int:
+        return self.capacity if priority == INTERACTIVE else self.capacity - self.reserved
+
+    def _can_take(self, priority: str) -> bool:
+        if self._in_use >= self._limit(priority):
+            return False
+        # Strict priority: never jump ahead of a waiting higher class
+        for higher in PRIORITIES[: PRIORITIES.index(priority)]:
+            if self._waiting[higher]:
+                return False
+        return True
+
+    def acquire(self, priority: str) -> None:
+        started = time.monotonic()
+        with self._cond:
+            if not self._can_take(priority):
+                self._waiting[priority] += 1
+                SCHED_WAITING.inc(pool=self.name, priority=priority)
+                try:
+                    while not self._can_take(priority):
+                        self._cond.wait()
+                finally:
+                    self._waiting[priority] -= 1
+                    SCHED_WAITING.dec(pool=self.name, priority=priority)
+            self._in_use += 1
+        SCHED_IN_USE.inc(pool=self.name, priority=priority)
+        SCHED_WAIT_SECONDS.observe(time.monotonic() - started, pool=self.name, priority=priority)
+
+    def release(self, priority: str) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+        SCHED_IN_USE.dec(pool=self.name, priority=priority)
+
+    @contextmanager
+    def slot(self, priority: str) -> Iterator[None]:
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+POOLS = {
+    "agent": PriorityPool("agent", int(os.getenv("SCHED_AGENT_CAPACITY", "8"))),
+    "coingecko": PriorityPool("coingecko", int(os.getenv("SCHED_COINGECKO_CAPACITY", "8"))),
+    "llm": PriorityPool("llm", int(os.getenv("SCHED_LLM_CAPACITY", "8"))),
+}
+
+
+@contextmanager
+def scheduled(pool: str) -> Iterator[None]:
+    """Hold a slot of the named pool at the current priority class"""
+    held = _held.get()
+    if pool in held:
+        # e.g. the ReAct agent calling the decryptify tool: already counted
+        yield
+        return
+    token = _held.set(held | {pool})
+    try:
+        with POOLS[pool].slot(current_priority()):
+            yield
+    finally:
+        _held.reset(token)
@@ -0,0 +1,307 @@
+"""
+Semantic cache - reuse ReAct agent answers for near-duplicate questions
+
+Messages are normalized (lowercased, ticker symbols mapped to project names),
+embedded on the CPU and matched against recent answers with a cosine-similarity
+nearest-neighbour search over an in-memory vector index. A cached answer is
+returned when:
+
+- its similarity is at least SEMANTIC_CACHE_THRESHOLD (default 0.88),
+- it is younger than SEMANTIC_CACHE_TTL seconds (default 600), and
+- both messages name the same projects, so "is solana safe?" never answers
+  "is ethereum safe?" however close the two embeddings are.
+
+Messages that lean on the conversation ("what about its founders?") are never
+cached, and callers only store answers the agent gave without any chat
+history, so the cache (shared by all users and chats) never replays an
+answer shaped by someone else's conversation. The index holds
+SEMANTIC_CACHE_MAX_ENTRIES answers (default 512); when full, expired entries
+go first, then SEMANTIC_CACHE_EVICTION picks the least recently used ("lru",
+default) or oldest ("fifo") entry.
+
+The index lives in each worker process and is not kept in the shared KV
+store: with N workers a repeated question hits only once it has been answered
+by the worker that receives it, so expect about 1/N of the single-worker hit
+rate, and clear() empties only the calling worker's index.
+
+The embedding model is fastembed's SEMANTIC_CACHE_MODEL (default
+BAAI/bge-small-en-v1.5). If fastembed or the model is unavailable, a hashed
+word and character n-gram embedder is used instead; it only catches
+near-verbatim repeats, so lower the threshold with care. The model is loaded
+by the API's startup preload (or a background thread on first use); until it
+is ready, lookups miss and answers are not stored.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import REGISTRY, record_cache
+
+logger = logging.getLogger("decryptify")
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.88"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+SEMANTIC_CACHE_EVICTION = os.getenv("SEMANTIC_CACHE_EVICTION", "lru").lower()
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "BAAI/bge-small-en-v1.5")
+
+SEMANTIC_CACHE_SIMILARITY = REGISTRY.histogram(
+    "decryptify_semantic_cache_similarity",
+    "Similarity of the nearest cached answer with matching projects, per lookup",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 1.0),
+)
+SEMANTIC_CACHE_ENTRIES = REGISTRY.gauge(
+    "decryptify_semantic_cache_entries", "Answers currently held in the semantic cache"
+)
+
+# Ticker symbols and nicknames -> canonical project name
+SYMBOL_ALIASES = {
+    "btc": "bitcoin",
+    "xbt": "bitcoin",
+    "eth": "ethereum",
+    "ether": "ethereum",
+    "sol": "solana",
+    "bnb": "binance",
+    "xrp": "ripple",
+    "ada": "cardano",
+    "doge": "dogecoin",
+    "dot": "polkadot",
+    "avax": "avalanche",
+    "matic": "polygon",
+    "pol": "polygon",
+    "link": "chainlink",
+    "ltc": "litecoin",
+    "uni": "uniswap",
+    "trx": "tron",
+    "shib": "shiba",
+    "atom": "cosmos",
+    "xlm": "stellar",
+    "usdt": "tether",
+    "usdc": "usd-coin",
+}
+
+# Words that carry no project identity; whatever remains is the message's entity set
+_GENERIC_WORDS = frozenset(
+    """
+    a about an and any anyone are as at be been best buy can could crypto
+    cryptocurrency currency coin coins did do does for from get good hold how
+    i in invest investing investment into is it legit legitimate me my
+    of on or project projects real reliable risk risky safe safety scam scams
+    secure security should sell so tell than the to token tokens trust
+    trusted trustworthy trustworthiness what whats which who why will with
+    worth would you your right now today currently think opinion rug pull
+    pulls ponzi fraud fraudulent rate rating score trust-score
+    """.split()
+)
+
+# Words that point back into the conversation; answers to these depend on history
+_CONTEXT_WORDS = frozenset(
+    "it its it's they them their this that these those he she his her him above previous same".split()
+)
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9\-]*")
+
+
+def normalize_message(message: str) -> Tuple[str, FrozenSet[str], bool]:
+    """Return (normalized text, project entities, whether the message refers to earlier context)"""
+    words = [SYMBOL_ALIASES.get(word, word) for word in _WORD_RE.findall(message.lower())]
+    entities = frozenset(word for word in words if word not in _GENERIC_WORDS and word not in _CONTEXT_WORDS)
+    refers_back = any(word in _CONTEXT_WORDS for word in words)
+    return " ".join(words), entities, refers_back
+
+
+class HashingEmbedder:
+    """Dependency-free embedder: hashed word unigrams/bigrams and character trigrams"""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = text.split()
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            padded = f" {text} "
+            features += [padded[i : i + 3] for i in range(len(padded) - 2)]
+            for feature in features:
+                index, sign = self._bucket(feature)
+                vectors[row, index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class FastEmbedEmbedder:
+    """Local ONNX sentence-embedding model via fastembed (CPU only)"""
+
+    def __init__(self, model_name: str):
+        from fastembed import TextEmbedding
+
+        self.name = model_name
+        self._model = TextEmbedding(model_name=model_name)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(list(self._model.embed(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def load_embedder():
+    """fastembed model when installed and loadable, else the hashing embedder"""
+    try:
+        embedder = FastEmbedEmbedder(SEMANTIC_CACHE_MODEL)
+        logger.info(f"Semantic cache using embedding model {SEMANTIC_CACHE_MODEL}")
+        return embedder
+    except Exception as e:
+        logger.warning(f"Embedding model unavailable ({e}); semantic cache falls back to hashed n-grams")
+        return HashingEmbedder()
+
+
+class SemanticCache:
+    """Fixed-capacity vector index of (message embedding, answer) pairs"""
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        eviction: str = SEMANTIC_CACHE_EVICTION,
+        embedder=None,
+    ):
+        if eviction not in ("lru", "fifo"):
+            raise ValueError(f"Unknown semantic cache eviction policy: {eviction}")
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self._embedder = embedder
+        self._lock = threading.Lock()
+        # Loading may download the model; it never holds up index operations
+        self._load_lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._inserted = np.zeros(max_entries, dtype=np.float64)
+        self._accessed = np.zeros(max_entries, dtype=np.float64)
+        self._used = np.zeros(max_entries, dtype=bool)
+        self._entities: List[Optional[FrozenSet[str]]] = [None] * max_entries
+        self._answers: List[Optional[str]] = [None] * max_entries
+
+    @property
+    def embedder(self):
+        """The embedder, loaded in the calling thread if needed (the startup preload)"""
+        if self._embedder is None:
+            with self._load_lock:
+                if self._embedder is None:
+                    self._embedder = load_embedder()
+        return self._embedder
+
+    def _ready_embedder(self):
+        """The embedder, or None while it loads in the background"""
+        if self._embedder is None:
+            with self._load_lock:
+                if self._embedder is None and self._loader is None:
+                    self._loader = threading.Thread(
+                        target=lambda: self.embedder, name="semantic-cache-model", daemon=True
+                    )
+                    self._loader.start()
+        return self._embedder
+
+    def lookup(self, message: str) -> Optional[str]:
+        """Cached answer for a near-duplicate message, or None"""
+        text, entities, refers_back = normalize_message(message)
+        if refers_back or not entities:
+            return None
+        embedder = self._ready_embedder()
+        if embedder is None:
+            record_cache("semantic", False)
+            return None
+
+        query = embedder.embed([text])[0]
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                record_cache("semantic", False)
+                return None
+            candidates = self._used & (self._inserted > now - self.ttl)
+            candidates &= np.fromiter(
+                (entry == entities for entry in self._entities), dtype=bool, count=self.max_entries
+            )
+            if not candidates.any():
+                record_cache("semantic", False)
+                return None
+
+            similarities = np.where(candidates, self._vectors @ query, -np.inf)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            SEMANTIC_CACHE_SIMILARITY.observe(similarity)
+            if similarity < self.threshold:
+                record_cache("semantic", False)
+                return None
+
+            self._accessed[best] = now
+            record_cache("semantic", True)
+            return self._answers[best]
+
+    def store(self, message: str, answer: str) -> None:
+        """Index an answer under its message; context-dependent messages are skipped"""
+        text, entities, refers_back = normalize_message(message)
+        if refers_back or not entities:
+            return
+        embedder = self._ready_embedder()
+        if embedder is None:
+            return
+
+        vector = embedder.embed([text])[0]
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            slot = self._free_slot(now)
+            self._vectors[slot] = vector
+            self._inserted[slot] = now
+            self._accessed[slot] = now
+            self._used[slot] = True
+            self._entities[slot] = entities
+            self._answers[slot] = answer
+            SEMANTIC_CACHE_ENTRIES.set(float(self._used.sum()))
+
+    def _free_slot(self, now: float) -> int:
+        free = np.flatnonzero(~self._used)
+        if free.size:
+            return int(free[0])
+        expired = np.flatnonzero(self._inserted <= now - self.ttl)
+        if expired.size:
+            return int(expired[0])
+        order = self._accessed if self.eviction == "lru" else self._inserted
+        return int(np.argmin(order))
+
+    def clear(self) -> None:
+        """Drop every answer from this worker's index"""
+        with self._lock:
+            self._vectors = None
+            self._inserted[:] = 0.0
+            self._accessed[:] = 0.0
+            self._used[:] = False
+            self._entities = [None] * self.max_entries
+            self._answers = [None] * self.max_entries
+            SEMANTIC_CACHE_ENTRIES.set(0.0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._used.sum())
+
+
+agent_answer_cache = SemanticCache()
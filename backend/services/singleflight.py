@@ -0,0 +1,82 @@
+"""
+Single-flight - coalesce concurrent identical computations
+
+The first caller for a key (the leader) runs the computation; callers that
+arrive while it is in flight wait for it and receive the same result or
+exception instead of starting their own copy. A waiter whose own request is
+cancelled stops waiting within WAIT_SLICE seconds; the leader carries on.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from services.cancellation import RequestCancelled, check_cancelled
+from services.metrics import REGISTRY
+
+# Seconds between a waiter's checks of its own cancel token
+WAIT_SLICE = 0.1
+
+SINGLEFLIGHT_CALLS = REGISTRY.counter(
+    "decryptify_singleflight_calls_total",
+    "Coalesced calls by group and role (leader ran the computation, waiter reused it)",
+    ("group", "role"),
+)
+SINGLEFLIGHT_WAITERS = REGISTRY.gauge(
+    "decryptify_singleflight_waiters",
+    "Callers currently waiting on an in-flight computation",
+    ("group",),
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent calls within this process"""
+
+    def __init__(self, group: str):
+        self.group = group
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run `fn` for `key`, or wait for the run already in flight and share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            SINGLEFLIGHT_CALLS.inc(group=self.group, role="waiter")
+            with SINGLEFLIGHT_WAITERS.track_inprogress(group=self.group):
+                while not call.done.wait(WAIT_SLICE):
+                    check_cancelled()
+            if isinstance(call.error, RequestCancelled):
+                # The leader's client went away; this caller still wants the result
+                return self.do(key, fn)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLEFLIGHT_CALLS.inc(group=self.group, role="leader")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,148 @@
+"""
+Snapshots - upstream datasets kept in local JSON files
+
+Some lookups need a whole upstream dataset (the contract addresses of every
+coin, every exchange) rather than one API call per query. A Snapshot keeps
+such a dataset in a JSON file shared by the workers:
+
+- load() reads the file lazily and again whenever it changes, so lookups
+  against the loaded data make no API call
+- a file older than its max age is rebuilt in a background thread, and
+  lookups keep using the old data meanwhile
+- a missing file is built on first use: by the caller with `wait`, else in
+  the background
+- builds are serialized across workers with a lock file (a worker that finds
+  another one building skips its own build), and a failed build is retried
+  after `retry` seconds
+
+The file is replaced atomically and holds the builder's dict plus "built_at".
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.metrics import REGISTRY
+
+logger = logging.getLogger("decryptify")
+
+SNAPSHOT_BUILDS = REGISTRY.counter(
+    "decryptify_snapshot_builds_total",
+    "Snapshot file builds by snapshot and outcome (ok, error)",
+    ("snapshot", "outcome"),
+)
+
+
+def write_snapshot(path: str, data: Dict[str, Any]) -> None:
+    """Stamp `data` with its build time and replace the file at `path` atomically"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({**data, "built_at": time.time()}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """A JSON file built by `build`, loaded lazily and rebuilt once older than `max_age` seconds"""
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        build: Callable[[], Dict[str, Any]],
+        max_age: float,
+        retry: float = 300.0,
+    ):
+        self.name = name
+        self.path = path
+        self.max_age = max_age
+        self.retry = retry
+        self._build = build
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._data: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._retry_at = 0.0
+
+    def load(self, wait: bool = False) -> Optional[Dict[str, Any]]:
+        """The snapshot's data, or None while there is none. Without the file, `wait`
+        builds it before returning; otherwise it is built in the background."""
+        try:
+            mtime: Optional[float] = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime is None:
+            if not wait:
+                self._refresh_in_background()
+                return self._data
+            # Wait for a background build rather than starting another one
+            thread = self._thread
+            if thread is not None:
+                thread.join()
+            with self._lock:
+                if not os.path.exists(self.path) and time.monotonic() >= self._retry_at:
+                    if not self.refresh():
+                        self._retry_at = time.monotonic() + self.retry
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return self._data
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        with open(self.path, encoding="utf-8") as f:
+                            self._data = json.load(f)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Could not load {self.name} snapshot {self.path}: {str(e)}")
+                    self._mtime = mtime
+        if self._data is not None and time.time() - self._data.get("built_at", 0) > self.max_age:
+            self._refresh_in_background()
+        return self._data
+
+    @property
+    def version(self) -> Optional[float]:
+        """Build time of the loaded data, or None without any"""
+        data = self.load()
+        return data.get("built_at") if data is not None else None
+
+    def refresh(self) -> bool:
+        """Rebuild the file unless another worker is already doing it; True when rebuilt"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = open(self.path + ".lock", "a")
+        except OSError as e:
+            logger.warning(f"Cannot build {self.name} snapshot {self.path}: {str(e)}")
+            return False
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+            try:
+                write_snapshot(self.path, self._build())
+            except Exception as e:
+                SNAPSHOT_BUILDS.inc(snapshot=self.name, outcome="error")
+                logger.warning(f"Could not build {self.name} snapshot: {str(e)}")
+                return False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        SNAPSHOT_BUILDS.inc(snapshot=self.name, outcome="ok")
+        logger.info(f"Built {self.name} snapshot {self.path}")
+        return True
+
+    def _refresh_in_background(self) -> None:
+        def run() -> None:
+            if not self.refresh():
+                self._retry_at = time.monotonic() + self.retry
+
+        with self._lock:
+            if (self._thread is not None and self._thread.is_alive()) or time.monotonic() < self._retry_at:
+                return
+            self._thread = threading.Thread(target=run, name=f"{self.name}-refresh", daemon=True)
+            self._thread.start()
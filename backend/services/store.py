@@ -0,0 +1,202 @@
+"""
+Store - key-value backend for state shared between API workers
+
+Conversation memory, chat ownership, response caches and LLM usage counters
+live behind `KVStore`, so a deployment can run several uvicorn workers or
+replicas without losing a chat's context when requests land on different
+processes.
+
+KV_BACKEND selects the implementation:
+
+- "memory" (default): `InProcessStore`, a dict in this process. Correct only
+  with a single worker.
+- "redis": `RedisStore`, talking the Redis protocol to KV_URL (default
+  redis://localhost:6379/0). Any Redis-compatible server works, including the
+  `scripts.kv_standin` stand-in for local runs and load tests.
+
+Values must be JSON-serializable; TTLs are in seconds.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+KV_BACKEND = os.getenv("KV_BACKEND", "memory").lower()
+KV_URL = os.getenv("KV_URL", "redis://localhost:6379/0")
+KV_PREFIX = os.getenv("KV_PREFIX", "decryptify:")
+
+# State of idle chats (conversation memory, owner) is dropped after this many seconds
+CHAT_MEMORY_TTL = float(os.getenv("CHAT_MEMORY_TTL", str(7 * 86400)))
+
+
+class KVStore:
+    """Minimal key-value interface: values, append-only lists and counters"""
+
+    shared = False  # True when other processes see the same data
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def append(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Append to the list at `key`, refreshing its TTL"""
+        raise NotImplementedError
+
+    def get_list(self, key: str) -> List[Any]:
+        raise NotImplementedError
+
+    def incr_many(self, amounts: Dict[str, float], ttl: Optional[float] = None) -> None:
+        """Add to several counters at once; new counters expire after `ttl`"""
+        raise NotImplementedError
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        return [self.get(key) for key in keys]
+
+
+class InProcessStore(KVStore):
+    """Dict-backed store for single-worker deployments"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._writes = 0
+
+    def _live(self, key: str, now: float) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= now:
+            del self._data[key]
+            return None
+        return value
+
+    def _expiry(self, ttl: Optional[float], now: float) -> Optional[float]:
+        return now + ttl if ttl is not None else None
+
+    def _sweep(self, now: float) -> None:
+        # Drop expired keys now and then so abandoned chats don't pile up
+        self._writes += 1
+        if self._writes % 1024 == 0:
+            for key in [k for k, (expires, _) in self._data.items() if expires is not None and expires <= now]:
+                del self._data[key]
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            return self._live(key, time.monotonic())
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (self._expiry(ttl, now), value)
+            self._sweep(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def append(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            items = self._live(key, now) or []
+            items.append(value)
+            self._data[key] = (self._expiry(ttl, now), items)
+            self._sweep(now)
+
+    def get_list(self, key: str) -> List[Any]:
+        with self._lock:
+            return list(self._live(key, time.monotonic()) or [])
+
+    def incr_many(self, amounts: Dict[str, float], ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, amount in amounts.items():
+                entry = self._data.get(key)
+                if entry is None or (entry[0] is not None and entry[0] <= now):
+                    self._data[key] = (self._expiry(ttl, now), amount)
+                else:
+                    self._data[key] = (entry[0], entry[1] + amount)
+
+
+class RedisStore(KVStore):
+    """Redis-protocol store shared by all workers and replicas (needs the `redis` package)"""
+
+    shared = True
+
+    def __init__(self, url: str = KV_URL, prefix: str = KV_PREFIX):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, protocol=2, socket_timeout=5, socket_connect_timeout=5)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    @staticmethod
+    def _ms(ttl: float) -> int:
+        return max(1, int(ttl * 1000))
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        if not keys:
+            return []
+        return [json.loads(raw) if raw is not None else None for raw in self._client.mget([self._key(k) for k in keys])]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._client.set(self._key(key), json.dumps(value), px=self._ms(ttl) if ttl is not None else None)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._key(key))
+
+    def append(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        pipe.rpush(self._key(key), json.dumps(value))
+        if ttl is not None:
+            pipe.pexpire(self._key(key), self._ms(ttl))
+        pipe.execute()
+
+    def get_list(self, key: str) -> List[Any]:
+        return [json.loads(raw) for raw in self._client.lrange(self._key(key), 0, -1)]
+
+    def incr_many(self, amounts: Dict[str, float], ttl: Optional[float] = None) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for key, amount in amounts.items():
+            pipe.incrbyfloat(self._key(key), amount)
+            if ttl is not None:
+                # NX: only counters created by this call get a TTL, so windows don't slide
+                pipe.pexpire(self._key(key), self._ms(ttl), nx=True)
+        pipe.execute()
+
+
+_store: Optional[KVStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> KVStore:
+    """The process-wide store selected by KV_BACKEND, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if KV_BACKEND == "redis":
+                    _store = RedisStore()
+                elif KV_BACKEND == "memory":
+                    _store = InProcessStore()
+                else:
+                    raise ValueError(f"Unknown KV_BACKEND: {KV_BACKEND}")
+    return _store
+
+
+def set_store(store: KVStore) -> None:
+    """Use the given store instead of the configured one"""
+    global _store
+    _store = store
@@ -0,0 +1,99 @@
+"""
+Streaming - agent progress as events, from worker threads to a streaming response
+
+StreamingCallbackHandler turns LangChain callbacks into events on an
+EventStream while the ReAct agent runs:
+
+- {"type": "tool_start", "tool": ..., "input": ...} when a tool is called
+- {"type": "tool_end", "tool": ..., "output": ...} when it returns
+- {"type": "token", "text": ...} for each piece of the final answer (the
+  reasoning the model writes before "Final Answer:" is not forwarded)
+
+The endpoint adds a final event with the stored reply. A disconnected client
+cancels the run (see services/cancellation.py).
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+_DONE = object()
+
+
+class EventStream:
+    """Events put by worker threads, read with `async for` on the event loop"""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, event: Dict[str, Any]) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, _DONE)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await self._queue.get()
+            if event is _DONE:
+                return
+            yield event
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """Forwards tool calls and final-answer tokens of an agent run to an EventStream"""
+
+    raise_error = True
+
+    def __init__(self, events: EventStream):
+        self.events = events
+        self._text: Dict[UUID, str] = {}
+        self._tools: Dict[UUID, str] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs) -> None:
+        self._text[run_id] = ""
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs
+    ) -> None:
+        self._text[run_id] = ""
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs) -> None:
+        before = self._text.get(run_id, "")
+        text = self._text[run_id] = before + token
+        marker = text.find(FINAL_ANSWER_MARKER)
+        if marker == -1:
+            return
+        answer_start = marker + len(FINAL_ANSWER_MARKER)
+        piece = text[max(answer_start, len(before)):]
+        if len(before) <= answer_start:
+            # First piece of the answer: drop the space after the marker
+            piece = piece.lstrip()
+        if piece:
+            self.events.put({"type": "token", "text": piece})
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs) -> None:
+        self._text.pop(run_id, None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._text.pop(run_id, None)
+
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs
+    ) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._tools[run_id] = name
+        self.events.put({"type": "tool_start", "tool": name, "input": input_str})
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs) -> None:
+        name = self._tools.pop(run_id, "tool")
+        content = getattr(output, "content", output)
+        self.events.put({"type": "tool_end", "tool": name, "output": str(content)})
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        name = self._tools.pop(run_id, "tool")
+        self.events.put({"type": "tool_end", "tool": name, "error": str(error)})
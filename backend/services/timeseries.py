@@ -0,0 +1,235 @@
+"""
+Time series - market snapshots per coin in append-only, memory-mapped columns
+
+Every tracked coin has a directory under TIMESERIES_DIR (default
+backend/data/timeseries) with one little-endian float64 file per column:
+ts (unix seconds), price, market_cap and volume. A snapshot appends one value
+to each column; reads memory-map the columns, so a range query only touches
+the pages it needs (timestamps are sorted, so the range is a binary search).
+
+Snapshots are recorded whenever coin_info fetches market data, at most one per
+TIMESERIES_MIN_INTERVAL seconds per coin (default 300), and can be backfilled
+from CoinGecko with scripts/backfill_timeseries.py. Writers take a per-coin
+file lock, so several workers can share the directory. Recording is best
+effort: on a read-only filesystem it is skipped (disable it outright with
+TIMESERIES_ENABLED=false).
+"""
+import fcntl
+import logging
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from services.metrics import REGISTRY
+
+logger = logging.getLogger("decryptify")
+
+TIMESERIES_ENABLED = os.getenv("TIMESERIES_ENABLED", "true").lower() == "true"
+TIMESERIES_DIR = os.getenv(
+    "TIMESERIES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "timeseries"),
+)
+TIMESERIES_MIN_INTERVAL = float(os.getenv("TIMESERIES_MIN_INTERVAL", "300"))
+
+COLUMNS = ("ts", "price", "market_cap", "volume")
+DTYPE = np.dtype("<f8")
+SECONDS_PER_YEAR = 365.25 * 86400
+
+TIMESERIES_APPENDS = REGISTRY.counter(
+    "decryptify_timeseries_appends_total",
+    "Market snapshots by outcome (written, skipped as too recent, failed)",
+    ("outcome",),
+)
+
+_COIN_ID = re.compile(r"^[a-z0-9][a-z0-9._-]*$")
+
+
+class TimeSeriesStore:
+    """Columnar per-coin market history on disk"""
+
+    def __init__(self, root: str = TIMESERIES_DIR, min_interval: float = TIMESERIES_MIN_INTERVAL):
+        self.root = root
+        self.min_interval = min_interval
+        # Guards _coin_locks; each coin's writers are serialized by its own lock
+        self._lock = threading.Lock()
+        self._coin_locks: Dict[str, threading.Lock] = {}
+        self._last_ts: Dict[str, float] = {}
+
+    def _dir(self, coin_id: str) -> str:
+        if not _COIN_ID.match(coin_id):
+            raise ValueError(f"Invalid coin id: {coin_id!r}")
+        return os.path.join(self.root, coin_id)
+
+    def _path(self, coin_id: str, column: str) -> str:
+        return os.path.join(self._dir(coin_id), f"{column}.f64")
+
+    @contextmanager
+    def _locked(self, coin_id: str) -> Iterator[str]:
+        """Exclusive lock on a coin's directory, across threads (a lock per coin) and
+        processes (flock); other coins are not held up"""
+        directory = self._dir(coin_id)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            coin_lock = self._coin_locks.setdefault(coin_id, threading.Lock())
+        with coin_lock, open(os.path.join(directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield directory
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _rows(self, coin_id: str) -> int:
+        """Complete rows; a column longer than the others holds an interrupted append"""
+        sizes = []
+        for column in COLUMNS:
+            try:
+                sizes.append(os.path.getsize(self._path(coin_id, column)))
+            except FileNotFoundError:
+                return 0
+        return min(sizes) // DTYPE.itemsize
+
+    def _repair(self, coin_id: str, rows: int) -> None:
+        for column in COLUMNS:
+            path = self._path(coin_id, column)
+            if os.path.exists(path) and os.path.getsize(path) > rows * DTYPE.itemsize:
+                os.truncate(path, rows * DTYPE.itemsize)
+
+    def last_timestamp(self, coin_id: str) -> Optional[float]:
+        rows = self._rows(coin_id)
+        if not rows:
+            return None
+        with open(self._path(coin_id, "ts"), "rb") as f:
+            f.seek((rows - 1) * DTYPE.itemsize)
+            return float(np.frombuffer(f.read(DTYPE.itemsize), dtype=DTYPE)[0])
+
+    def append(
+        self,
+        coin_id: str,
+        price: float,
+        market_cap: Optional[float],
+        volume: Optional[float],
+        ts: Optional[float] = None,
+    ) -> bool:
+        """Record a snapshot; False when the previous one is under min_interval old"""
+        ts = time.time() if ts is None else ts
+        last = self._last_ts.get(coin_id)
+        if last is not None and ts - last < self.min_interval:
+            TIMESERIES_APPENDS.inc(outcome="skipped")
+            return False
+        with self._locked(coin_id):
+            rows = self._rows(coin_id)
+            self._repair(coin_id, rows)
+            last = self.last_timestamp(coin_id)
+            if last is not None and ts - last < self.min_interval:
+                self._last_ts[coin_id] = last
+                TIMESERIES_APPENDS.inc(outcome="skipped")
+                return False
+            values = (ts, price, market_cap, volume)
+            for column, value in zip(COLUMNS, values):
+                with open(self._path(coin_id, column), "ab") as f:
+                    f.write(np.array([np.nan if value is None else value], dtype=DTYPE).tobytes())
+            self._last_ts[coin_id] = ts
+        TIMESERIES_APPENDS.inc(outcome="written")
+        return True
+
+    def write_history(self, coin_id: str, columns: Dict[str, np.ndarray]) -> int:
+        """Merge rows (e.g. a backfill) into a coin's history, keeping existing samples
+        on duplicate timestamps; rewrites the columns atomically. Returns the row count"""
+        with self._locked(coin_id):
+            existing = self.series(coin_id)
+            merged = {c: np.concatenate([existing[c], np.asarray(columns[c], dtype=DTYPE)]) for c in COLUMNS}
+            # Stable sort keeps existing rows ahead of new ones with the same timestamp
+            order = np.argsort(merged["ts"], kind="stable")
+            ts = merged["ts"][order]
+            keep = np.ones(len(ts), dtype=bool)
+            keep[1:] = ts[1:] != ts[:-1]
+            for column in COLUMNS:
+                path = self._path(coin_id, column)
+                merged[column][order][keep].astype(DTYPE).tofile(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            rows = int(keep.sum())
+            if rows:
+                self._last_ts[coin_id] = float(ts[keep][-1])
+        return rows
+
+    def series(
+        self, coin_id: str, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Dict[str, np.ndarray]:
+        """Columns for start <= ts <= end (unix seconds; open-ended when None)"""
+        rows = self._rows(coin_id)
+        if not rows:
+            return {column: np.empty(0, dtype=DTYPE) for column in COLUMNS}
+        ts = np.memmap(self._path(coin_id, "ts"), dtype=DTYPE, mode="r", shape=(rows,))
+        first = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        last = rows if end is None else int(np.searchsorted(ts, end, side="right"))
+        result = {"ts": np.array(ts[first:last])}
+        for column in COLUMNS[1:]:
+            values = np.memmap(self._path(coin_id, column), dtype=DTYPE, mode="r", shape=(rows,))
+            result[column] = np.array(values[first:last])
+        return result
+
+    def coins(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root) if _COIN_ID.match(name) and self._rows(name)
+        )
+
+
+def volatility(ts: np.ndarray, prices: np.ndarray) -> Optional[float]:
+    """Annualized volatility of log returns, for irregularly spaced samples"""
+    valid = np.isfinite(prices) & (prices > 0)
+    ts, prices = ts[valid], prices[valid]
+    if len(prices) < 3:
+        return None
+    years = (ts[-1] - ts[0]) / SECONDS_PER_YEAR
+    if years <= 0:
+        return None
+    returns = np.diff(np.log(prices))
+    return float(math.sqrt(np.sum(returns * returns) / years))
+
+
+def max_drawdown(prices: np.ndarray) -> Optional[float]:
+    """Largest peak-to-trough fall as a fraction of the peak (0.4 = -40%)"""
+    prices = prices[np.isfinite(prices)]
+    if len(prices) < 2:
+        return None
+    peaks = np.maximum.accumulate(prices)
+    return float(np.max(1.0 - prices / peaks))
+
+
+timeseries_store = TimeSeriesStore()
+
+
+def record_snapshot(info: Dict) -> None:
+    """Record a coin_info market data dict (best effort)"""
+    if not TIMESERIES_ENABLED or info.get("current_price") is None:
+        return
+    try:
+        timeseries_store.append(
+            info["id"], info["current_price"], info.get("market_cap"), info.get("total_volume")
+        )
+    except (OSError, ValueError) as e:
+        TIMESERIES_APPENDS.inc(outcome="failed")
+        logger.warning(f"Could not record market snapshot for {info.get('id')}: {str(e)}")
+
+
+def history_metrics(coin_id: str, days: float = 30) -> Dict[str, Optional[float]]:
+    """Volatility and max drawdown over the last `days`, from local history only"""
+    if not TIMESERIES_ENABLED:
+        return {"volatility": None, "max_drawdown": None, "samples": 0}
+    try:
+        series = timeseries_store.series(coin_id, start=time.time() - days * 86400)
+    except (OSError, ValueError):
+        return {"volatility": None, "max_drawdown": None, "samples": 0}
+    return {
+        "volatility": volatility(series["ts"], series["price"]),
+        "max_drawdown": max_drawdown(series["price"]),
+        "samples": len(series["ts"]),
+    }
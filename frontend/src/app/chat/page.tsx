@@ -8,7 +8,7 @@ export default function ChatPage() {
   return (
     <Layout>
       <div className="w-full h-full flex flex-col">
-        <Chat />
+        <Chat streaming />
       </div>
     </Layout>
   );
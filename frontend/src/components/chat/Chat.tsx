@@ -1,5 +1,5 @@
 import { apiService } from '@/services/api';
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import ChatInput from './ChatInput';
 import { MessageRole } from './ChatMessage';
 import ChatSuggestions from './ChatSuggestions';
@@ -29,6 +29,8 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
   const [chatId, setChatId] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [loadingChat, setLoadingChat] = useState(false);
+  // Aborting it stops the reply in progress (and cancels the backend run)
+  const abortRef = useRef<AbortController | null>(null);
   
   // Example suggestions based on the image
   const suggestions: Suggestion[] = [
@@ -71,11 +73,13 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
     setMessages(prev => [...prev, newMessage]);
     setIsProcessing(true);
     setError(null);
+    const controller = new AbortController();
+    abortRef.current = controller;
     
     try {
       // If this is the first message, create a new chat
       if (!chatId) {
-        const createResponse = await apiService.createChat(content);
+        const createResponse = await apiService.createChat(content, controller.signal);
         setChatId(createResponse.chat_id);
         
         // After creating the chat, we need to get the first response
@@ -94,9 +98,34 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
           
           setMessages(prev => [...prev, assistantMessage]);
         }
+      } else if (streaming) {
+        // Show the answer as it is written
+        const assistantId = crypto.randomUUID();
+        setMessages(prev => [...prev, { id: assistantId, content: '', role: 'assistant' }]);
+        const setContent = (update: (content: string) => string) =>
+          setMessages(prev =>
+            prev.map(msg => (msg.id === assistantId ? { ...msg, content: update(msg.content) } : msg))
+          );
+
+        try {
+          const final = await apiService.streamMessage(
+            chatId,
+            content,
+            event => {
+              if (event.type === 'token') {
+                setContent(current => current + event.text);
+              }
+            },
+            controller.signal
+          );
+          setContent(() => final.content);
+        } catch (err) {
+          setMessages(prev => prev.filter(msg => msg.id !== assistantId));
+          throw err;
+        }
       } else {
         // Send message to existing chat
-        const response = await apiService.sendMessage(chatId, content);
+        const response = await apiService.sendMessage(chatId, content, controller.signal);
         
         const assistantMessage: Message = {
           id: crypto.randomUUID(),
@@ -107,6 +136,10 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
         setMessages(prev => [...prev, assistantMessage]);
       }
     } catch (err) {
+      if (controller.signal.aborted) {
+        // Stopped by the user; the backend keeps no reply either
+        return;
+      }
       setError(err instanceof Error ? err.message : 'An error occurred');
       
       // Add an error message to the chat
@@ -117,9 +150,19 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
       };
       setMessages(prev => [...prev, errorMessage]);
     } finally {
+      if (abortRef.current === controller) {
+        abortRef.current = null;
+      }
       setIsProcessing(false);
     }
   };
+
+  const handleStop = () => {
+    abortRef.current?.abort();
+  };
+
+  // Stop a reply in progress when leaving the page
+  useEffect(() => () => abortRef.current?.abort(), []);
   
   const handleSuggestionClick = (suggestion: Suggestion) => {
     handleSendMessage(suggestion.title);
@@ -207,6 +250,7 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
     // Handle starting a new chat
   const startNewChat = () => {
     // Clear current chat state
+    abortRef.current?.abort();
     setMessages([]);
     setChatId(null);
     setError(null);
@@ -256,6 +300,7 @@ const Chat: React.FC<ChatProps> = ({ streaming = false }) => {
         
         <ChatInput 
           onSendMessage={handleSendMessage}
+          onStop={handleStop}
           isProcessing={isProcessing}
           onTyping={handleTyping}
         />
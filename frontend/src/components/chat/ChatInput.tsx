@@ -3,11 +3,12 @@ import { PaperAirplaneIcon } from '@heroicons/react/24/solid';
 
 interface ChatInputProps {
   onSendMessage: (message: string) => void;
+  onStop?: () => void; // Shown as a stop button while processing
   isProcessing?: boolean;
   onTyping?: (isTyping: boolean) => void;
 }
 
-const ChatInput: React.FC<ChatInputProps> = ({ onSendMessage, isProcessing = false, onTyping }) => {
+const ChatInput: React.FC<ChatInputProps> = ({ onSendMessage, onStop, isProcessing = false, onTyping }) => {
   const [message, setMessage] = useState('');
 
   useEffect(() => {
@@ -35,6 +36,19 @@ const ChatInput: React.FC<ChatInputProps> = ({ onSendMessage, isProcessing = fal
         } focus:outline-none focus:ring-2 focus:ring-primary-purple dark:focus:ring-primary-lightPurple shadow-[0_2px_6px_rgba(0,0,0,0.05)] dark:shadow-[0_2px_6px_rgba(0,0,0,0.2)] backdrop-blur-sm transition-all duration-300 text-sm text-gray-800 dark:text-gray-200 placeholder:text-gray-500 dark:placeholder:text-gray-400`}
         disabled={isProcessing}
       />      
+      {isProcessing && onStop ? (
+        <button
+          type="button"
+          onClick={onStop}
+          aria-label="Stop"
+          title="Stop"
+          className="absolute right-2.5 top-1/2 -translate-y-1/2 w-8 h-8 bg-gradient-to-r from-primary-purple to-primary-mediumBlue hover:scale-105 dark:from-[#9e6bd2] dark:to-[#6490d9] rounded-full flex items-center justify-center text-white transition-all duration-300 shadow-md dark:shadow-[0_0_10px_rgba(156,112,223,0.3)]"
+        >
+          <svg width="12" height="12" viewBox="0 0 12 12" xmlns="http://www.w3.org/2000/svg">
+            <rect width="12" height="12" rx="2" fill="white" />
+          </svg>
+        </button>
+      ) : (
       <button
         type="submit"
         disabled={isProcessing}        className={`absolute right-2.5 top-1/2 -translate-y-1/2 w-8 h-8 ${
@@ -56,6 +70,7 @@ const ChatInput: React.FC<ChatInputProps> = ({ onSendMessage, isProcessing = fal
           </svg>
         )}
       </button>
+      )}
     </form>
   );
 };
@@ -1,4 +1,5 @@
 // API service for communicating with the Python backend
+import { auth } from './firebase';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
 
@@ -11,7 +12,6 @@ export interface Message {
 
 export interface CreateChatRequest {
   initial_message: string;
-  user_id?: string;
 }
 
 export interface ChatRequest {
@@ -36,6 +36,20 @@ export interface ChatResponse {
   status: string;
 }
 
+export interface JobResponse {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  result?: { chat_id: string; message: ApiMessage } | null;
+  error?: string | null;
+}
+
+export type StreamEvent =
+  | { type: 'tool_start'; tool: string; input: string }
+  | { type: 'tool_end'; tool: string; output?: string; error?: string }
+  | { type: 'token'; text: string }
+  | { type: 'final'; chat_id: string; message: ApiMessage }
+  | { type: 'error'; detail: string };
+
 export interface ChatHistoryResponse {
   chat_id: string;
   messages: ApiMessage[];
@@ -49,37 +63,121 @@ export class APIService {
     this.baseUrl = API_BASE_URL;
   }
 
-  async createChat(initialMessage: string, userId?: string): Promise<CreateChatResponse> {
-    const response = await fetch(`${this.baseUrl}/api/chats/create`, {
+  // The backend identifies the user from the Firebase ID token, never from the request body
+  private async headers(): Promise<Record<string, string>> {
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    const token = await auth.currentUser?.getIdToken();
+    if (token) {
+      headers['Authorization'] = `Bearer ${token}`;
+    }
+    return headers;
+  }
+
+  async createChat(initialMessage: string, signal?: AbortSignal): Promise<CreateChatResponse> {
+    const job = await this.runJob({ message: initialMessage }, signal);
+    return { chat_id: job.chat_id, status: 'success' };
+  }
+
+  async sendMessage(chatId: string, message: string, signal?: AbortSignal): Promise<ChatResponse> {
+    const job = await this.runJob({ message, chat_id: chatId }, signal);
+    return { chat_id: job.chat_id, message: job.message, status: 'success' };
+  }
+
+  // Long analyses run as backend jobs, so no request stays open while the agents work.
+  // Cached answers come back at once. Aborting the signal cancels the job; a job
+  // nobody polls any more (the tab was closed) is cancelled by the backend.
+  private async runJob(
+    body: {
+      message: string;
+      chat_id?: string;
+    },
+    signal?: AbortSignal
+  ): Promise<{ chat_id: string; message: ApiMessage }> {
+    const response = await fetch(`${this.baseUrl}/api/jobs`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        initial_message: initialMessage,
-        user_id: userId,
-      }),
+      headers: await this.headers(),
+      body: JSON.stringify(body),
+      signal,
     });
 
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    return response.json();
+    let job: JobResponse = await response.json();
+    let delay = 500;
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise((resolve) => setTimeout(resolve, delay));
+      if (signal?.aborted) {
+        await this.cancelJob(job.job_id).catch(() => undefined);
+        throw new DOMException('Job cancelled', 'AbortError');
+      }
+      delay = Math.min(delay * 1.5, 3000);
+      job = await this.getJob(job.job_id);
+    }
+
+    if (job.status === 'failed' || !job.result) {
+      throw new Error(job.error || 'Analysis failed');
+    }
+    return job.result;
   }
 
-  async sendMessage(chatId: string, message: string): Promise<ChatResponse> {
-    const response = await fetch(`${this.baseUrl}/api/chats/message`, {
+  // Streams the agent's progress and answer; aborting the signal cancels the run on the backend
+  async streamMessage(
+    chatId: string,
+    message: string,
+    onEvent: (event: StreamEvent) => void,
+    signal?: AbortSignal
+  ): Promise<ApiMessage> {
+    const response = await fetch(`${this.baseUrl}/api/chats/message/stream`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        chat_id: chatId,
-        message: message,
-      }),
+      headers: await this.headers(),
+      body: JSON.stringify({ chat_id: chatId, message }),
+      signal,
     });
 
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let final: ApiMessage | null = null;
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() ?? '';
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event: StreamEvent = JSON.parse(line);
+        onEvent(event);
+        if (event.type === 'final') final = event.message;
+        if (event.type === 'error') throw new Error(event.detail);
+      }
+    }
+
+    if (!final) {
+      throw new Error('Stream ended without an answer');
+    }
+    return final;
+  }
+
+  async getJob(jobId: string): Promise<JobResponse> {
+    const response = await fetch(`${this.baseUrl}/api/jobs/${jobId}`);
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    return response.json();
+  }
+
+  async cancelJob(jobId: string): Promise<JobResponse> {
+    const response = await fetch(`${this.baseUrl}/api/jobs/${jobId}`, { method: 'DELETE' });
+
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }